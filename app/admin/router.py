@@ -0,0 +1,37 @@
+"""
+Router module for operational endpoints.
+Reports on the running process for administrators, such as the slowest
+query shapes and their plans.
+"""
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, status
+
+from app.auth.router import get_admin_user
+from app.core.slow_queries import slow_query_log
+from app.models import User
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(default=20, ge=1, le=200),
+    order_by: Literal["total_ms", "count", "max_ms", "mean_ms"] = "total_ms",
+    current_user: User = Depends(get_admin_user),
+):
+    """
+    Get the slowest statement shapes seen by this process.
+
+    Returns:
+        dict: Threshold, number of shapes and, per shape, its execution
+        count, total, mean and max time, query plan and fully scanned tables
+    """
+    return slow_query_log.top(limit, order_by)
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries(current_user: User = Depends(get_admin_user)):
+    """Forget the slow queries recorded so far."""
+    slow_query_log.clear()
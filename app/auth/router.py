@@ -10,6 +10,7 @@ from passlib.context import CryptContext
 from pydantic import BaseModel, Field, validator
 from sqlalchemy.orm import Session
 
+from app.core.tracing import traced
 from app.database import get_db
 from app.models import User, UserRole
 
@@ -75,7 +76,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-async def get_current_user(
+# Sync, so FastAPI runs it in the thread pool: its query checks out the
+# request's connection, and waiting for a free one must not block the event
+# loop that closes the sessions holding them
+@traced("auth.get_current_user")
+def get_current_user(
     token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
 ) -> User:
     credentials_exception = HTTPException(
@@ -107,7 +112,8 @@ def get_admin_user(current_user: User = Depends(get_current_user)):
 
 
 @router.post("/token")
-async def login_for_access_token(
+# Sync, so password hashing runs in the thread pool, not on the event loop
+def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
     user = authenticate_user(db, form_data.username, form_data.password)
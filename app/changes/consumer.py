@@ -0,0 +1,78 @@
+"""
+Python consumer of the change feed.
+
+ChangeFeedConsumer long-polls GET /changes and resumes after the last
+sequence number it returned, so a consumer that stores `since` next to its
+own state can restart without rescanning. apply_change() folds changes into
+a dict of current rows, the simplest such state.
+
+Usage:
+    consumer = ChangeFeedConsumer("http://localhost:8000", token=token)
+    rows = {}
+    for change in consumer.follow():
+        apply_change(rows, change)
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+RowKey = Tuple[str, int, Optional[int]]
+
+
+def apply_change(rows: Dict[RowKey, Dict[str, Any]], change: Dict[str, Any]) -> None:
+    """Update rows keyed by (entity, client_id, user_id) with one change."""
+    key = (change["entity"], change["client_id"], change["user_id"])
+    if change["op"] == "delete":
+        rows.pop(key, None)
+    else:
+        rows[key] = change["data"]
+
+
+class ChangeFeedConsumer:
+    """Follows the change feed of a running server over HTTP."""
+
+    def __init__(
+        self,
+        base_url: str = "",
+        token: Optional[str] = None,
+        since: int = 0,
+        wait: float = 25,
+        batch_size: int = 500,
+        http: Optional[httpx.Client] = None,
+    ):
+        """
+        Args:
+            base_url (str): Server URL, e.g. http://localhost:8000
+            token (str): Admin bearer token
+            since (int): Sequence number to resume after; 0 reads the whole log
+            wait (float): Seconds each poll may wait for new changes
+            batch_size (int): Maximum changes per poll
+            http (httpx.Client): Client to send requests with, e.g. a TestClient
+        """
+        self.since = since
+        self.wait = wait
+        self.batch_size = batch_size
+        self.http = http or httpx.Client(base_url=base_url, timeout=wait + 10)
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    def poll(self, wait: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Fetch the next changes, waiting up to wait seconds if there are none."""
+        response = self.http.get(
+            "/changes/",
+            params={
+                "since": self.since,
+                "limit": self.batch_size,
+                "wait": self.wait if wait is None else wait,
+            },
+            headers=self.headers,
+        )
+        response.raise_for_status()
+        feed = response.json()
+        self.since = feed["last_seq"]
+        return feed["changes"]
+
+    def follow(self) -> Iterator[Dict[str, Any]]:
+        """Yield changes as they are committed, forever."""
+        while True:
+            yield from self.poll()
@@ -0,0 +1,57 @@
+"""
+Router module for the change feed.
+Lets downstream caches, indexes and analytics follow client and case changes
+by long-polling or over server-sent events, instead of rescanning tables.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.auth.router import get_admin_user
+from app.changes.schema import ChangeFeedResponse
+from app.changes.service import (
+    CHANGE_FEED_MAX_WAIT,
+    MAX_CHANGES,
+    stream_changes,
+    wait_for_changes,
+)
+from app.database import get_db
+from app.models import User
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+
+@router.get("/", response_model=ChangeFeedResponse)
+async def get_changes(
+    since: int = Query(default=0, ge=0, description="Last sequence number seen"),
+    limit: int = Query(default=500, ge=1, le=MAX_CHANGES),
+    wait: float = Query(
+        default=0,
+        ge=0,
+        le=CHANGE_FEED_MAX_WAIT,
+        description="Seconds to wait for a change when there is none yet",
+    ),
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    changes = await wait_for_changes(db, since, limit, wait)
+    return {"changes": changes, "last_seq": changes[-1]["seq"] if changes else since}
+
+
+@router.get("/stream")
+async def stream(
+    since: int = Query(default=0, ge=0, description="Last sequence number seen"),
+    last_event_id: Optional[int] = Header(default=None),
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    # A reconnecting EventSource resumes from the id of the last event it got
+    start = last_event_id if last_event_id is not None else since
+    return StreamingResponse(
+        stream_changes(db, start),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,25 @@
+"""
+Pydantic models of the change feed.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel
+
+
+class ChangeResponse(BaseModel):
+    seq: int
+    entity: Literal["client", "client_case"]
+    client_id: int
+    user_id: Optional[int] = None
+    op: Literal["insert", "update", "delete"]
+    version: Optional[int] = None
+    data: Optional[Dict[str, Any]] = None
+    changed_at: datetime
+
+
+class ChangeFeedResponse(BaseModel):
+    changes: List[ChangeResponse]
+    # Pass as since on the next request
+    last_seq: int
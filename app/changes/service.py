@@ -0,0 +1,142 @@
+"""
+Reading the change log and waiting for new changes.
+
+Waiters poll the change_log table, so changes committed by any process are
+seen within CHANGE_FEED_POLL_SECONDS; commits made by this process also
+wake them immediately through change_notifier.
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.fast_json import dumps
+from app.models import ChangeLog
+from app.models.change_log import LOGGED_KEY
+
+CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "1"))
+CHANGE_FEED_MAX_WAIT = float(os.getenv("CHANGE_FEED_MAX_WAIT", "30"))
+CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "15"))
+MAX_CHANGES = 1000
+
+CHANGE_FIELDS = (
+    "seq",
+    "entity",
+    "client_id",
+    "user_id",
+    "op",
+    "version",
+    "data",
+    "changed_at",
+)
+
+
+class ChangeNotifier:
+    """Wakes coroutines waiting for changes when this process commits some."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = set()
+
+    def notify(self) -> None:
+        """Wake every waiter; safe to call from any thread."""
+        with self._lock:
+            waiters, self._waiters = self._waiters, set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds; True if woken by a commit."""
+        loop = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1], timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+change_notifier = ChangeNotifier()
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_committed_changes(session):
+    if session.info.pop(LOGGED_KEY, False):
+        change_notifier.notify()
+
+
+def get_changes(db: Session, since: int = 0, limit: int = MAX_CHANGES) -> List[Dict]:
+    """
+    Get committed changes after a sequence number, oldest first.
+
+    Args:
+        db (Session): Database session
+        since (int): Last sequence number already processed; 0 for all
+        limit (int): Maximum number of changes to return
+
+    Returns:
+        list: Change dicts with the fields of CHANGE_FIELDS
+    """
+    rows = db.execute(
+        select(*(getattr(ChangeLog, name) for name in CHANGE_FIELDS))
+        .where(ChangeLog.seq > since)
+        .order_by(ChangeLog.seq)
+        .limit(limit)
+    )
+    changes = [dict(row._mapping) for row in rows]
+    # End the read transaction so the next poll sees newer commits
+    db.rollback()
+    return changes
+
+
+async def wait_for_changes(
+    db: Session, since: int, limit: int = MAX_CHANGES, timeout: float = 0
+) -> List[Dict[str, Any]]:
+    """Long-poll: return changes after since, waiting up to timeout seconds for some."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        # The query blocks; keep it off the event loop
+        changes = await run_in_threadpool(get_changes, db, since, limit)
+        remaining = deadline - loop.time()
+        if changes or remaining <= 0:
+            return changes
+        await change_notifier.wait(min(CHANGE_FEED_POLL_SECONDS, remaining))
+
+
+def format_event(change: Dict[str, Any]) -> bytes:
+    """Encode a change as a server-sent event whose id is its sequence number."""
+    data = dumps(jsonable_encoder(change))
+    return b"id: %d\nevent: change\ndata: %s\n\n" % (change["seq"], data)
+
+
+async def stream_changes(db: Session, since: int) -> AsyncIterator[bytes]:
+    """Yield server-sent events for changes after since, forever."""
+    # Clients reconnect after a second and resume from the Last-Event-ID
+    yield b"retry: 1000\n\n"
+    while True:
+        changes = await wait_for_changes(
+            db, since, MAX_CHANGES, CHANGE_FEED_HEARTBEAT_SECONDS
+        )
+        if not changes:
+            # Comment line; keeps proxies from closing an idle connection
+            yield b": keep-alive\n\n"
+        for change in changes:
+            yield format_event(change)
+            since = change["seq"]
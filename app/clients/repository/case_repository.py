@@ -2,15 +2,93 @@
 Client case repository implementation for data access operations.
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from fastapi import HTTPException, status
+from sqlalchemy import and_, delete, insert, select, tuple_, update
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from app.core.repository import IRepository
+from app.core.lazy import lazy_module
+from app.core.repository import IRepository, fetch, with_columns
+from app.core.tracing import trace_methods
 from app.models import Client, ClientCase, User
+from app.models.change_log import record_changes
+from app.models.overview import mark_overview_stale
 
+# Case keys per IN clause; keeps bound parameters well under SQLite's limit
+BULK_CHUNK_SIZE = 500
+CaseKey = Tuple[int, int]
 
+# INSERT ... ON CONFLICT DO NOTHING is dialect specific; the PostgreSQL
+# dialect is only imported when it is used. Other dialects look up the
+# existing keys first.
+CONFLICT_DIALECTS = {
+    "postgresql": lazy_module("sqlalchemy.dialects.postgresql"),
+    "sqlite": sqlite,
+}
+
+
+def _chunks(items: List[Any]):
+    for start in range(0, len(items), BULK_CHUNK_SIZE):
+        yield items[start : start + BULK_CHUNK_SIZE]
+
+
+def _existing_ids(db: Session, column, ids) -> set:
+    existing = set()
+    for chunk in _chunks(list(ids)):
+        existing.update(db.scalars(select(column).where(column.in_(chunk))))
+    return existing
+
+
+def _existing_keys(db: Session, keys: List[CaseKey]) -> set:
+    case_key = tuple_(ClientCase.client_id, ClientCase.user_id)
+    existing = set()
+    for chunk in _chunks(keys):
+        rows = db.execute(
+            select(ClientCase.client_id, ClientCase.user_id).where(case_key.in_(chunk))
+        )
+        existing.update(tuple(row) for row in rows)
+    return existing
+
+
+def _insert_missing(db: Session, rows: List[Dict[str, Any]]) -> set:
+    # Unlike ON CONFLICT, a key inserted concurrently between the lookup and
+    # the insert fails the transaction with an IntegrityError
+    by_key = {}
+    for row in rows:
+        by_key.setdefault((row["client_id"], row["user_id"]), row)
+    existing = _existing_keys(db, list(by_key))
+    missing = {key: row for key, row in by_key.items() if key not in existing}
+    if missing:
+        db.execute(insert(ClientCase), list(missing.values()))
+    return set(missing)
+
+
+def _insert_ignoring_conflicts(db: Session, rows: List[Dict[str, Any]]) -> set:
+    """Insert case rows, skipping existing keys; returns the keys inserted."""
+    if not rows:
+        return set()
+    dialect = db.get_bind().dialect.name
+    if dialect not in CONFLICT_DIALECTS:
+        return _insert_missing(db, rows)
+    statement = (
+        CONFLICT_DIALECTS[dialect]
+        .insert(ClientCase)
+        .on_conflict_do_nothing(index_elements=["client_id", "user_id"])
+        .returning(ClientCase.client_id, ClientCase.user_id)
+    )
+    return {tuple(row) for row in db.execute(statement, rows)}
+
+
+def _record_case_changes(db: Session, keys: List[CaseKey], op: str) -> None:
+    """Log bulk changes to cases and refresh their clients' read model rows."""
+    record_changes(db, "client_case", keys, op)
+    mark_overview_stale(db, [client_id for client_id, _ in keys])
+
+
+@trace_methods
 class ClientCaseRepository(IRepository[ClientCase]):
     """Repository for ClientCase entity operations."""
 
@@ -82,15 +160,59 @@ class ClientCaseRepository(IRepository[ClientCase]):
                 detail=f"Failed to create case: {str(e)}",
             )
 
-    def update(self, db: Session, id: int, data: Dict[str, Any]) -> ClientCase:
-        """Update an existing case."""
+    def get_version(self, db: Session, id: CaseKey) -> int:
+        """Get only the version of a case (a primary key lookup)."""
+        client_id, user_id = id
+        version = db.execute(
+            select(ClientCase.version).where(
+                ClientCase.client_id == client_id, ClientCase.user_id == user_id
+            )
+        ).scalar()
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Case not found for client {client_id} and user {user_id}",
+            )
+        return version
+
+    def get_versions_by_client_id(
+        self, db: Session, client_id: int
+    ) -> List[Tuple[int, int]]:
+        """Get (user_id, version) of every case of a client."""
+        rows = db.execute(
+            select(ClientCase.user_id, ClientCase.version).where(
+                ClientCase.client_id == client_id
+            )
+        )
+        return [tuple(row) for row in rows]
+
+    def update(
+        self,
+        db: Session,
+        id: CaseKey,
+        data: Dict[str, Any],
+        expected_version: Optional[int] = None,
+    ) -> ClientCase:
+        """Update an existing case, optionally only if it is still at a version."""
         case = self.get_by_id(db, id)
+        if expected_version is not None and case.version != expected_version:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail=f"Case for client {id[0]} and user {id[1]} has been modified",
+            )
         for field, value in data.items():
             setattr(case, field, value)
         try:
             db.commit()
             db.refresh(case)
             return case
+        except StaleDataError:
+            # Another request updated the row between our read and write
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail=f"Case for client {id[0]} and user {id[1]} has been modified",
+            )
         except Exception as e:
             db.rollback()
             raise HTTPException(
@@ -115,10 +237,51 @@ class ClientCaseRepository(IRepository[ClientCase]):
         """Get all cases for a specific client."""
         return db.query(ClientCase).filter(ClientCase.client_id == client_id).all()
 
+    def get_by_client_ids(self, db: Session, client_ids: List[int]) -> List[ClientCase]:
+        """Get all cases of the given clients in one query."""
+        return db.query(ClientCase).filter(ClientCase.client_id.in_(client_ids)).all()
+
     def get_by_case_worker(self, db: Session, case_worker_id: int) -> List[ClientCase]:
         """Get all cases assigned to a specific case worker."""
         return db.query(ClientCase).filter(ClientCase.user_id == case_worker_id).all()
 
+    def get_clients_by_case_worker(
+        self,
+        db: Session,
+        case_worker_id: int,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Client]:
+        """Get the clients with a case assigned to a case worker, each once."""
+        query = with_columns(db.query(Client), Client, columns).filter(
+            Client.cases.any(ClientCase.user_id == case_worker_id)
+        )
+        return fetch(query, columns)
+
+    def get_clients_by_services(
+        self,
+        db: Session,
+        service_filters: Dict[str, bool],
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Client]:
+        """
+        Get the clients with a case matching all service statuses, each once.
+
+        Cases are matched with an EXISTS subquery rather than a join, so a
+        client with several matching cases is listed once whether entities
+        or columns are selected.
+        """
+        conditions = [
+            getattr(ClientCase, service_name) == service_status
+            for service_name, service_status in service_filters.items()
+            if service_status is not None
+        ]
+        # Without service filters, every client with a case
+        criterion = and_(*conditions) if conditions else None
+        query = with_columns(db.query(Client), Client, columns).filter(
+            Client.cases.any(criterion)
+        )
+        return fetch(query, columns)
+
     def get_by_services(
         self, db: Session, service_filters: Dict[str, bool]
     ) -> List[ClientCase]:
@@ -130,3 +293,229 @@ class ClientCaseRepository(IRepository[ClientCase]):
                     getattr(ClientCase, service_name) == service_status
                 )
         return query.all()
+
+    def get_existing_keys(self, db: Session, keys: List[CaseKey]) -> set:
+        """Return which of the given (client_id, user_id) keys exist."""
+        return _existing_keys(db, keys)
+
+    def bulk_update(
+        self, db: Session, updates: Dict[CaseKey, Dict[str, Any]]
+    ) -> Dict[CaseKey, str]:
+        """
+        Apply per-case patches in one transaction.
+
+        Cases sharing the same patch are updated together with a single
+        UPDATE ... WHERE (client_id, user_id) IN (...) per chunk.
+        Returns the status of every key: updated, unchanged or not_found.
+        """
+        existing = self.get_existing_keys(db, list(updates))
+        statuses = {}
+        groups: Dict[tuple, List[CaseKey]] = {}
+        for key, data in updates.items():
+            if key not in existing:
+                statuses[key] = "not_found"
+            elif not data:
+                statuses[key] = "unchanged"
+            else:
+                statuses[key] = "updated"
+                groups.setdefault(tuple(sorted(data.items())), []).append(key)
+
+        case_key = tuple_(ClientCase.client_id, ClientCase.user_id)
+        try:
+            for patch, keys in groups.items():
+                for chunk in _chunks(keys):
+                    db.execute(
+                        update(ClientCase)
+                        .where(case_key.in_(chunk))
+                        .values({**dict(patch), "version": ClientCase.version + 1})
+                        .execution_options(synchronize_session=False)
+                    )
+                _record_case_changes(db, keys, "update")
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to update cases: {str(e)}",
+            )
+        return statuses
+
+    def update_matching(
+        self, db: Session, filters: Dict[str, Any], data: Dict[str, Any]
+    ) -> List[CaseKey]:
+        """
+        Apply one patch to every case matching the filters; returns their keys.
+
+        A client_ids filter is applied a chunk of ids per statement.
+        """
+        conditions = [
+            getattr(ClientCase, field) == value
+            for field, value in filters.items()
+            if field != "client_ids"
+        ]
+        if "client_ids" in filters:
+            client_ids = list(dict.fromkeys(filters["client_ids"]))
+            condition_sets = [
+                [*conditions, ClientCase.client_id.in_(chunk)]
+                for chunk in _chunks(client_ids)
+            ]
+        elif conditions:
+            condition_sets = [conditions]
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A filter update needs at least one condition",
+            )
+
+        try:
+            keys = []
+            for where in condition_sets:
+                keys.extend(
+                    tuple(row)
+                    for row in db.execute(
+                        select(ClientCase.client_id, ClientCase.user_id).where(*where)
+                    )
+                )
+                if data:
+                    db.execute(
+                        update(ClientCase)
+                        .where(*where)
+                        .values({**data, "version": ClientCase.version + 1})
+                        .execution_options(synchronize_session=False)
+                    )
+            if keys and data:
+                _record_case_changes(db, keys, "update")
+            db.commit()
+            return keys
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to update cases: {str(e)}",
+            )
+
+    def bulk_create(
+        self, db: Session, keys: List[CaseKey], defaults: Dict[str, Any]
+    ) -> Dict[str, list]:
+        """
+        Create many case assignments in one transaction.
+
+        Clients and case workers are validated with one IN query per chunk;
+        keys that already exist are skipped by the INSERT itself.
+        Returns created and skipped keys, plus (client_id, user_id, reason)
+        for invalid ones.
+        """
+        keys = list(dict.fromkeys(keys))
+        clients = _existing_ids(db, Client.id, {client_id for client_id, _ in keys})
+        users = _existing_ids(db, User.id, {user_id for _, user_id in keys})
+
+        valid, invalid = [], []
+        for client_id, user_id in keys:
+            if client_id not in clients:
+                invalid.append(
+                    (client_id, user_id, f"Client with id {client_id} not found")
+                )
+            elif user_id not in users:
+                invalid.append(
+                    (client_id, user_id, f"Case worker with id {user_id} not found")
+                )
+            else:
+                valid.append((client_id, user_id))
+
+        try:
+            created = _insert_ignoring_conflicts(
+                db,
+                [
+                    {"client_id": client_id, "user_id": user_id, **defaults}
+                    for client_id, user_id in valid
+                ],
+            )
+            _record_case_changes(db, sorted(created), "insert")
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to create cases: {str(e)}",
+            )
+        return {
+            "created": [key for key in valid if key in created],
+            "skipped": [key for key in valid if key not in created],
+            "invalid": invalid,
+        }
+
+    def reassign(
+        self,
+        db: Session,
+        from_user_id: int,
+        to_user_id: int,
+        client_ids: Optional[List[int]] = None,
+    ) -> Dict[str, list]:
+        """
+        Move cases, with their service statuses, to another case worker.
+
+        Clients already assigned to the new case worker are skipped and keep
+        their existing case with the old one. Returns created and skipped
+        keys of the new case worker, plus (client_id, user_id, reason) for
+        clients that the old case worker does not have.
+        """
+        if not _existing_ids(db, User.id, [to_user_id]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Case worker with id {to_user_id} not found",
+            )
+
+        query = select(*ClientCase.__table__.columns).where(
+            ClientCase.user_id == from_user_id
+        )
+        if client_ids is None:
+            cases = [dict(row._mapping) for row in db.execute(query)]
+        else:
+            client_ids = list(dict.fromkeys(client_ids))
+            cases = []
+            for chunk in _chunks(client_ids):
+                rows = db.execute(query.where(ClientCase.client_id.in_(chunk)))
+                cases.extend(dict(row._mapping) for row in rows)
+
+        found = {case["client_id"] for case in cases}
+        invalid = [
+            (
+                client_id,
+                from_user_id,
+                f"Client {client_id} is not assigned to case worker {from_user_id}",
+            )
+            for client_id in client_ids or []
+            if client_id not in found
+        ]
+
+        try:
+            created = _insert_ignoring_conflicts(
+                db, [{**case, "user_id": to_user_id} for case in cases]
+            )
+            moved = [client_id for client_id, _ in created]
+            for chunk in _chunks(moved):
+                db.execute(
+                    delete(ClientCase)
+                    .where(
+                        ClientCase.user_id == from_user_id,
+                        ClientCase.client_id.in_(chunk),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            _record_case_changes(db, sorted(created), "insert")
+            _record_case_changes(
+                db, [(client_id, from_user_id) for client_id in moved], "delete"
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to reassign cases: {str(e)}",
+            )
+        keys = [(case["client_id"], to_user_id) for case in cases]
+        return {
+            "created": [key for key in keys if key in created],
+            "skipped": [key for key in keys if key not in created],
+            "invalid": invalid,
+        }
@@ -2,16 +2,21 @@
 Client repository implementation for data access operations.
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 from fastapi import HTTPException, status
-from sqlalchemy import and_
+from sqlalchemy import and_, insert, select
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from app.core.repository import IRepository
+from app.core.repository import IRepository, criteria_filters, fetch, with_columns
+from app.core.tracing import trace_methods
 from app.models import Client, ClientCase
+from app.models.change_log import record_changes
+from app.models.overview import mark_overview_stale
 
 
+@trace_methods
 class ClientRepository(IRepository[Client]):
     """Repository for Client entity operations."""
 
@@ -25,8 +30,28 @@ class ClientRepository(IRepository[Client]):
             )
         return client
 
-    def get_all(self, db: Session, skip: int = 0, limit: int = 50) -> List[Client]:
-        """Get all clients with pagination."""
+    def get_version(self, db: Session, id: int) -> int:
+        """Get only the version of a client (a primary key lookup)."""
+        version = db.execute(select(Client.version).where(Client.id == id)).scalar()
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Client with id {id} not found",
+            )
+        return version
+
+    def get_by_ids(self, db: Session, ids: List[int]) -> List[Client]:
+        """Get the clients with the given ids in one query; missing ids are skipped."""
+        return db.query(Client).filter(Client.id.in_(ids)).all()
+
+    def get_all(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 50,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Client]:
+        """Get all clients with pagination, optionally loading only some columns."""
         if skip < 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -37,7 +62,8 @@ class ClientRepository(IRepository[Client]):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Limit must be greater than 0",
             )
-        return db.query(Client).offset(skip).limit(limit).all()
+        query = with_columns(db.query(Client), Client, columns)
+        return query.offset(skip).limit(limit).all()
 
     def create(self, db: Session, entity: Client) -> Client:
         """Create a new client."""
@@ -53,15 +79,51 @@ class ClientRepository(IRepository[Client]):
                 detail=f"Failed to create client: {str(e)}",
             )
 
-    def update(self, db: Session, id: int, data: Dict[str, Any]) -> Client:
-        """Update an existing client."""
+    def bulk_create(self, db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+        """Insert validated client rows with one executemany; returns ids in order."""
+        try:
+            result = db.execute(
+                insert(Client).returning(Client.id, sort_by_parameter_order=True), rows
+            )
+            ids = list(result.scalars())
+            record_changes(db, "client", ids, "insert")
+            mark_overview_stale(db, ids)
+            db.commit()
+            return ids
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to create clients: {str(e)}",
+            )
+
+    def update(
+        self,
+        db: Session,
+        id: int,
+        data: Dict[str, Any],
+        expected_version: Optional[int] = None,
+    ) -> Client:
+        """Update an existing client, optionally only if it is still at a version."""
         client = self.get_by_id(db, id)
+        if expected_version is not None and client.version != expected_version:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail=f"Client with id {id} has been modified",
+            )
         for field, value in data.items():
             setattr(client, field, value)
         try:
             db.commit()
             db.refresh(client)
             return client
+        except StaleDataError:
+            # Another request updated the row between our read and write
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail=f"Client with id {id} has been modified",
+            )
         except Exception as e:
             db.rollback()
             raise HTTPException(
@@ -74,6 +136,10 @@ class ClientRepository(IRepository[Client]):
         client = self.get_by_id(db, id)
         try:
             # Delete associated client_cases first
+            cases = select(ClientCase.client_id, ClientCase.user_id).where(
+                ClientCase.client_id == id
+            )
+            record_changes(db, "client_case", db.execute(cases).all(), "delete")
             db.query(ClientCase).filter(ClientCase.client_id == id).delete()
             # Then delete the client
             db.delete(client)
@@ -85,42 +151,31 @@ class ClientRepository(IRepository[Client]):
                 detail=f"Failed to delete client: {str(e)}",
             )
 
-    def get_by_criteria(self, db: Session, criteria: Dict[str, Any]) -> List[Client]:
+    def get_by_criteria(
+        self,
+        db: Session,
+        criteria: Dict[str, Any],
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Client]:
         """Get clients by multiple criteria."""
-        query = db.query(Client)
-        filters = []
-
-        for field, value in criteria.items():
-            if value is not None:
-                if "__" in field:
-                    field_name, operator = field.split("__")
-                    model_field = getattr(Client, field_name)
-                    if operator == "ge":
-                        filters.append(model_field >= value)
-                    elif operator == "le":
-                        filters.append(model_field <= value)
-                    elif operator == "gt":
-                        filters.append(model_field > value)
-                    elif operator == "lt":
-                        filters.append(model_field < value)
-                else:
-                    filters.append(getattr(Client, field) == value)
-
+        query = with_columns(db.query(Client), Client, columns)
+        filters = criteria_filters(Client, criteria)
         if filters:
             query = query.filter(and_(*filters))
 
-        return query.all()
+        return fetch(query, columns)
 
-    def get_by_success_rate(self, db: Session, min_rate: int) -> List[Client]:
-        """Get clients with success rate above threshold."""
+    def get_by_success_rate(
+        self, db: Session, min_rate: int, columns: Optional[Sequence[str]] = None
+    ) -> List[Client]:
+        """Get clients with a case at or above a success rate, each once."""
         if not (0 <= min_rate <= 100):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Success rate must be between 0 and 100",
             )
-        return (
-            db.query(Client)
-            .join(Client.cases)
-            .filter(ClientCase.success_rate >= min_rate)
-            .all()
+        # EXISTS rather than a join: column rows are not de-duplicated by key
+        query = with_columns(db.query(Client), Client, columns).filter(
+            Client.cases.any(ClientCase.success_rate >= min_rate)
         )
+        return fetch(query, columns)
@@ -0,0 +1,83 @@
+"""
+Client overview repository: client searches served from the read model.
+
+Results match the queries over clients and client_cases: each client is
+listed once, and a service search matches clients with a case that has all
+filtered service statuses.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, exists
+from sqlalchemy.orm import Session
+
+from app.core.repository import criteria_filters, fetch, with_columns
+from app.core.tracing import trace_methods
+from app.models import ClientOverview
+from app.models.overview import client_overview_cases
+
+
+@trace_methods
+class ClientOverviewRepository:
+    """Read-only queries over the denormalized client_overview table."""
+
+    def get_by_criteria(
+        self,
+        db: Session,
+        criteria: Dict[str, Any],
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[ClientOverview]:
+        """Get clients by multiple criteria."""
+        query = with_columns(db.query(ClientOverview), ClientOverview, columns)
+        filters = criteria_filters(ClientOverview, criteria)
+        if filters:
+            query = query.filter(and_(*filters))
+        return fetch(query, columns)
+
+    def get_by_services(
+        self,
+        db: Session,
+        service_filters: Dict[str, bool],
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[ClientOverview]:
+        """Get the clients with a case matching all service statuses."""
+        cases = client_overview_cases
+        conditions = [
+            cases.c[service_name] == service_status
+            for service_name, service_status in service_filters.items()
+            if service_status is not None
+        ]
+        query = with_columns(db.query(ClientOverview), ClientOverview, columns).filter(
+            exists().where(cases.c.client_id == ClientOverview.id, *conditions)
+        )
+        return fetch(query, columns)
+
+    def get_by_case_worker(
+        self,
+        db: Session,
+        case_worker_id: int,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[ClientOverview]:
+        """Get the clients with a case assigned to a case worker."""
+        cases = client_overview_cases
+        query = (
+            with_columns(db.query(ClientOverview), ClientOverview, columns)
+            .join(cases, cases.c.client_id == ClientOverview.id)
+            .filter(cases.c.user_id == case_worker_id)
+        )
+        return fetch(query, columns)
+
+    def get_by_success_rate(
+        self, db: Session, min_rate: int, columns: Optional[Sequence[str]] = None
+    ) -> List[ClientOverview]:
+        """Get clients whose best case success rate is at least min_rate."""
+        if not (0 <= min_rate <= 100):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Success rate must be between 0 and 100",
+            )
+        query = with_columns(db.query(ClientOverview), ClientOverview, columns).filter(
+            ClientOverview.best_success_rate >= min_rate
+        )
+        return fetch(query, columns)
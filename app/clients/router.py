@@ -3,18 +3,43 @@ Router module for client-related endpoints.
 Handles all HTTP requests for client operations including create, read, update, and delete.
 """
 
-from typing import List, Optional
+import json
+import os
+import tempfile
+from itertools import islice
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.auth.router import get_admin_user, get_current_user
 from app.clients.repository.case_repository import ClientCaseRepository
 from app.clients.repository.client_repository import ClientRepository
+from app.clients.repository.overview_repository import ClientOverviewRepository
 from app.clients.schema import (
+    MAX_BATCH_IDS,
+    BulkAssignmentResponse,
+    BulkCaseAssignment,
+    BulkServiceUpdate,
+    BulkServiceUpdateResponse,
+    CaseReassignment,
+    ClientBatchRequest,
+    ClientBatchResponse,
     ClientListResponse,
     ClientResponse,
     ClientUpdate,
+    PredictionInput,
     ServiceResponse,
     ServiceUpdate,
 )
@@ -24,6 +49,22 @@ from app.clients.service.client_service import (
     ClientCommandService,
     ClientQueryService,
 )
+from app.clients.service.ingest import detect_format, ingest_records
+from app.clients.service.logic import (
+    build_scoring_rows,
+    explain_top_recommendations,
+    recommendation_model,
+    summarize_predictions,
+)
+from app.core.batching import MicroBatcher
+from app.core.etag import (
+    collection_etag,
+    is_not_modified,
+    make_etag,
+    precondition_holds,
+)
+from app.core.executor import inference_executor
+from app.core.fast_json import dumps, iter_json_array, rows_to_dicts
 from app.database import get_db
 from app.models import User
 
@@ -32,11 +73,102 @@ router = APIRouter(prefix="/clients", tags=["clients"])
 # Initialize repositories and services
 client_repository = ClientRepository()
 case_repository = ClientCaseRepository()
-client_query_service = ClientQueryService(client_repository)
+overview_repository = ClientOverviewRepository()
+client_query_service = ClientQueryService(
+    client_repository, case_repository, overview_repository
+)
 client_command_service = ClientCommandService(client_repository)
-case_query_service = CaseQueryService(case_repository)
+case_query_service = CaseQueryService(case_repository, overview_repository)
 case_command_service = CaseCommandService(case_repository)
 
+inference_executor.register_loader("recommendation", recommendation_model.get)
+
+
+async def _predict_recommendations(rows):
+    return await inference_executor.run("recommendation", rows)
+
+
+recommendation_batcher = MicroBatcher("recommendation", _predict_recommendations)
+
+# Ingestion reports stay in memory up to this size, then spill to disk
+REPORT_SPOOL_BYTES = 1024 * 1024
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def _precondition_failed():
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="The resource has been modified; fetch it again before updating",
+    )
+
+
+def _stream_report(report):
+    try:
+        while chunk := report.read(64 * 1024):
+            yield chunk
+    finally:
+        report.close()
+
+
+CLIENT_FIELDS = tuple(ClientResponse.model_fields)
+
+# Serve client lists from Core row tuples encoded straight to JSON, skipping
+# ORM entities and ClientResponse validation; the bytes are the same
+FAST_READS = os.getenv("CLIENT_FAST_READS", "true").lower() == "true"
+# Row-tuple lists longer than this are streamed as a JSON array, chunk by chunk
+STREAM_CHUNK_ROWS = int(os.getenv("CLIENT_STREAM_CHUNK_ROWS", "1000"))
+
+
+def client_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated client fields to return; id is always included",
+    )
+) -> Optional[Tuple[str, ...]]:
+    """
+    Columns to select for a client list, in ClientResponse field order.
+
+    None means the regular ORM and response_model path.
+    """
+    if fields is None:
+        return CLIENT_FIELDS if FAST_READS else None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(CLIENT_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown client fields: {', '.join(sorted(unknown))}",
+        )
+    return tuple(name for name in CLIENT_FIELDS if name in requested or name == "id")
+
+
+def _row_chunks(first, rows):
+    yield first
+    while chunk := list(islice(rows, STREAM_CHUNK_ROWS)):
+        yield chunk
+
+
+def _fields_response(content, fields: Tuple[str, ...]) -> Response:
+    """Encode row tuples selected for the given fields straight to JSON."""
+    if isinstance(content, dict):
+        content = {**content, "clients": rows_to_dicts(content["clients"], fields)}
+        return Response(dumps(content), media_type="application/json")
+
+    rows = iter(content)
+    first = list(islice(rows, STREAM_CHUNK_ROWS))
+    if len(first) < STREAM_CHUNK_ROWS:
+        return Response(
+            dumps(rows_to_dicts(first, fields)), media_type="application/json"
+        )
+    # Large result: send the array while the rest is still fetched and encoded
+    return StreamingResponse(
+        iter_json_array(_row_chunks(first, rows), fields),
+        media_type="application/json",
+    )
+
 
 @router.get("/", response_model=ClientListResponse)
 async def get_clients(
@@ -45,19 +177,106 @@ async def get_clients(
     limit: int = Query(
         default=50, ge=1, le=150, description="Maximum number of records to return"
     ),
+    fields: Optional[Tuple[str, ...]] = Depends(client_fields),
+    db: Session = Depends(get_db),
+):
+    result = client_query_service.get_clients(db, skip, limit, fields)
+    return _fields_response(result, fields) if fields else result
+
+
+@router.get(
+    "/batch", response_model=ClientBatchResponse, response_model_exclude_none=True
+)
+async def get_clients_batch(
+    ids: str = Query(..., description="Comma-separated client ids"),
+    include_services: bool = Query(False, description="Embed each client's services"),
+    current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
-    return client_query_service.get_clients(db, skip, limit)
+    """Get many clients by id; ids that do not exist are listed under missing"""
+    try:
+        client_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must be a comma-separated list of integers",
+        )
+    if not 0 < len(client_ids) <= MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Provide between 1 and {MAX_BATCH_IDS} ids",
+        )
+    return client_query_service.get_clients_batch(db, client_ids, include_services)
+
+
+@router.post(
+    "/batch", response_model=ClientBatchResponse, response_model_exclude_none=True
+)
+async def post_clients_batch(
+    batch: ClientBatchRequest,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Get many clients by id, for id lists too long for a query string"""
+    return client_query_service.get_clients_batch(db, batch.ids, batch.include_services)
+
+
+@router.post(
+    "/bulk",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_create_clients(
+    request: Request,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Create clients from an NDJSON or CSV upload, reporting the status of each row"""
+    fmt = detect_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload application/x-ndjson or text/csv",
+        )
+
+    # The upload is consumed before responding: the report is buffered
+    # (spilling to disk) rather than streamed while the body is still read
+    report = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_BYTES)
+    async for row_status in ingest_records(
+        request.stream(),
+        fmt,
+        lambda rows: client_command_service.create_clients(db, rows),
+    ):
+        report.write(json.dumps(row_status).encode() + b"\n")
+    report.seek(0)
+    return StreamingResponse(_stream_report(report), media_type="application/x-ndjson")
 
 
 @router.get("/{client_id}", response_model=ClientResponse)
 async def get_client(
     client_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     """Get a specific client by ID"""
-    return client_query_service.get_client(db, client_id)
+    if if_none_match:
+        # Version-only lookup; the full row is loaded only when it changed
+        version = client_query_service.get_client_version(db, client_id)
+        etag = make_etag("client", client_id, version)
+        if is_not_modified(if_none_match, etag):
+            return _not_modified(etag)
+    client = client_query_service.get_client(db, client_id)
+    response.headers["ETag"] = make_etag("client", client.id, client.version)
+    return client
 
 
 @router.get("/search/by-criteria", response_model=List[ClientResponse])
@@ -86,12 +305,14 @@ async def get_clients_by_criteria(
     substance_use: Optional[bool] = None,
     time_unemployed: Optional[int] = Query(None, ge=0),
     need_mental_health_support_bool: Optional[bool] = None,
+    fields: Optional[Tuple[str, ...]] = Depends(client_fields),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     """Search clients by any combination of criteria"""
-    return client_query_service.get_clients_by_criteria(
+    clients = client_query_service.get_clients_by_criteria(
         db,
+        columns=fields,
         employment_status=employment_status,
         education_level=education_level,
         age_min=age_min,
@@ -117,6 +338,7 @@ async def get_clients_by_criteria(
         time_unemployed=time_unemployed,
         need_mental_health_support_bool=need_mental_health_support_bool,
     )
+    return _fields_response(clients, fields) if fields else clients
 
 
 @router.get("/search/by-services", response_model=List[ClientResponse])
@@ -128,12 +350,14 @@ async def get_clients_by_services(
     employment_related_financial_supports: Optional[bool] = None,
     employer_financial_supports: Optional[bool] = None,
     enhanced_referrals: Optional[bool] = None,
+    fields: Optional[Tuple[str, ...]] = Depends(client_fields),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     """Get clients filtered by multiple service statuses"""
-    return case_query_service.get_clients_by_services(
+    clients = case_query_service.get_clients_by_services(
         db,
+        columns=fields,
         employment_assistance=employment_assistance,
         life_stabilization=life_stabilization,
         retention_services=retention_services,
@@ -142,16 +366,28 @@ async def get_clients_by_services(
         employer_financial_supports=employer_financial_supports,
         enhanced_referrals=enhanced_referrals,
     )
+    return _fields_response(clients, fields) if fields else clients
 
 
 @router.get("/{client_id}/services", response_model=List[ServiceResponse])
 async def get_client_services(
     client_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     """Get all services and their status for a specific client"""
-    return case_query_service.get_client_services(db, client_id)
+    if if_none_match:
+        versions = case_query_service.get_client_service_versions(db, client_id)
+        etag = collection_etag(f"services-{client_id}", versions)
+        if is_not_modified(if_none_match, etag):
+            return _not_modified(etag)
+    cases = case_query_service.get_client_services(db, client_id)
+    response.headers["ETag"] = collection_etag(
+        f"services-{client_id}", [(case.user_id, case.version) for case in cases]
+    )
+    return cases
 
 
 @router.get("/search/success-rate", response_model=List[ClientResponse])
@@ -159,31 +395,47 @@ async def get_clients_by_success_rate(
     min_rate: int = Query(
         70, ge=0, le=100, description="Minimum success rate percentage"
     ),
+    fields: Optional[Tuple[str, ...]] = Depends(client_fields),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     """Get clients with success rate above specified threshold"""
-    return client_query_service.get_clients_by_success_rate(db, min_rate)
+    clients = client_query_service.get_clients_by_success_rate(db, min_rate, fields)
+    return _fields_response(clients, fields) if fields else clients
 
 
 @router.get("/case-worker/{case_worker_id}", response_model=List[ClientResponse])
 async def get_clients_by_case_worker(
     case_worker_id: int,
+    fields: Optional[Tuple[str, ...]] = Depends(client_fields),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    return case_query_service.get_clients_by_case_worker(db, case_worker_id)
+    clients = case_query_service.get_clients_by_case_worker(db, case_worker_id, fields)
+    return _fields_response(clients, fields) if fields else clients
 
 
 @router.put("/{client_id}", response_model=ClientResponse)
 async def update_client(
     client_id: int,
     client_data: ClientUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
-    """Update a client's information"""
-    return client_command_service.update_client(db, client_id, client_data)
+    """Update a client's information; send If-Match to avoid lost updates"""
+    expected_version = None
+    if if_match is not None:
+        expected_version = client_query_service.get_client_version(db, client_id)
+        etag = make_etag("client", client_id, expected_version)
+        if not precondition_holds(if_match, etag):
+            raise _precondition_failed()
+    client = client_command_service.update_client(
+        db, client_id, client_data, expected_version
+    )
+    response.headers["ETag"] = make_etag("client", client.id, client.version)
+    return client
 
 
 @router.put("/{client_id}/services/{user_id}", response_model=ServiceResponse)
@@ -191,12 +443,52 @@ async def update_client_services(
     client_id: int,
     user_id: int,
     service_update: ServiceUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    return case_command_service.update_client_services(
-        db, client_id, user_id, service_update
+    expected_version = None
+    if if_match is not None:
+        expected_version = case_query_service.get_case_version(db, client_id, user_id)
+        etag = make_etag("case", client_id, user_id, expected_version)
+        if not precondition_holds(if_match, etag):
+            raise _precondition_failed()
+    case = case_command_service.update_client_services(
+        db, client_id, user_id, service_update, expected_version
     )
+    response.headers["ETag"] = make_etag("case", client_id, user_id, case.version)
+    return case
+
+
+@router.patch("/services/bulk", response_model=BulkServiceUpdateResponse)
+async def bulk_update_client_services(
+    bulk_update: BulkServiceUpdate,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Update services of many cases at once, by case keys or by filter"""
+    return case_command_service.bulk_update_services(db, bulk_update)
+
+
+@router.post("/case-assignments/bulk", response_model=BulkAssignmentResponse)
+async def bulk_create_case_assignments(
+    bulk_assignment: BulkCaseAssignment,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Assign many clients to case workers in one transaction"""
+    return case_command_service.bulk_create_case_assignments(db, bulk_assignment)
+
+
+@router.post("/case-assignments/reassign", response_model=BulkAssignmentResponse)
+async def reassign_cases(
+    reassignment: CaseReassignment,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Move a case worker's cases, with their services, to another case worker"""
+    return case_command_service.reassign_cases(db, reassignment)
 
 
 @router.post("/{client_id}/case-assignment", response_model=ServiceResponse)
@@ -210,6 +502,25 @@ async def create_case_assignment(
     return case_command_service.create_case_assignment(db, client_id, case_worker_id)
 
 
+@router.post("/recommendations")
+async def get_recommendations(
+    data: PredictionInput,
+    explain: bool = Query(
+        False, description="Include per-feature contributions for each recommendation"
+    ),
+    current_user: User = Depends(get_current_user),
+):
+    """Recommend the intervention combinations with the best predicted success"""
+    scoring_rows = build_scoring_rows(data.dict())
+    predictions = await recommendation_batcher.submit(scoring_rows)
+    result = summarize_predictions(scoring_rows, predictions)
+    if explain:
+        result["explanations"] = await run_in_threadpool(
+            explain_top_recommendations, scoring_rows, predictions
+        )
+    return result
+
+
 @router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_client(
     client_id: int,
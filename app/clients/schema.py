@@ -7,7 +7,7 @@ from enum import IntEnum
 from typing import List, Optional
 
 # Standard library imports
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 # Enums for validation
@@ -174,6 +174,114 @@ class ServiceUpdate(BaseModel):
     success_rate: Optional[int] = Field(None, ge=0, le=100)
 
 
+class ServiceFilter(BaseModel):
+    client_ids: Optional[List[int]] = Field(None, max_length=10000)
+    user_id: Optional[int] = None
+    employment_assistance: Optional[bool] = None
+    life_stabilization: Optional[bool] = None
+    retention_services: Optional[bool] = None
+    specialized_services: Optional[bool] = None
+    employment_related_financial_supports: Optional[bool] = None
+    employer_financial_supports: Optional[bool] = None
+    enhanced_referrals: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        # An empty filter would match, and update, every case
+        if all(value is None for value in self.__dict__.values()):
+            raise ValueError("A filter needs at least one field")
+        return self
+
+
+class BulkServiceUpdateItem(BaseModel):
+    client_id: int
+    user_id: int
+    update: ServiceUpdate
+
+
+class BulkServiceUpdate(BaseModel):
+    """Either a list of case keys with their own patches, or a filter plus one patch"""
+
+    items: Optional[List[BulkServiceUpdateItem]] = Field(None, max_length=10000)
+    filter: Optional[ServiceFilter] = None
+    patch: Optional[ServiceUpdate] = None
+
+    @model_validator(mode="after")
+    def check_mode(self):
+        if (self.items is None) == (self.filter is None):
+            raise ValueError("Provide either items or filter, not both")
+        if self.filter is not None and self.patch is None:
+            raise ValueError("A filter update needs a patch")
+        if self.items is not None and self.patch is not None:
+            raise ValueError("patch is only used together with filter")
+        return self
+
+
+class BulkServiceUpdateResult(BaseModel):
+    client_id: int
+    user_id: int
+    status: str = Field(description="updated, unchanged or not_found")
+
+
+class BulkServiceUpdateResponse(BaseModel):
+    updated: int
+    not_found: int
+    results: List[BulkServiceUpdateResult]
+
+
+class CaseKey(BaseModel):
+    client_id: int
+    user_id: int
+
+
+class BulkCaseAssignment(BaseModel):
+    assignments: List[CaseKey] = Field(max_length=10000)
+
+
+class CaseReassignment(BaseModel):
+    from_case_worker_id: int
+    to_case_worker_id: int
+    client_ids: Optional[List[int]] = Field(
+        None,
+        max_length=10000,
+        description="Clients to move; all of the case worker's clients if omitted",
+    )
+
+    @model_validator(mode="after")
+    def check_case_workers(self):
+        if self.from_case_worker_id == self.to_case_worker_id:
+            raise ValueError("Cannot reassign cases to the same case worker")
+        return self
+
+
+class InvalidCaseKey(CaseKey):
+    reason: str
+
+
+class BulkAssignmentResponse(BaseModel):
+    created: List[CaseKey]
+    skipped: List[CaseKey]
+    invalid: List[InvalidCaseKey]
+
+
+# Upper bound on ids per batch request, so each table is read with one IN query
+MAX_BATCH_IDS = 1000
+
+
+class ClientBatchRequest(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_IDS)
+    include_services: bool = False
+
+
+class ClientBatchItem(ClientResponse):
+    services: Optional[List[ServiceResponse]] = None
+
+
+class ClientBatchResponse(BaseModel):
+    clients: List[ClientBatchItem]
+    missing: List[int]
+
+
 class ClientListResponse(BaseModel):
     clients: List[ClientResponse]
     total: int
@@ -2,37 +2,97 @@
 Client service implementations following SOLID principles.
 """
 
-from typing import Any, Dict, List
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from sqlalchemy.orm import Session
 
 from app.clients.repository.case_repository import ClientCaseRepository
 from app.clients.repository.client_repository import ClientRepository
-from app.clients.schema import ClientUpdate, ServiceUpdate
+from app.clients.repository.overview_repository import ClientOverviewRepository
+from app.clients.schema import (
+    BulkCaseAssignment,
+    BulkServiceUpdate,
+    CaseReassignment,
+    ClientUpdate,
+    ServiceUpdate,
+)
 from app.clients.service.interfaces import (
     ICaseCommandService,
     ICaseQueryService,
     IClientCommandService,
     IClientQueryService,
 )
+from app.core.tracing import trace_methods
 from app.models import Client, ClientCase
 
+# Serve client searches from the client_overview read model instead of the
+# normalized tables; the results are the same (see overview_repository)
+READ_MODEL = os.getenv("CLIENT_READ_MODEL", "true").lower() == "true"
+
 
+@trace_methods
 class ClientQueryService(IClientQueryService):
     """Implementation of client query operations."""
 
-    def __init__(self, client_repository: ClientRepository):
+    def __init__(
+        self,
+        client_repository: ClientRepository,
+        case_repository: ClientCaseRepository,
+        overview_repository: ClientOverviewRepository,
+    ):
         self.client_repository = client_repository
+        self.case_repository = case_repository
+        self.overview_repository = overview_repository
 
     def get_client(self, db: Session, client_id: int) -> Client:
         return self.client_repository.get_by_id(db, client_id)
 
-    def get_clients(self, db: Session, skip: int, limit: int) -> Dict[str, Any]:
-        clients = self.client_repository.get_all(db, skip, limit)
+    def get_client_version(self, db: Session, client_id: int) -> int:
+        return self.client_repository.get_version(db, client_id)
+
+    def get_clients(
+        self,
+        db: Session,
+        skip: int,
+        limit: int,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        clients = self.client_repository.get_all(db, skip, limit, columns)
         total = db.query(Client).count()
         return {"clients": clients, "total": total}
 
-    def get_clients_by_criteria(self, db: Session, **criteria) -> List[Client]:
+    def get_clients_batch(
+        self, db: Session, ids: List[int], include_services: bool = False
+    ) -> Dict[str, Any]:
+        ids = list(dict.fromkeys(ids))
+        clients = {
+            client.id: client for client in self.client_repository.get_by_ids(db, ids)
+        }
+        services: Dict[int, List[ClientCase]] = {}
+        if include_services and clients:
+            for case in self.case_repository.get_by_client_ids(db, list(clients)):
+                services.setdefault(case.client_id, []).append(case)
+
+        found = []
+        for client_id in ids:
+            if client_id not in clients:
+                continue
+            item = {
+                column.name: getattr(clients[client_id], column.name)
+                for column in Client.__table__.columns
+            }
+            if include_services:
+                item["services"] = services.get(client_id, [])
+            found.append(item)
+        return {
+            "clients": found,
+            "missing": [client_id for client_id in ids if client_id not in clients],
+        }
+
+    def get_clients_by_criteria(
+        self, db: Session, columns: Optional[Sequence[str]] = None, **criteria
+    ) -> List[Client]:
         # Map API parameters to model fields
         field_mapping = {
             "age_min": "age",
@@ -50,48 +110,122 @@ class ClientQueryService(IClientQueryService):
                 else:
                     model_criteria[model_key] = value
 
-        return self.client_repository.get_by_criteria(db, model_criteria)
+        repository = self.overview_repository if READ_MODEL else self.client_repository
+        return repository.get_by_criteria(db, model_criteria, columns)
 
-    def get_clients_by_success_rate(self, db: Session, min_rate: int) -> List[Client]:
-        return self.client_repository.get_by_success_rate(db, min_rate)
+    def get_clients_by_success_rate(
+        self, db: Session, min_rate: int, columns: Optional[Sequence[str]] = None
+    ) -> List[Client]:
+        repository = self.overview_repository if READ_MODEL else self.client_repository
+        return repository.get_by_success_rate(db, min_rate, columns)
 
 
+@trace_methods
 class ClientCommandService(IClientCommandService):
     """Implementation of client command operations."""
 
     def __init__(self, client_repository: ClientRepository):
         self.client_repository = client_repository
 
+    def create_clients(self, db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+        return self.client_repository.bulk_create(db, rows)
+
     def update_client(
-        self, db: Session, client_id: int, client_data: ClientUpdate
+        self,
+        db: Session,
+        client_id: int,
+        client_data: ClientUpdate,
+        expected_version: Optional[int] = None,
     ) -> Client:
         update_data = client_data.dict(exclude_unset=True)
-        return self.client_repository.update(db, client_id, update_data)
+        return self.client_repository.update(
+            db, client_id, update_data, expected_version
+        )
 
     def delete_client(self, db: Session, client_id: int) -> None:
         self.client_repository.delete(db, client_id)
 
 
+@trace_methods
 class CaseQueryService(ICaseQueryService):
     """Implementation of case query operations."""
 
-    def __init__(self, case_repository: ClientCaseRepository):
+    def __init__(
+        self,
+        case_repository: ClientCaseRepository,
+        overview_repository: ClientOverviewRepository,
+    ):
         self.case_repository = case_repository
+        self.overview_repository = overview_repository
 
     def get_client_services(self, db: Session, client_id: int) -> List[ClientCase]:
         return self.case_repository.get_by_client_id(db, client_id)
 
-    def get_clients_by_services(self, db: Session, **service_filters) -> List[Client]:
-        cases = self.case_repository.get_by_services(db, service_filters)
-        return [case.client for case in cases]
+    def get_client_service_versions(
+        self, db: Session, client_id: int
+    ) -> List[Tuple[int, int]]:
+        return self.case_repository.get_versions_by_client_id(db, client_id)
+
+    def get_case_version(self, db: Session, client_id: int, user_id: int) -> int:
+        return self.case_repository.get_version(db, (client_id, user_id))
+
+    def get_clients_by_services(
+        self, db: Session, columns: Optional[Sequence[str]] = None, **service_filters
+    ) -> List[Client]:
+        if READ_MODEL:
+            return self.overview_repository.get_by_services(
+                db, service_filters, columns
+            )
+        return self.case_repository.get_clients_by_services(
+            db, service_filters, columns
+        )
 
     def get_clients_by_case_worker(
-        self, db: Session, case_worker_id: int
+        self,
+        db: Session,
+        case_worker_id: int,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[Client]:
-        cases = self.case_repository.get_by_case_worker(db, case_worker_id)
-        return [case.client for case in cases]
+        if READ_MODEL:
+            return self.overview_repository.get_by_case_worker(
+                db, case_worker_id, columns
+            )
+        return self.case_repository.get_clients_by_case_worker(
+            db, case_worker_id, columns
+        )
+
+
+# Service statuses of a newly assigned case
+NEW_CASE_SERVICES = {
+    "employment_assistance": False,
+    "life_stabilization": False,
+    "retention_services": False,
+    "specialized_services": False,
+    "employment_related_financial_supports": False,
+    "employer_financial_supports": False,
+    "enhanced_referrals": False,
+    "success_rate": 0,
+}
+
+
+def _assignment_report(outcome: Dict[str, list]) -> Dict[str, Any]:
+    return {
+        "created": [
+            {"client_id": client_id, "user_id": user_id}
+            for client_id, user_id in outcome["created"]
+        ],
+        "skipped": [
+            {"client_id": client_id, "user_id": user_id}
+            for client_id, user_id in outcome["skipped"]
+        ],
+        "invalid": [
+            {"client_id": client_id, "user_id": user_id, "reason": reason}
+            for client_id, user_id, reason in outcome["invalid"]
+        ],
+    }
 
 
+@trace_methods
 class CaseCommandService(ICaseCommandService):
     """Implementation of case command operations."""
 
@@ -99,24 +233,77 @@ class CaseCommandService(ICaseCommandService):
         self.case_repository = case_repository
 
     def update_client_services(
-        self, db: Session, client_id: int, user_id: int, service_update: ServiceUpdate
+        self,
+        db: Session,
+        client_id: int,
+        user_id: int,
+        service_update: ServiceUpdate,
+        expected_version: Optional[int] = None,
     ) -> ClientCase:
         update_data = service_update.dict(exclude_unset=True)
-        return self.case_repository.update(db, (client_id, user_id), update_data)
+        return self.case_repository.update(
+            db, (client_id, user_id), update_data, expected_version
+        )
+
+    def bulk_update_services(
+        self, db: Session, bulk_update: BulkServiceUpdate
+    ) -> Dict[str, Any]:
+        if bulk_update.items is not None:
+            # Repeated keys are merged in order, like applying them one by one
+            updates: Dict[tuple, Dict[str, Any]] = {}
+            for item in bulk_update.items:
+                updates.setdefault((item.client_id, item.user_id), {}).update(
+                    item.update.dict(exclude_unset=True)
+                )
+            statuses = self.case_repository.bulk_update(db, updates)
+            results = [
+                {
+                    "client_id": item.client_id,
+                    "user_id": item.user_id,
+                    "status": statuses[(item.client_id, item.user_id)],
+                }
+                for item in bulk_update.items
+            ]
+        else:
+            patch = bulk_update.patch.dict(exclude_unset=True)
+            keys = self.case_repository.update_matching(
+                db, bulk_update.filter.dict(exclude_none=True), patch
+            )
+            status = "updated" if patch else "unchanged"
+            results = [
+                {"client_id": client_id, "user_id": user_id, "status": status}
+                for client_id, user_id in keys
+            ]
+
+        statuses = {(r["client_id"], r["user_id"]): r["status"] for r in results}
+        return {
+            "updated": sum(s == "updated" for s in statuses.values()),
+            "not_found": sum(s == "not_found" for s in statuses.values()),
+            "results": results,
+        }
 
     def create_case_assignment(
         self, db: Session, client_id: int, case_worker_id: int
     ) -> ClientCase:
         new_case = ClientCase(
-            client_id=client_id,
-            user_id=case_worker_id,
-            employment_assistance=False,
-            life_stabilization=False,
-            retention_services=False,
-            specialized_services=False,
-            employment_related_financial_supports=False,
-            employer_financial_supports=False,
-            enhanced_referrals=False,
-            success_rate=0,
+            client_id=client_id, user_id=case_worker_id, **NEW_CASE_SERVICES
         )
         return self.case_repository.create(db, new_case)
+
+    def bulk_create_case_assignments(
+        self, db: Session, bulk_assignment: BulkCaseAssignment
+    ) -> Dict[str, Any]:
+        keys = [(key.client_id, key.user_id) for key in bulk_assignment.assignments]
+        outcome = self.case_repository.bulk_create(db, keys, NEW_CASE_SERVICES)
+        return _assignment_report(outcome)
+
+    def reassign_cases(
+        self, db: Session, reassignment: CaseReassignment
+    ) -> Dict[str, Any]:
+        outcome = self.case_repository.reassign(
+            db,
+            reassignment.from_case_worker_id,
+            reassignment.to_case_worker_id,
+            reassignment.client_ids,
+        )
+        return _assignment_report(outcome)
@@ -0,0 +1,195 @@
+"""
+Compact, inference-only representation of a trained random forest.
+
+The forest is flattened into a handful of float32/int32 node arrays stored in
+a single file that is memory-mapped on load, so the operating system shares
+the pages between processes and only touches what prediction needs. Split
+thresholds are rounded down to the nearest float32, which keeps every split
+decision identical to scikit-learn (it compares float32 features against the
+float64 threshold).
+
+Usage:
+    python -m app.clients.service.compact_forest model.pkl model.cforest
+"""
+
+import json
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b"CFOREST1"
+ALIGNMENT = 64
+
+# Section name -> dtype, in file order
+SECTIONS = {
+    "roots": np.int32,
+    "feature": np.int32,
+    "threshold": np.float32,
+    "left": np.int32,
+    "right": np.int32,
+    "value": np.float32,
+    # Training samples per node; not needed to predict, only to explain
+    "cover": np.float32,
+}
+
+
+def _flatten_forest(model):
+    """Concatenate every tree's node arrays, with child indices made global."""
+    estimators = getattr(model, "estimators_", [model])
+    if getattr(model, "n_outputs_", 1) != 1 or hasattr(model, "classes_"):
+        raise ValueError("Only single-output regression forests can be exported")
+
+    arrays = {name: [] for name in SECTIONS}
+    offset = 0
+    max_depth = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left < 0
+
+        # Leaves point to themselves so traversal can run a fixed number of steps
+        left = np.where(is_leaf, node_ids, tree.children_left) + offset
+        right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+        threshold = tree.threshold.astype(np.float32)
+        rounded_up = threshold.astype(np.float64) > tree.threshold
+        threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+
+        arrays["roots"].append(np.array([offset]))
+        arrays["feature"].append(np.where(is_leaf, 0, tree.feature))
+        arrays["threshold"].append(np.where(is_leaf, np.inf, threshold))
+        arrays["left"].append(left)
+        arrays["right"].append(right)
+        arrays["value"].append(tree.value.reshape(tree.node_count))
+        arrays["cover"].append(tree.weighted_n_node_samples)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    flat = {
+        name: np.concatenate(parts).astype(SECTIONS[name])
+        for name, parts in arrays.items()
+    }
+    return flat, max_depth, model.n_features_in_
+
+
+def export_compact_forest(model, filename):
+    """
+    Write a trained forest to a compact, memory-mappable file.
+
+    Args:
+        model: Fitted RandomForestRegressor or DecisionTreeRegressor
+        filename (str): Path of the file to write
+    """
+    flat, max_depth, n_features = _flatten_forest(model)
+
+    sections = {}
+    position = 0
+    for name, array in flat.items():
+        sections[name] = {"offset": position, "length": len(array)}
+        position += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header = json.dumps(
+        {
+            "n_trees": len(flat["roots"]),
+            "n_features": int(n_features),
+            "max_depth": int(max_depth),
+            "sections": sections,
+        }
+    ).encode()
+    data_start = -(-(len(MAGIC) + 4 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    with open(filename, "wb") as out:
+        out.write(MAGIC)
+        out.write(struct.pack("<I", len(header)))
+        out.write(header)
+        for name, array in flat.items():
+            out.seek(data_start + sections[name]["offset"])
+            out.write(array.tobytes())
+        out.truncate(data_start + position)
+
+
+def load_compact_forest(filename, mmap=True):
+    """
+    Load a forest written by export_compact_forest.
+
+    Args:
+        filename (str): Path of the compact forest file
+        mmap (bool): Memory-map the node arrays instead of reading them
+
+    Returns:
+        CompactForest: Predictor with a scikit-learn compatible predict()
+    """
+    with open(filename, "rb") as model_file:
+        if model_file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{filename} is not a compact forest file")
+        (header_length,) = struct.unpack("<I", model_file.read(4))
+        header = json.loads(model_file.read(header_length))
+    data_start = -(-(len(MAGIC) + 4 + header_length) // ALIGNMENT) * ALIGNMENT
+
+    arrays = {}
+    for name, dtype in SECTIONS.items():
+        section = header["sections"][name]
+        offset = data_start + section["offset"]
+        if mmap:
+            arrays[name] = np.memmap(
+                filename,
+                dtype=dtype,
+                mode="r",
+                offset=offset,
+                shape=(section["length"],),
+            )
+        else:
+            arrays[name] = np.fromfile(
+                filename, dtype=dtype, count=section["length"], offset=offset
+            )
+    return CompactForest(filename, header, arrays)
+
+
+class CompactForest:
+    """Vectorized predictor over the flat node arrays of a forest."""
+
+    def __init__(self, filename, header, arrays):
+        self.filename = filename
+        self.n_trees = header["n_trees"]
+        self.n_features_in_ = header["n_features"]
+        self.max_depth = header["max_depth"]
+        # Plain ndarray views over the (possibly memory-mapped) buffers
+        self.roots = np.asarray(arrays["roots"])
+        self.feature = np.asarray(arrays["feature"])
+        self.threshold = np.asarray(arrays["threshold"])
+        self.left = np.asarray(arrays["left"])
+        self.right = np.asarray(arrays["right"])
+        self.value = np.asarray(arrays["value"])
+        self.cover = np.asarray(arrays["cover"])
+
+    def apply(self, X):
+        """Return the leaf index reached in every tree, shape (rows, trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Expected input with {self.n_features_in_} features, got shape {X.shape}"
+            )
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict(self, X):
+        """Average the leaf values of every tree, like RandomForestRegressor."""
+        return self.value[self.apply(X)].mean(axis=1, dtype=np.float64)
+
+    def __reduce__(self):
+        # Worker processes re-map the file instead of copying the arrays
+        return (load_compact_forest, (self.filename,))
+
+
+if __name__ == "__main__":
+    import pickle
+
+    source, target = sys.argv[1:3]
+    with open(source, "rb") as model_file:
+        export_compact_forest(pickle.load(model_file), target)
+    print(f"Wrote compact forest to {target}")
@@ -0,0 +1,158 @@
+"""
+Per-feature attributions for the recommendation forest (path-dependent TreeSHAP).
+
+Each leaf's contribution to a feature's SHAP value only depends on the unique
+features along the leaf's path: for every such feature the fraction of
+training samples that follow the path (the "zero" fraction) and whether the
+row itself satisfies the path's conditions (the "one" fraction). Leaves are
+grouped by path length so that the Shapley weighting, a polynomial over those
+fractions, is evaluated for all rows, leaves and trees at once with NumPy.
+"""
+
+from math import factorial
+
+import numpy as np
+
+
+def _tree_arrays(model):
+    """Yield (feature, threshold, left, right, value, cover) per tree, locally indexed."""
+    if hasattr(model, "estimators_") or hasattr(model, "tree_"):
+        for estimator in getattr(model, "estimators_", [model]):
+            tree = estimator.tree_
+            yield (
+                tree.feature,
+                tree.threshold,
+                tree.children_left,
+                tree.children_right,
+                tree.value.reshape(tree.node_count),
+                tree.weighted_n_node_samples,
+            )
+        return
+
+    # Compact forests store all trees back to back with self-looping leaves
+    bounds = list(model.roots) + [len(model.feature)]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        nodes = np.arange(end - start)
+        left = model.left[start:end] - start
+        is_leaf = left == nodes
+        yield (
+            model.feature[start:end],
+            model.threshold[start:end].astype(np.float64),
+            np.where(is_leaf, -1, left),
+            np.where(is_leaf, -1, model.right[start:end] - start),
+            model.value[start:end],
+            model.cover[start:end],
+        )
+
+
+def _leaf_paths(feature, threshold, left, right, value, cover):
+    """Collect, per leaf, the merged interval and zero fraction of each path feature."""
+    leaves = []
+    # Stack entries: node, {feature: [lower, upper, zero_fraction]}
+    stack = [(0, {})]
+    while stack:
+        node, conditions = stack.pop()
+        if left[node] < 0:
+            leaves.append((value[node], conditions))
+            continue
+        split = int(feature[node])
+        for child, is_left in ((left[node], True), (right[node], False)):
+            merged = {key: list(bounds) for key, bounds in conditions.items()}
+            lower, upper, zero = merged.get(split, [-np.inf, np.inf, 1.0])
+            if is_left:
+                upper = min(upper, threshold[node])
+            else:
+                lower = max(lower, threshold[node])
+            merged[split] = [lower, upper, zero * cover[child] / cover[node]]
+            stack.append((child, merged))
+    return leaves
+
+
+class ForestExplainer:
+    """Vectorized path-dependent TreeSHAP over every tree of a forest."""
+
+    def __init__(self, model):
+        self.n_features = model.n_features_in_
+        trees = list(_tree_arrays(model))
+        weight = 1.0 / len(trees)
+        self.expected_value = float(sum(tree[4][0] for tree in trees) * weight)
+
+        by_length = {}
+        for tree in trees:
+            for leaf_value, conditions in _leaf_paths(*tree):
+                if conditions:
+                    by_length.setdefault(len(conditions), []).append(
+                        (leaf_value * weight, conditions)
+                    )
+
+        # One block of arrays per path length D: features, bounds, zero fractions
+        self.groups = []
+        for length, leaves in sorted(by_length.items()):
+            features = np.array([list(c) for _, c in leaves], dtype=np.intp)
+            bounds = np.array([list(c.values()) for _, c in leaves], dtype=float)
+            shapley_weights = np.array(
+                [
+                    factorial(k) * factorial(length - k - 1) / factorial(length)
+                    for k in range(length)
+                ]
+            )
+            self.groups.append(
+                (
+                    features,
+                    bounds[..., 0],
+                    bounds[..., 1],
+                    bounds[..., 2],
+                    np.array([v for v, _ in leaves]),
+                    shapley_weights,
+                )
+            )
+
+    def shap_values(self, X):
+        """
+        Compute SHAP values for every row and feature.
+
+        Args:
+            X (np.array): Rows to explain, shape (rows, features)
+
+        Returns:
+            np.array: Contributions of shape (rows, features); together with
+            expected_value they add up to the model prediction of each row
+        """
+        # Compare in float32 like scikit-learn does
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_rows = len(X)
+        phi = np.zeros(n_rows * self.n_features)
+        row_offsets = (np.arange(n_rows) * self.n_features)[:, None, None]
+
+        for features, lower, upper, zero, values, weights in self.groups:
+            length = features.shape[1]
+            x = X[:, features]
+            one = ((x > lower) & (x <= upper)).astype(np.float64)
+
+            # Coefficients of prod_j (zero_j + one_j * t), shape (rows, leaves, D + 1)
+            poly = np.zeros(one.shape[:2] + (length + 1,))
+            poly[..., 0] = 1.0
+            for j in range(length):
+                shifted = poly[..., :-1] * one[..., j, None]
+                poly *= zero[None, :, j, None]
+                poly[..., 1:] += shifted
+
+            # Divide out feature i's factor and apply the Shapley weights
+            # Factor zero_i (one_i == 0): plain division
+            weighted_without = np.einsum("rlk,k->rl", poly[..., :length], weights)
+            summed_zero = weighted_without[..., None] / zero[None]
+            # Factor (zero_i + t) (one_i == 1): synthetic division from the top
+            quotient = np.broadcast_to(poly[..., length, None], one.shape).copy()
+            summed_one = quotient * weights[length - 1]
+            for k in range(length - 1, 0, -1):
+                quotient = poly[..., k, None] - zero[None] * quotient
+                summed_one += quotient * weights[k - 1]
+            summed = np.where(one > 0, summed_one, summed_zero)
+
+            contributions = values[None, :, None] * (one - zero[None]) * summed
+            phi += np.bincount(
+                (row_offsets + features[None]).ravel(),
+                weights=contributions.ravel(),
+                minlength=len(phi),
+            )
+        return phi.reshape(n_rows, self.n_features)
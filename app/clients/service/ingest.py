@@ -0,0 +1,281 @@
+"""
+Bulk client ingestion from NDJSON or CSV uploads.
+
+Records are parsed line by line as the upload streams in and validated a
+chunk at a time with NumPy column operations, using the constraints declared
+on ClientBase, instead of building one Pydantic model per row. Valid rows of
+each chunk are handed to an insert callback, so memory depends on the chunk
+size and not on the size of the upload. Lines that are not UTF-8 or longer
+than MAX_LINE_BYTES are reported as invalid records.
+
+Each chunk is committed on its own. If inserting a chunk fails, its rows are
+reported as failed and the upload stops there; rows of earlier chunks stay
+created and are reported as such.
+"""
+
+import csv
+import json
+import os
+import re
+from enum import IntEnum
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from app.clients.schema import ClientBase
+
+CHUNK_ROWS = int(os.getenv("CLIENT_INGEST_CHUNK_ROWS", "1000"))
+# Longer lines are reported as invalid instead of being buffered
+MAX_LINE_BYTES = int(os.getenv("CLIENT_INGEST_MAX_LINE_BYTES", str(64 * 1024)))
+
+# Accepted spellings, as in Pydantic's lax bool parsing
+TRUE_VALUES = ["1", "on", "t", "true", "y", "yes"]
+FALSE_VALUES = ["0", "off", "f", "false", "n", "no"]
+# Longer digit strings could overflow int64
+MAX_INT_DIGITS = 18
+# ASCII digits only: str.isdigit() also accepts e.g. "²", which int() rejects
+INTEGER_PATTERN = re.compile(rf"-?[0-9]{{1,{MAX_INT_DIGITS}}}")
+
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-lines")
+CSV_TYPES = ("text/csv",)
+
+
+def _field_rules() -> Dict[str, Tuple[str, Any]]:
+    """Derive (kind, rule) per field from the ClientBase declarations."""
+    rules = {}
+    for name, field in ClientBase.model_fields.items():
+        if field.annotation is bool:
+            rules[name] = ("bool", None)
+        elif isinstance(field.annotation, type) and issubclass(
+            field.annotation, IntEnum
+        ):
+            rules[name] = ("choice", sorted(int(member) for member in field.annotation))
+        else:
+            lower = next((m.ge for m in field.metadata if hasattr(m, "ge")), None)
+            upper = next((m.le for m in field.metadata if hasattr(m, "le")), None)
+            rules[name] = ("int", (lower, upper))
+    return rules
+
+
+FIELD_RULES = _field_rules()
+
+
+def detect_format(content_type: Optional[str]) -> Optional[str]:
+    """Map a Content-Type header to "ndjson" or "csv"; None if unsupported."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in NDJSON_TYPES:
+        return "ndjson"
+    if media_type in CSV_TYPES:
+        return "csv"
+    return None
+
+
+def _decode(line: bytes) -> Tuple[str, Optional[str]]:
+    if len(line) > MAX_LINE_BYTES:
+        return "", f"line longer than {MAX_LINE_BYTES} bytes"
+    try:
+        return line.decode("utf-8-sig").rstrip("\r"), None
+    except UnicodeDecodeError:
+        return "", "not valid UTF-8"
+
+
+async def iter_lines(
+    stream: AsyncIterator[bytes],
+) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    """
+    Split a byte stream into decoded lines without holding more than one line.
+
+    Yields:
+        tuple: (line, None), or ("", error message) for a line that is not
+        UTF-8 or longer than MAX_LINE_BYTES
+    """
+    buffer = b""
+    # Inside an over-long line, which is dropped up to its newline
+    skipping = False
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if skipping:
+                skipping = False
+                continue
+            yield _decode(line)
+        if len(buffer) > MAX_LINE_BYTES:
+            if not skipping:
+                yield _decode(buffer)
+                skipping = True
+            buffer = b""
+    if buffer and not skipping:
+        yield _decode(buffer)
+
+
+async def iter_records(
+    lines: AsyncIterator[Tuple[str, Optional[str]]], fmt: str
+) -> AsyncIterator[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Parse non-blank lines into records.
+
+    Args:
+        lines: (line, error) pairs from iter_lines
+        fmt (str): "ndjson" or "csv"
+
+    Yields:
+        tuple: (record, None) or (None, parse error message) per record
+    """
+    header = None
+    async for line, error in lines:
+        if error is not None:
+            yield None, error
+            continue
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield None, "invalid JSON"
+                continue
+            if isinstance(record, dict):
+                yield record, None
+            else:
+                yield None, "expected a JSON object"
+        else:
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+            elif len(values) != len(header):
+                yield None, f"expected {len(header)} columns, got {len(values)}"
+            else:
+                yield dict(zip(header, values)), None
+
+
+def validate_chunk(
+    records: List[Dict[str, Any]],
+) -> Tuple[Dict[str, list], List[Dict[str, str]]]:
+    """
+    Validate a chunk of records column by column.
+
+    Args:
+        records (list): Parsed records; values may be native JSON or CSV strings
+
+    Returns:
+        tuple: (converted values per field, field errors per record); a record
+        is valid when its error dict is empty
+    """
+    errors: List[Dict[str, str]] = [{} for _ in records]
+    columns = {}
+    for name, (kind, rule) in FIELD_RULES.items():
+        raw = np.array(
+            [
+                "" if record.get(name) is None else str(record[name])
+                for record in records
+            ],
+            dtype=str,
+        )
+        text = np.char.lower(np.char.strip(raw))
+        missing = text == ""
+
+        if kind == "bool":
+            values = np.isin(text, TRUE_VALUES)
+            parsed = values | np.isin(text, FALSE_VALUES)
+            checks = [(parsed, "must be a boolean")]
+        else:
+            parsed = np.array(
+                [INTEGER_PATTERN.fullmatch(value) is not None for value in text],
+                dtype=bool,
+            )
+            values = np.where(parsed, text, "0").astype(np.int64)
+            checks = [(parsed, "must be an integer")]
+            if kind == "choice":
+                checks.append((np.isin(values, rule), f"must be one of {rule}"))
+            else:
+                lower, upper = rule
+                if lower is not None:
+                    checks.append((values >= lower, f"must be >= {lower}"))
+                if upper is not None:
+                    checks.append((values <= upper, f"must be <= {upper}"))
+
+        failed = missing.copy()
+        for index in np.flatnonzero(missing):
+            errors[index][name] = "field required"
+        for passed, message in checks:
+            for index in np.flatnonzero(~passed & ~failed):
+                errors[index][name] = message
+            failed |= ~passed
+        columns[name] = values.tolist()
+    return columns, errors
+
+
+def _process_chunk(
+    pending: List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]],
+    insert_rows: Callable[[List[Dict[str, Any]]], List[int]],
+) -> List[Dict[str, Any]]:
+    parsed = [record for _, record, error in pending if error is None]
+    columns, errors = validate_chunk(parsed) if parsed else ({}, [])
+    valid = [index for index, error in enumerate(errors) if not error]
+    rows = [{name: columns[name][index] for name in FIELD_RULES} for index in valid]
+    ids = dict(zip(valid, insert_rows(rows))) if rows else {}
+
+    report = []
+    index = 0
+    for row, _, parse_error in pending:
+        if parse_error:
+            report.append(
+                {"row": row, "status": "invalid", "errors": {"record": parse_error}}
+            )
+            continue
+        if errors[index]:
+            report.append({"row": row, "status": "invalid", "errors": errors[index]})
+        else:
+            report.append({"row": row, "status": "created", "id": ids[index]})
+        index += 1
+    return report
+
+
+async def ingest_records(
+    stream: AsyncIterator[bytes],
+    fmt: str,
+    insert_rows: Callable[[List[Dict[str, Any]]], List[int]],
+    chunk_rows: int = CHUNK_ROWS,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Validate and insert an uploaded stream of client records.
+
+    Args:
+        stream: Request body chunks
+        fmt (str): "ndjson" or "csv" (with a header line)
+        insert_rows: Inserts validated rows and returns their ids in order
+        chunk_rows (int): Records validated and inserted together
+
+    Yields:
+        dict: One status per record, in upload order, then a summary. When a
+        chunk fails to insert, its rows are "failed", the summary counts them
+        and carries the error, and the rest of the upload is not read.
+    """
+    totals = {"rows": 0, "created": 0, "invalid": 0}
+    pending = []
+    records = iter_records(iter_lines(stream), fmt)
+    while True:
+        record = await anext(records, None)
+        if record is not None:
+            totals["rows"] += 1
+            pending.append((totals["rows"], *record))
+            if len(pending) < chunk_rows:
+                continue
+        try:
+            # Validation and the commit block, so they run off the event loop
+            statuses = await run_in_threadpool(_process_chunk, pending, insert_rows)
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e)
+            for row, _, _ in pending:
+                yield {"row": row, "status": "failed"}
+            yield {"summary": {**totals, "failed": len(pending), "error": error}}
+            return
+        for status in statuses:
+            totals[status["status"]] += 1
+            yield status
+        pending = []
+        if record is None:
+            break
+    yield {"summary": totals}
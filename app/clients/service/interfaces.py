@@ -2,11 +2,17 @@
 Service interfaces for client management following Interface Segregation Principle.
 """
 
-from typing import Any, Dict, List, Protocol
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
 
 from sqlalchemy.orm import Session
 
-from app.clients.schema import ClientUpdate, ServiceUpdate
+from app.clients.schema import (
+    BulkCaseAssignment,
+    BulkServiceUpdate,
+    CaseReassignment,
+    ClientUpdate,
+    ServiceUpdate,
+)
 from app.models import Client, ClientCase
 
 
@@ -17,15 +23,35 @@ class IClientQueryService(Protocol):
         """Get a specific client by ID."""
         ...
 
-    def get_clients(self, db: Session, skip: int, limit: int) -> Dict[str, Any]:
+    def get_client_version(self, db: Session, client_id: int) -> int:
+        """Get only the version of a client."""
+        ...
+
+    def get_clients(
+        self,
+        db: Session,
+        skip: int,
+        limit: int,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
         """Get paginated list of clients."""
         ...
 
-    def get_clients_by_criteria(self, db: Session, **criteria) -> List[Client]:
+    def get_clients_batch(
+        self, db: Session, ids: List[int], include_services: bool = False
+    ) -> Dict[str, Any]:
+        """Get many clients by id, reporting the ids that do not exist."""
+        ...
+
+    def get_clients_by_criteria(
+        self, db: Session, columns: Optional[Sequence[str]] = None, **criteria
+    ) -> List[Client]:
         """Get clients filtered by criteria."""
         ...
 
-    def get_clients_by_success_rate(self, db: Session, min_rate: int) -> List[Client]:
+    def get_clients_by_success_rate(
+        self, db: Session, min_rate: int, columns: Optional[Sequence[str]] = None
+    ) -> List[Client]:
         """Get clients with success rate above threshold."""
         ...
 
@@ -33,8 +59,16 @@ class IClientQueryService(Protocol):
 class IClientCommandService(Protocol):
     """Interface for client command operations."""
 
+    def create_clients(self, db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+        """Create clients from validated rows, returning their ids."""
+        ...
+
     def update_client(
-        self, db: Session, client_id: int, client_data: ClientUpdate
+        self,
+        db: Session,
+        client_id: int,
+        client_data: ClientUpdate,
+        expected_version: Optional[int] = None,
     ) -> Client:
         """Update a client's information."""
         ...
@@ -51,12 +85,27 @@ class ICaseQueryService(Protocol):
         """Get all services for a client."""
         ...
 
-    def get_clients_by_services(self, db: Session, **service_filters) -> List[Client]:
+    def get_client_service_versions(
+        self, db: Session, client_id: int
+    ) -> List[Tuple[int, int]]:
+        """Get (user_id, version) of every case of a client."""
+        ...
+
+    def get_case_version(self, db: Session, client_id: int, user_id: int) -> int:
+        """Get only the version of a case."""
+        ...
+
+    def get_clients_by_services(
+        self, db: Session, columns: Optional[Sequence[str]] = None, **service_filters
+    ) -> List[Client]:
         """Get clients filtered by services."""
         ...
 
     def get_clients_by_case_worker(
-        self, db: Session, case_worker_id: int
+        self,
+        db: Session,
+        case_worker_id: int,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[Client]:
         """Get clients assigned to a case worker."""
         ...
@@ -66,13 +115,36 @@ class ICaseCommandService(Protocol):
     """Interface for case command operations."""
 
     def update_client_services(
-        self, db: Session, client_id: int, user_id: int, service_update: ServiceUpdate
+        self,
+        db: Session,
+        client_id: int,
+        user_id: int,
+        service_update: ServiceUpdate,
+        expected_version: Optional[int] = None,
     ) -> ClientCase:
         """Update client services."""
         ...
 
+    def bulk_update_services(
+        self, db: Session, bulk_update: BulkServiceUpdate
+    ) -> Dict[str, Any]:
+        """Update services of many cases in one transaction."""
+        ...
+
     def create_case_assignment(
         self, db: Session, client_id: int, case_worker_id: int
     ) -> ClientCase:
         """Create a new case assignment."""
         ...
+
+    def bulk_create_case_assignments(
+        self, db: Session, bulk_assignment: BulkCaseAssignment
+    ) -> Dict[str, Any]:
+        """Create many case assignments in one transaction."""
+        ...
+
+    def reassign_cases(
+        self, db: Session, reassignment: CaseReassignment
+    ) -> Dict[str, Any]:
+        """Move cases from one case worker to another."""
+        ...
@@ -8,13 +8,46 @@ import os
 
 # Third-party imports
 import pickle
+import time
 
 # import json
 from itertools import product
 
 import numpy as np
 
+from app.clients.service.compact_forest import load_compact_forest
+from app.clients.service.explain import ForestExplainer
+from app.core.metrics import registry
+from app.core.startup import startup_registry
+from app.core.tracing import traced
+
 # Constants
+COLUMN_FEATURES = [
+    "age",
+    "gender",
+    "work_experience",
+    "canada_workex",
+    "dep_num",
+    "canada_born",
+    "citizen_status",
+    "level_of_schooling",
+    "fluent_english",
+    "reading_english_scale",
+    "speaking_english_scale",
+    "writing_english_scale",
+    "numeracy_scale",
+    "computer_scale",
+    "transportation_bool",
+    "caregiver_bool",
+    "housing",
+    "income_source",
+    "felony_bool",
+    "attending_school",
+    "currently_employed",
+    "substance_use",
+    "time_unemployed",
+    "need_mental_health_support_bool",
+]
 COLUMN_INTERVENTIONS = [
     "Life Stabilization",
     "General Employment Assistance Services",
@@ -25,11 +58,39 @@ COLUMN_INTERVENTIONS = [
     "Enhanced Referrals for Skills Development",
 ]
 
-# Load model
+# Load model, either the pickled forest or its compact export
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(CURRENT_DIR, "model.pkl")
-with open(MODEL_PATH, "rb") as model_file:
-    MODEL = pickle.load(model_file)
+COMPACT_MODEL_PATH = os.path.join(CURRENT_DIR, "model.cforest")
+MODEL_FORMAT = os.getenv("RECOMMENDATION_MODEL_FORMAT", "pickle")
+
+
+def load_model():
+    """
+    Load the recommendation model in the configured format.
+
+    Returns:
+        The unpickled forest, or its compact export
+    """
+    if MODEL_FORMAT == "compact":
+        return load_compact_forest(COMPACT_MODEL_PATH)
+    with open(MODEL_PATH, "rb") as model_file:
+        return pickle.load(model_file)
+
+
+EXPLAIN_DURATION = registry.histogram(
+    "recommendation_explain_duration_seconds",
+    "Time to compute TreeSHAP explanations for one recommendation request",
+)
+
+# Loaded at start-up or on first use, not at import
+recommendation_model = startup_registry.register("recommendation_model", load_model)
+# Walking every tree path takes a moment, so it is warmed up too
+recommendation_explainer = startup_registry.register(
+    "recommendation_explainer",
+    lambda: ForestExplainer(recommendation_model.get()),
+    depends_on=["recommendation_model"],
+)
 
 
 def clean_input_data(input_data):
@@ -42,35 +103,9 @@ def clean_input_data(input_data):
     Returns:
         list: Cleaned and formatted data ready for model input
     """
-    columns = [
-        "age",
-        "gender",
-        "work_experience",
-        "canada_workex",
-        "dep_num",
-        "canada_born",
-        "citizen_status",
-        "level_of_schooling",
-        "fluent_english",
-        "reading_english_scale",
-        "speaking_english_scale",
-        "writing_english_scale",
-        "numeracy_scale",
-        "computer_scale",
-        "transportation_bool",
-        "caregiver_bool",
-        "housing",
-        "income_source",
-        "felony_bool",
-        "attending_school",
-        "currently_employed",
-        "substance_use",
-        "time_unemployed",
-        "need_mental_health_support_bool",
-    ]
-    demographics = {key: input_data[key] for key in columns}
+    demographics = {key: input_data[key] for key in COLUMN_FEATURES}
     output = []
-    for column in columns:
+    for column in COLUMN_FEATURES:
         value = demographics.get(column, None)
         if isinstance(value, str):
             value = convert_text(value)  # Removed 'column' from here as it wasn't used
@@ -210,21 +245,51 @@ def process_results(baseline_pred, results_matrix):
     return {"baseline": baseline_pred[-1], "interventions": result_list}
 
 
-def interpret_and_calculate(input_data):
+@traced()
+def build_scoring_rows(input_data):
     """
-    Process input data and generate intervention recommendations.
+    Build the rows scored for a recommendation request.
 
     Args:
         input_data (dict): Raw input data from client
 
     Returns:
-        dict: Processed results with recommendations
+        np.array: Baseline row followed by one row per intervention combination
     """
     raw_data = clean_input_data(input_data)
     baseline_row = get_baseline_row(raw_data).reshape(1, -1)
     intervention_rows = create_matrix(raw_data)
-    baseline_prediction = MODEL.predict(baseline_row)
-    intervention_predictions = MODEL.predict(intervention_rows).reshape(-1, 1)
+    return np.concatenate((baseline_row, intervention_rows))
+
+
+def predict_rows(rows):
+    """
+    Score rows with the recommendation model.
+
+    Args:
+        rows (np.array): Rows built by build_scoring_rows
+
+    Returns:
+        np.array: Predicted success rate per row
+    """
+    return recommendation_model.get().predict(rows)
+
+
+@traced()
+def summarize_predictions(scoring_rows, predictions):
+    """
+    Turn the scored rows into the top intervention recommendations.
+
+    Args:
+        scoring_rows (np.array): Rows built by build_scoring_rows
+        predictions (np.array): Predicted success rate per row
+
+    Returns:
+        dict: Processed results with recommendations
+    """
+    baseline_prediction = predictions[:1]
+    intervention_rows = scoring_rows[1:]
+    intervention_predictions = np.asarray(predictions[1:]).reshape(-1, 1)
     result_matrix = np.concatenate(
         (intervention_rows, intervention_predictions), axis=1
     )
@@ -234,6 +299,61 @@ def interpret_and_calculate(input_data):
     return process_results(baseline_prediction, top_results)
 
 
+def get_explainer():
+    """
+    Get the TreeSHAP explainer for the recommendation model.
+
+    Returns:
+        ForestExplainer: Explainer built from the recommendation model
+    """
+    return recommendation_explainer.get()
+
+
+@traced()
+def explain_top_recommendations(scoring_rows, predictions, top_n=3):
+    """
+    Attribute the predicted success of the top recommendations to each input.
+
+    Args:
+        scoring_rows (np.array): Rows built by build_scoring_rows
+        predictions (np.array): Predicted success rate per row
+        top_n (int): Number of recommendations, as in summarize_predictions
+
+    Returns:
+        list: One explanation per recommendation, in the same order
+    """
+    explainer = get_explainer()
+    started = time.perf_counter()
+    order = np.asarray(predictions[1:]).argsort()
+    top_rows = scoring_rows[1:][order[-top_n:]]
+    shap_values = explainer.shap_values(top_rows)
+    EXPLAIN_DURATION.labels().observe(time.perf_counter() - started)
+    n_features = len(COLUMN_FEATURES)
+    return [
+        {
+            "base_value": explainer.expected_value,
+            "features": dict(zip(COLUMN_FEATURES, row[:n_features].tolist())),
+            "interventions": dict(zip(COLUMN_INTERVENTIONS, row[n_features:].tolist())),
+        }
+        for row in shap_values
+    ]
+
+
+@traced()
+def interpret_and_calculate(input_data):
+    """
+    Process input data and generate intervention recommendations.
+
+    Args:
+        input_data (dict): Raw input data from client
+
+    Returns:
+        dict: Processed results with recommendations
+    """
+    scoring_rows = build_scoring_rows(input_data)
+    return summarize_predictions(scoring_rows, predict_rows(scoring_rows))
+
+
 if __name__ == "__main__":
     test_data = {
         "age": "23",
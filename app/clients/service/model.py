@@ -4,6 +4,7 @@ Handles the preparation, training, and saving of the prediction model.
 """
 
 # Standard library imports
+import os
 import pickle
 
 # Third-party imports
@@ -12,6 +13,15 @@ import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 
+from app.clients.service.compact_forest import export_compact_forest
+from app.models.training import save_report, train_models
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(CURRENT_DIR, "data_commontool.csv")
+MODEL_PATH = os.path.join(CURRENT_DIR, "model.pkl")
+COMPACT_MODEL_PATH = os.path.join(CURRENT_DIR, "model.cforest")
+REPORT_PATH = os.path.join(CURRENT_DIR, "model_report.json")
+
 
 def prepare_models():
     """
@@ -20,8 +30,19 @@ def prepare_models():
     Returns:
         RandomForestRegressor: Trained model for predicting success rates
     """
+    model, _ = prepare_models_with_report()
+    return model
+
+
+def prepare_models_with_report():
+    """
+    Train the Random Forest model and evaluate it with cross-validation.
+
+    Returns:
+        tuple: Trained RandomForestRegressor and its evaluation report
+    """
     # Load dataset
-    data = pd.read_csv("data_commontool.csv")
+    data = pd.read_csv(DATA_PATH)
     # Define feature columns
     feature_columns = [
         "age",  # Client's age
@@ -65,16 +86,30 @@ def prepare_models():
     features = np.array(data[all_features])  # Changed from X to features
     targets = np.array(data["success_rate"])  # Changed from y to targets
     # Split the dataset
-    features_train, _, targets_train, _ = train_test_split(  # Removed unused variables
+    features_train, features_test, targets_train, targets_test = train_test_split(
         features, targets, test_size=0.2, random_state=42
     )
-    # Initialize and train the model
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
-    model.fit(features_train, targets_train)
-    return model
+    # Initialize, train and evaluate the model; trees are fitted on all cores
+    candidates = {
+        "random_forest": RandomForestRegressor(
+            n_estimators=100, random_state=42, n_jobs=-1
+        )
+    }
+    fitted, report = train_models(
+        candidates,
+        features_train,
+        targets_train,
+        features_test,
+        targets_test,
+        task="regression",
+    )
+    model = fitted["random_forest"]
+    # Serve single recommendations without spinning up a thread pool
+    model.set_params(n_jobs=None)
+    return model, report
 
 
-def save_model(model, filename="model.pkl"):
+def save_model(model, filename=MODEL_PATH):
     """
     Save the trained model to a file.
 
@@ -86,7 +121,18 @@ def save_model(model, filename="model.pkl"):
         pickle.dump(model, model_file)
 
 
-def load_model(filename="model.pkl"):
+def export_compact_model(model, filename=COMPACT_MODEL_PATH):
+    """
+    Export the trained model to the compact, memory-mappable format.
+
+    Args:
+        model: Trained model to export
+        filename (str): Name of the file to write the compact model to
+    """
+    export_compact_forest(model, filename)
+
+
+def load_model(filename=MODEL_PATH):
     """
     Load a trained model from a file.
 
@@ -101,10 +147,12 @@ def load_model(filename="model.pkl"):
 
 
 def main():
-    """Train and save the model."""
+    """Train, evaluate and save the model together with its report."""
     print("Starting model training...")
-    model = prepare_models()
+    model, report = prepare_models_with_report()
     save_model(model)
+    export_compact_model(model)
+    save_report(report, REPORT_PATH)
     print("Model training completed and saved successfully.")
 
 
@@ -0,0 +1,480 @@
+"""
+Synthetic clients and cases fitted to data_commontool.csv.
+
+A Gaussian copula is fitted to the CSV: every column keeps its empirical
+distribution (so generated values are always values seen in the data, and
+satisfy the column constraints), and the dependence between columns is the
+correlation of their normal scores. Client columns are drawn from the joint
+distribution; each client then gets one or more cases, with distinct case
+workers, whose service flags and success rate are drawn conditionally on
+the client, so the relation between profiles and outcomes carries over.
+
+Rows are generated with NumPy a chunk at a time; chunk i always uses the
+random stream (seed, i), so a seed reproduces the same data whatever the
+output. Rows go into a database with their read model rows (but no change
+log entries), to CSV files importable through POST /clients/bulk, or to
+Parquet files when pyarrow is installed.
+
+Usage:
+    python -m app.clients.service.synthetic --clients 1000000 --format db
+    python -m app.clients.service.synthetic --clients 10000 --format csv \
+        --output synthetic/
+"""
+
+import argparse
+import csv
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from scipy.special import ndtr, ndtri
+from sqlalchemy import Boolean, func, insert, select
+
+from app.models import Client, ClientCase, User, UserRole
+from app.models.overview import client_overview, client_overview_cases
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "data_commontool.csv")
+# Fixed, so that the data for a seed does not depend on the chunking
+CHUNK_ROWS = 100_000
+WORKER_PASSWORD = "worker123"
+# Placeholders of DBAPI parameter styles for rows passed as tuples
+DRIVER_PLACEHOLDERS = {"qmark": "?", "format": "%s", "pyformat": "%s"}
+
+CLIENT_COLUMNS = [
+    column.name
+    for column in Client.__table__.columns
+    if column.name not in ("id", "version")
+]
+CASE_COLUMNS = [
+    column.name
+    for column in ClientCase.__table__.columns
+    if column.name not in ("client_id", "user_id", "version")
+]
+BOOLEAN_COLUMNS = {
+    column.name
+    for table in (Client.__table__, ClientCase.__table__)
+    for column in table.columns
+    if isinstance(column.type, Boolean)
+}
+
+
+class CopulaModel:
+    """Empirical marginals joined by a Gaussian copula."""
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        values: List[np.ndarray],
+        cdfs: List[np.ndarray],
+        correlation: np.ndarray,
+    ):
+        """
+        Args:
+            columns: Column names, in the order of the other arguments
+            values: Sorted distinct values of each column
+            cdfs: Cumulative probability at each of those values
+            correlation: Correlation matrix of the columns' normal scores
+        """
+        self.columns = list(columns)
+        self.values = values
+        self.cdfs = cdfs
+        self.correlation = correlation
+
+    @classmethod
+    def fit(cls, data: np.ndarray, columns: Sequence[str]) -> "CopulaModel":
+        """
+        Fit marginals and normal-score correlation to integer data.
+
+        Args:
+            data: One row per record, one column per name in columns
+            columns: Column names
+
+        Returns:
+            CopulaModel: The fitted model
+        """
+        values, cdfs, scores = [], [], []
+        for column in data.T:
+            distinct, counts = np.unique(column, return_counts=True)
+            cdf = np.cumsum(counts) / len(column)
+            # Mid-point of each value's probability mass, as a normal score
+            middle = cdf - counts / (2 * len(column))
+            scores.append(ndtri(middle[np.searchsorted(distinct, column)]))
+            values.append(distinct)
+            cdfs.append(cdf)
+        scores = np.column_stack(scores)
+        # Constant columns have no correlation; treat them as independent
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = np.nan_to_num(np.corrcoef(scores, rowvar=False))
+        np.fill_diagonal(correlation, 1.0)
+        return cls(columns, values, cdfs, _nearest_correlation(correlation))
+
+    def quantiles(self, index: int, normal: np.ndarray) -> np.ndarray:
+        """Map standard normal draws to values of one column."""
+        position = np.searchsorted(self.cdfs[index], ndtr(normal), side="right")
+        return self.values[index][np.minimum(position, len(self.values[index]) - 1)]
+
+
+def _nearest_correlation(matrix: np.ndarray) -> np.ndarray:
+    """Clip negative eigenvalues so the matrix has a Cholesky factor."""
+    eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+    fixed = eigenvectors @ np.diag(np.maximum(eigenvalues, 1e-6)) @ eigenvectors.T
+    scale = np.sqrt(np.diag(fixed))
+    return fixed / np.outer(scale, scale)
+
+
+def load_csv(path: str = CSV_PATH) -> Dict[str, np.ndarray]:
+    """Columns of the source CSV; every value is an integer."""
+    with open(path, newline="") as csv_file:
+        header = next(csv.reader(csv_file))
+    data = np.loadtxt(path, delimiter=",", skiprows=1, dtype=np.int64, ndmin=2)
+    return {name: data[:, index] for index, name in enumerate(header)}
+
+
+class SyntheticGenerator:
+    """Generates chunks of clients and their cases from a fitted copula."""
+
+    def __init__(
+        self,
+        model: CopulaModel,
+        seed: int = 0,
+        case_workers: int = 50,
+        cases_per_client: float = 1.5,
+    ):
+        """
+        Args:
+            model: Copula fitted to the client columns followed by the case columns
+            seed (int): Seed of the random streams
+            case_workers (int): Case workers the cases are spread over
+            cases_per_client (float): Mean number of cases (and case workers)
+                per client, at least 1
+        """
+        if case_workers < 1 or cases_per_client < 1:
+            raise ValueError("Need at least one case worker and one case per client")
+        self.model = model
+        self.seed = seed
+        self.case_workers = case_workers
+        self.cases_per_client = cases_per_client
+
+        client_count = len(CLIENT_COLUMNS)
+        correlation = model.correlation
+        client_block = correlation[:client_count, :client_count]
+        cross = correlation[client_count:, :client_count]
+        case_block = correlation[client_count:, client_count:]
+        self._client_factor = np.linalg.cholesky(client_block)
+        # Case scores given client scores: mean cross @ inv(client) @ z, and
+        # the conditional covariance below
+        self._case_weights = cross @ np.linalg.inv(client_block)
+        conditional = case_block - self._case_weights @ cross.T
+        self._case_factor = np.linalg.cholesky(_nearest_correlation(conditional))
+        self._case_factor *= np.sqrt(np.clip(np.diag(conditional), 1e-6, None))[:, None]
+
+    @classmethod
+    def from_csv(cls, path: str = CSV_PATH, **kwargs) -> "SyntheticGenerator":
+        columns = load_csv(path)
+        names = CLIENT_COLUMNS + CASE_COLUMNS
+        data = np.column_stack([columns[name] for name in names])
+        return cls(CopulaModel.fit(data, names), **kwargs)
+
+    def chunks(
+        self, clients: int, first_id: int = 1
+    ) -> Iterator[Dict[str, Dict[str, np.ndarray]]]:
+        """
+        Generate clients in chunks of CHUNK_ROWS.
+
+        Args:
+            clients (int): Number of clients
+            first_id (int): Id of the first client; ids are consecutive
+
+        Yields:
+            dict: {"clients": columns incl. id, "cases": columns incl.
+            client_id and worker (index of the case worker, 0-based)}
+        """
+        for index, start in enumerate(range(0, clients, CHUNK_ROWS)):
+            size = min(CHUNK_ROWS, clients - start)
+            yield self._chunk(
+                np.random.default_rng([self.seed, index]), size, first_id + start
+            )
+
+    def _chunk(self, rng, size: int, first_id: int) -> Dict[str, Dict[str, np.ndarray]]:
+        model = self.model
+        client_count = len(CLIENT_COLUMNS)
+        scores = rng.standard_normal((size, client_count)) @ self._client_factor.T
+        clients = {"id": np.arange(first_id, first_id + size, dtype=np.int64)}
+        for index, name in enumerate(CLIENT_COLUMNS):
+            clients[name] = model.quantiles(index, scores[:, index])
+
+        # 1 + Poisson extra cases, each with a different case worker
+        counts = 1 + rng.poisson(self.cases_per_client - 1, size)
+        counts = np.minimum(counts, self.case_workers)
+        owner = np.repeat(np.arange(size), counts)
+        nth = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+        first_worker = rng.integers(0, self.case_workers, size)
+        case_scores = scores[owner] @ self._case_weights.T + (
+            rng.standard_normal((len(owner), len(CASE_COLUMNS))) @ self._case_factor.T
+        )
+        cases = {
+            "client_id": clients["id"][owner],
+            "worker": (first_worker[owner] + nth) % self.case_workers,
+        }
+        for index, name in enumerate(CASE_COLUMNS):
+            cases[name] = model.quantiles(client_count + index, case_scores[:, index])
+        return {"clients": clients, "cases": cases}
+
+
+def _rows(columns: Dict[str, np.ndarray], names: Sequence[str]) -> List[list]:
+    return np.column_stack([columns[name] for name in names]).tolist()
+
+
+def ensure_case_workers(connection, count: int) -> List[int]:
+    """Ids of synthetic_worker0..count-1, creating the missing accounts."""
+    from app.auth.router import get_password_hash
+
+    usernames = [f"synthetic_worker{index}" for index in range(count)]
+    existing = dict(
+        connection.execute(
+            select(User.username, User.id).where(User.username.in_(usernames))
+        ).all()
+    )
+    missing = [username for username in usernames if username not in existing]
+    if missing:
+        hashed = get_password_hash(WORKER_PASSWORD)
+        connection.execute(
+            insert(User),
+            [
+                {
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "hashed_password": hashed,
+                    "role": UserRole.case_worker,
+                }
+                for username in missing
+            ],
+        )
+        existing.update(
+            connection.execute(
+                select(User.username, User.id).where(User.username.in_(missing))
+            ).all()
+        )
+    return [existing[username] for username in usernames]
+
+
+def overview_columns(
+    clients: Dict[str, np.ndarray], cases: Dict[str, np.ndarray]
+) -> Dict[str, np.ndarray]:
+    """
+    client_overview rows of newly generated clients, computed from the arrays.
+
+    Matches refresh_client_overview, without reading the rows back; the
+    client_overview_cases rows are the case rows themselves.
+
+    Args:
+        clients: Client columns incl. id, ids consecutive
+        cases: Case columns incl. client_id and user_id, at least one per client
+
+    Returns:
+        dict: Overview columns, one entry per client
+    """
+    owner = cases["client_id"] - clients["id"][0]
+    count = len(clients["id"])
+    overview = {name: clients[name] for name in ["id"] + CLIENT_COLUMNS}
+    best = np.zeros(count, dtype=np.int64)
+    np.maximum.at(best, owner, cases["success_rate"])
+    overview["best_success_rate"] = best
+    # New rows are at version 1
+    overview["version"] = np.ones(count, dtype=np.int64)
+    return overview
+
+
+def _insert(connection, table, columns: Dict[str, np.ndarray]) -> None:
+    """
+    Insert rows given as column arrays.
+
+    SQLAlchemy's per-row parameter processing costs more than the insert, so
+    plain tuples go to the driver when its placeholder style is known.
+    """
+    names = list(columns)
+    values = [
+        (
+            columns[name].astype(bool).tolist()
+            if isinstance(table.c[name].type, Boolean)
+            else columns[name].tolist()
+        )
+        for name in names
+    ]
+    placeholder = DRIVER_PLACEHOLDERS.get(connection.dialect.paramstyle)
+    if placeholder is None:
+        connection.execute(
+            insert(table), [dict(zip(names, row)) for row in zip(*values)]
+        )
+        return
+    connection.exec_driver_sql(
+        f"INSERT INTO {table.name} ({', '.join(names)}) "
+        f"VALUES ({', '.join([placeholder] * len(names))})",
+        list(zip(*values)),
+    )
+
+
+def write_database(generator: SyntheticGenerator, engine, clients: int) -> int:
+    """
+    Append generated clients, cases and overview rows, a chunk per transaction.
+
+    Case workers are the accounts synthetic_worker0..case_workers-1 (password
+    WORKER_PASSWORD), created when missing. The change log is not written.
+
+    Returns:
+        int: Number of cases written
+    """
+    with engine.begin() as connection:
+        worker_ids = np.array(ensure_case_workers(connection, generator.case_workers))
+        first_id = (
+            connection.execute(select(func.max(Client.__table__.c.id))).scalar() or 0
+        ) + 1
+    case_names = ["client_id", "user_id"] + CASE_COLUMNS
+    total_cases = 0
+    for chunk in generator.chunks(clients, first_id):
+        cases = dict(chunk["cases"], user_id=worker_ids[chunk["cases"]["worker"]])
+        cases = {name: cases[name] for name in case_names}
+        with engine.begin() as connection:
+            _insert(connection, Client.__table__, chunk["clients"])
+            _insert(connection, ClientCase.__table__, cases)
+            _insert(
+                connection, client_overview, overview_columns(chunk["clients"], cases)
+            )
+            _insert(
+                connection,
+                client_overview_cases,
+                {**cases, "version": np.ones(len(cases["client_id"]), dtype=np.int64)},
+            )
+        total_cases += len(cases["client_id"])
+    if engine.dialect.name == "postgresql":
+        # Explicit ids do not advance the sequence of later inserts
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                "SELECT setval(pg_get_serial_sequence('clients', 'id'), max(id)) "
+                "FROM clients"
+            )
+    return total_cases
+
+
+def write_csv(generator: SyntheticGenerator, directory: str, clients: int) -> int:
+    """
+    Write clients.csv and client_cases.csv (booleans as 0/1) to a directory.
+
+    client_cases.csv refers to case workers by user_id 1..case_workers.
+
+    Returns:
+        int: Number of cases written
+    """
+    os.makedirs(directory, exist_ok=True)
+    client_names = ["id"] + CLIENT_COLUMNS
+    case_names = ["client_id", "user_id"] + CASE_COLUMNS
+    total_cases = 0
+    with (
+        open(os.path.join(directory, "clients.csv"), "w", newline="") as client_file,
+        open(os.path.join(directory, "client_cases.csv"), "w", newline="") as case_file,
+    ):
+        client_writer = csv.writer(client_file)
+        case_writer = csv.writer(case_file)
+        client_writer.writerow(client_names)
+        case_writer.writerow(case_names)
+        for chunk in generator.chunks(clients):
+            cases = dict(chunk["cases"], user_id=chunk["cases"]["worker"] + 1)
+            client_writer.writerows(_rows(chunk["clients"], client_names))
+            case_writer.writerows(_rows(cases, case_names))
+            total_cases += len(cases["client_id"])
+    return total_cases
+
+
+def write_parquet(generator: SyntheticGenerator, directory: str, clients: int) -> int:
+    """Write clients.parquet and client_cases.parquet, like write_csv."""
+    if pyarrow is None:
+        raise RuntimeError("Parquet output needs the pyarrow package")
+    os.makedirs(directory, exist_ok=True)
+    writers: Dict[str, Optional["pyarrow.parquet.ParquetWriter"]] = {
+        "clients": None,
+        "client_cases": None,
+    }
+    total_cases = 0
+    try:
+        for chunk in generator.chunks(clients):
+            cases = dict(chunk["cases"], user_id=chunk["cases"]["worker"] + 1)
+            del cases["worker"]
+            for name, columns in (
+                ("clients", chunk["clients"]),
+                ("client_cases", cases),
+            ):
+                table = pyarrow.table(
+                    {
+                        column: (
+                            values.astype(bool) if column in BOOLEAN_COLUMNS else values
+                        )
+                        for column, values in columns.items()
+                    }
+                )
+                if writers[name] is None:
+                    writers[name] = pyarrow.parquet.ParquetWriter(
+                        os.path.join(directory, f"{name}.parquet"), table.schema
+                    )
+                writers[name].write_table(table)
+            total_cases += len(cases["client_id"])
+    finally:
+        for writer in writers.values():
+            if writer is not None:
+                writer.close()
+    return total_cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--case-workers", type=int, default=50)
+    parser.add_argument("--cases-per-client", type=float, default=1.5)
+    parser.add_argument("--format", choices=["db", "csv", "parquet"], default="db")
+    parser.add_argument(
+        "--output", default="synthetic", help="Directory for csv and parquet"
+    )
+    parser.add_argument(
+        "--database-url", help="Database for --format db (default: DATABASE_URL)"
+    )
+    args = parser.parse_args()
+    if args.format == "parquet" and pyarrow is None:
+        parser.error("--format parquet needs the pyarrow package")
+
+    generator = SyntheticGenerator.from_csv(
+        seed=args.seed,
+        case_workers=args.case_workers,
+        cases_per_client=args.cases_per_client,
+    )
+    started = time.perf_counter()
+    if args.format == "db":
+        from sqlalchemy import create_engine
+
+        from app.database import SQLALCHEMY_DATABASE_URL, prepare_database
+
+        engine = create_engine(args.database_url or SQLALCHEMY_DATABASE_URL)
+        prepare_database(engine)
+        cases = write_database(generator, engine, args.clients)
+        target = engine.url.render_as_string(hide_password=True)
+    elif args.format == "csv":
+        cases = write_csv(generator, args.output, args.clients)
+        target = args.output
+    else:
+        cases = write_parquet(generator, args.output, args.clients)
+        target = args.output
+    elapsed = time.perf_counter() - started
+    print(
+        f"{args.clients} clients and {cases} cases written to {target} in "
+        f"{elapsed:.1f} s ({(args.clients + cases) / elapsed * 60:,.0f} rows/min)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Micro-batching scheduler for model inference.
+
+Concurrent requests that arrive within a short window are coalesced into a
+single vectorized ``predict`` call and the results are fanned back out to the
+awaiting coroutines.
+"""
+
+import asyncio
+import inspect
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from app.core.metrics import Family, Histogram, registry
+
+# Defaults, overridable through the environment
+BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "2"))
+MAX_BATCH_ROWS = int(os.getenv("INFERENCE_MAX_BATCH_ROWS", "1024"))
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+QUEUE_WAIT_BUCKETS = [0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25]
+
+# Every batcher registers itself here so stats can be reported in one place
+BATCHERS: Dict[str, "MicroBatcher"] = {}
+
+
+@dataclass
+class _PendingRequest:
+    rows: np.ndarray
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class MicroBatcher:
+    """Coalesce concurrent prediction requests into vectorized batches."""
+
+    def __init__(
+        self,
+        name: str,
+        predict_fn: Callable[[np.ndarray], Any],
+        window_ms: float = BATCH_WINDOW_MS,
+        max_batch_rows: int = MAX_BATCH_ROWS,
+    ):
+        self.name = name
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_rows = max_batch_rows
+        self.batch_size_histogram = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_histogram = Histogram(QUEUE_WAIT_BUCKETS)
+        self._pending: List[_PendingRequest] = []
+        self._pending_rows = 0
+        self._timer = None
+        self._loop = None
+        self._tasks = set()
+        BATCHERS[name] = self
+
+    async def submit(self, rows) -> np.ndarray:
+        """
+        Queue rows for prediction and wait for the batched result.
+
+        Args:
+            rows: A single feature row or a 2D block of rows
+
+        Returns:
+            np.array: Predictions for the submitted rows, in order
+        """
+        rows = np.asarray(rows, dtype=float)
+        if rows.ndim == 1:
+            rows = rows.reshape(1, -1)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A new event loop (e.g. a fresh test client) starts a fresh queue
+            self._reset(loop)
+
+        future = loop.create_future()
+        self._pending.append(_PendingRequest(rows, future, time.perf_counter()))
+        self._pending_rows += len(rows)
+
+        if self._pending_rows >= self.max_batch_rows or self.window <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch-size and queue-wait histograms."""
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch_rows": self.max_batch_rows,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "queue_wait_seconds": self.queue_wait_histogram.snapshot(),
+        }
+
+    def _reset(self, loop) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._pending = []
+        self._pending_rows = 0
+        self._timer = None
+        self._loop = loop
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_rows = self._pending, [], 0
+        task = self._loop.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[_PendingRequest]) -> None:
+        started = time.perf_counter()
+        for request in batch:
+            self.queue_wait_histogram.observe(started - request.enqueued_at)
+        rows = np.vstack([request.rows for request in batch])
+        self.batch_size_histogram.observe(len(rows))
+
+        try:
+            predictions = self.predict_fn(rows)
+            if inspect.isawaitable(predictions):
+                predictions = await predictions
+            predictions = np.asarray(predictions)
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        offsets = np.cumsum([len(request.rows) for request in batch])[:-1]
+        for request, result in zip(batch, np.split(predictions, offsets)):
+            if not request.future.done():
+                request.future.set_result(result)
+
+
+def batcher_stats() -> Dict[str, Any]:
+    """Return stats for every registered batcher."""
+    return {name: batcher.stats() for name, batcher in BATCHERS.items()}
+
+
+def _batcher_metrics() -> List[Family]:
+    sizes = Family(
+        "inference_batch_rows",
+        "Rows per coalesced predict call, by batcher",
+        "histogram",
+        ("batcher",),
+    )
+    waits = Family(
+        "inference_queue_wait_seconds",
+        "Time requests waited for their batch to start, by batcher",
+        "histogram",
+        ("batcher",),
+    )
+    for name, batcher in BATCHERS.items():
+        sizes.set_child((name,), batcher.batch_size_histogram)
+        waits.set_child((name,), batcher.queue_wait_histogram)
+    return [sizes, waits]
+
+
+registry.register_collector(_batcher_metrics)
@@ -0,0 +1,211 @@
+"""
+Negotiated response compression (zstd when available, otherwise gzip).
+
+Unlike Starlette's GZipMiddleware this also offers zstd, and it compresses
+streamed bodies chunk by chunk with a sync flush after each one, so
+incrementally streamed JSON keeps reaching the client as it is produced.
+Bodies smaller than the threshold are sent unchanged.
+"""
+
+import os
+import zlib
+from typing import List, Optional, Tuple
+
+from app.core.etag import coded_etag
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+
+
+def supported_encodings() -> List[str]:
+    """List the encodings this server can produce, in order of preference."""
+    return (["zstd"] if zstandard is not None else []) + ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred supported encoding allowed by an Accept-Encoding header."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in supported_encodings():
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _is_compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    content_type = ""
+    for name, value in headers:
+        if name.lower() == b"content-encoding":
+            return False
+        if name.lower() == b"content-type":
+            content_type = value.decode("latin-1").split(";")[0].strip().lower()
+    if content_type == "text/event-stream":
+        # Events must reach the client one by one, not wait for a full buffer
+        return False
+    return (
+        content_type.startswith("text/")
+        or content_type in COMPRESSIBLE_TYPES
+        or content_type.endswith("+json")
+    )
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._sync = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._sync = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data: bytes, more: bool) -> bytes:
+        compressed = self._compressor.compress(data)
+        if more:
+            # Emit everything so far, so streamed responses are not held back
+            return compressed + self._compressor.flush(self._sync)
+        return compressed + self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing text-like responses of at least minimum_size."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = negotiate_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(
+            scope, receive, _CompressingSender(send, encoding, self.minimum_size)
+        )
+
+
+class _CompressingSender:
+    """The send callable of one response, compressing its body."""
+
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.buffer = b""
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message) -> None:
+        if message["type"] == "http.response.start":
+            await self._start(message)
+        elif message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+        elif self.compressor is not None:
+            await self._send_compressed(message)
+        else:
+            await self._buffer(message)
+
+    async def _start(self, message) -> None:
+        # Held back until the body shows whether it is worth compressing
+        self.start_message = message
+        status = message["status"]
+        self.passthrough = (
+            status < 200
+            or status in (204, 304)
+            or not _is_compressible(message["headers"])
+        )
+        if self.passthrough:
+            await self.send(message)
+
+    async def _buffer(self, message) -> None:
+        self.buffer += message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if len(self.buffer) >= self.minimum_size:
+            self.compressor = _Compressor(self.encoding)
+            body, self.buffer = self.buffer, b""
+            await self._send_compressed({"body": body, "more_body": more_body})
+        elif not more_body:
+            # Complete and small: not worth compressing
+            headers = _with_vary(self.start_message["headers"])
+            self.start_message["headers"] = headers
+            await self.send(self.start_message)
+            await self.send({"type": "http.response.body", "body": self.buffer})
+
+    async def _send_compressed(self, message) -> None:
+        more_body = message.get("more_body", False)
+        compressed = self.compressor.compress(message.get("body", b""), more_body)
+        if self.start_message is not None:
+            self.start_message["headers"] = _compressed_headers(
+                self.start_message["headers"],
+                self.encoding,
+                None if more_body else len(compressed),
+            )
+            await self.send(self.start_message)
+            self.start_message = None
+        await self.send(
+            {"type": "http.response.body", "body": compressed, "more_body": more_body}
+        )
+
+
+def _with_vary(headers):
+    return [(n, v) for n, v in headers if n.lower() != b"vary"] + [
+        (b"vary", _vary_value(headers))
+    ]
+
+
+def _vary_value(headers) -> bytes:
+    values = [v for n, v in headers if n.lower() == b"vary"]
+    if any(b"accept-encoding" in v.lower() for v in values):
+        return b", ".join(values)
+    return b", ".join(values + [b"Accept-Encoding"])
+
+
+def _compressed_headers(headers, encoding: str, length: Optional[int]):
+    updated = []
+    for name, value in headers:
+        lowered = name.lower()
+        if lowered in (b"content-length", b"vary"):
+            continue
+        if lowered == b"etag":
+            # The compressed bytes differ, so they get their own strong tag
+            value = coded_etag(value.decode("latin-1"), encoding).encode("latin-1")
+        updated.append((name, value))
+    updated.append((b"content-encoding", encoding.encode()))
+    updated.append((b"vary", _vary_value(headers)))
+    if length is not None:
+        updated.append((b"content-length", str(length).encode()))
+    return updated
@@ -0,0 +1,169 @@
+"""
+Inference executor that keeps CPU-bound model predictions off the event loop.
+
+Predictions run inline, in a thread pool or in a process pool whose workers
+preload every registered model. Models may be registered as loaders, called
+when first needed. Callers get a 503 once too many batches are pending.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException, status
+
+from app.core.metrics import CallbackGauge, registry
+from app.core.tracing import start_span
+
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "64"))
+
+EXECUTOR_KINDS = ("inline", "thread", "process")
+
+INFERENCE_DURATION = registry.histogram(
+    "inference_duration_seconds",
+    "Time to predict a batch, including the wait for a pool worker, by model",
+    labels=("model",),
+)
+INFERENCE_REJECTED = registry.counter(
+    "inference_rejected_total", "Predictions rejected because the queue was full"
+)
+INFERENCE_PENDING = registry.gauge(
+    "inference_pending", "Predictions queued or running in the inference executor"
+)
+
+# Models preloaded in a process-pool worker
+_WORKER_MODELS: Dict[str, Any] = {}
+
+
+def _init_worker(models: Dict[str, Any]) -> None:
+    _WORKER_MODELS.update(models)
+
+
+def _predict_in_worker(model_name: str, rows):
+    return _WORKER_MODELS[model_name].predict(rows)
+
+
+class InferenceExecutor:
+    """Run model predictions inline, in a thread pool or in a process pool."""
+
+    def __init__(
+        self,
+        kind: str = INFERENCE_EXECUTOR,
+        workers: int = INFERENCE_WORKERS,
+        max_pending: int = INFERENCE_MAX_PENDING,
+    ):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(
+                f"Unknown inference executor '{kind}', expected one of {EXECUTOR_KINDS}"
+            )
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._pool = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def register_model(self, name: str, model: Any) -> None:
+        """Make a model available to the executor under the given name."""
+        self.register_loader(name, lambda: model)
+
+    def register_loader(self, name: str, loader: Callable[[], Any]) -> None:
+        """Register a model under the given name, loaded by loader() when needed."""
+        self._loaders[name] = loader
+        if self.kind == "process" and self._pool is not None:
+            # Workers only see the models they were started with, so later
+            # predictions get a new pool; the old one finishes its queue
+            with self._lock:
+                pool, self._pool = self._pool, None
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+    @property
+    def pending(self) -> int:
+        """Number of predictions queued or running."""
+        return self._pending
+
+    async def run(self, model_name: str, rows):
+        """
+        Predict with a registered model without blocking the event loop.
+
+        Args:
+            model_name (str): Name the model was registered under
+            rows: 2D block of feature rows
+
+        Returns:
+            np.array: Model predictions
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                INFERENCE_REJECTED.labels().inc()
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Inference queue is full, retry later",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        started = time.perf_counter()
+        # Covers the wait for a pool worker and the prediction itself
+        span = start_span("inference.predict", model=model_name, rows=len(rows))
+        try:
+            with span or nullcontext():
+                if self.kind == "inline":
+                    predictions = self._predict(model_name, rows)
+                elif self.kind == "thread":
+                    # The worker thread also waits for a model that is still loading
+                    predictions = await asyncio.get_running_loop().run_in_executor(
+                        self._get_pool(), self._predict, model_name, rows
+                    )
+                else:
+                    predictions = await asyncio.get_running_loop().run_in_executor(
+                        self._get_pool(), _predict_in_worker, model_name, rows
+                    )
+            INFERENCE_DURATION.labels(model_name).observe(time.perf_counter() - started)
+            return predictions
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pool; it is recreated on the next prediction."""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _predict(self, model_name: str, rows):
+        return self._loaders[model_name]().predict(rows)
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.kind == "thread":
+                        self._pool = ThreadPoolExecutor(
+                            max_workers=self.workers,
+                            thread_name_prefix="inference",
+                        )
+                    else:
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            initializer=_init_worker,
+                            initargs=(
+                                {
+                                    name: loader()
+                                    for name, loader in self._loaders.items()
+                                },
+                            ),
+                        )
+        return self._pool
+
+
+# Shared by the /ml and /clients routers
+inference_executor = InferenceExecutor()
+INFERENCE_PENDING.set_child((), CallbackGauge(lambda: inference_executor.pending))
@@ -0,0 +1,46 @@
+"""
+Direct JSON encoding for read paths that bypass ORM entities and Pydantic.
+
+Rows selected as Core tuples are zipped with their field names and encoded
+in one pass. orjson is used when installed; otherwise the standard library
+encoder is configured to produce the same bytes as FastAPI's JSONResponse.
+"""
+
+import json
+from typing import Any, Iterable, Iterator, List, Sequence
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode compactly, with non-ASCII characters left unescaped."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def rows_to_dicts(rows: Iterable[Sequence[Any]], fields: Sequence[str]) -> List[dict]:
+    """Turn row tuples into dicts keyed by field name, in field order."""
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def iter_json_array(
+    chunks: Iterable[Sequence[Sequence[Any]]], fields: Sequence[str]
+) -> Iterator[bytes]:
+    """
+    Encode chunks of row tuples as one JSON array, a chunk at a time.
+
+    The concatenated output is byte-identical to dumps() of all the rows.
+    """
+    yield b"["
+    separator = b""
+    for chunk in chunks:
+        if chunk:
+            yield separator + dumps(rows_to_dicts(chunk, fields))[1:-1]
+            separator = b","
+    yield b"]"
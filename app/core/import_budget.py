@@ -0,0 +1,130 @@
+"""
+Import-time budget of the app.
+
+Imports a module in a fresh interpreter under `python -X importtime` and
+checks the cumulative import time and the number of modules it pulled in
+against a budget, and that none of the packages deferred to first use
+(see app.core.lazy) was imported. Fails with exit status 1 when over budget.
+
+Usage:
+    python -m app.core.import_budget --module app.main --max-seconds 2.5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Sequence
+
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "2.5"))
+IMPORT_BUDGET_MODULES = int(os.getenv("IMPORT_BUDGET_MODULES", "900"))
+# Imported when a model is trained or loaded, never by importing the app
+DEFERRED_PACKAGES = ("sklearn", "scipy", "pandas")
+
+IMPORTTIME_PREFIX = "import time:"
+
+
+def parse_importtime(output: str, module: str) -> Dict[str, Any]:
+    """
+    Extract what importing module cost from `-X importtime` output.
+
+    Modules are reported after everything they import, indented one level
+    per nesting, so module's dependencies are the nested lines right
+    before its own top-level line.
+
+    Args:
+        output (str): stderr of the interpreter
+        module (str): Module whose import is measured
+
+    Returns:
+        dict: seconds (cumulative import time), modules (names imported,
+            module included) and slowest (ten (name, self seconds) pairs)
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+        self_us, cumulative_us, name = line[len(IMPORTTIME_PREFIX) :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # Header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+
+    for index in range(len(entries) - 1, -1, -1):
+        name, depth, _, cumulative_us = entries[index]
+        if name == module and depth == 0:
+            break
+    else:
+        raise ValueError(f"No import of {module} found in the output")
+    start = index
+    while start > 0 and entries[start - 1][1] > 0:
+        start -= 1
+    imported = entries[start : index + 1]
+    slowest = sorted(imported, key=lambda entry: entry[2], reverse=True)[:10]
+    return {
+        "seconds": cumulative_us / 1e6,
+        "modules": [entry[0] for entry in imported],
+        "slowest": [(entry[0], entry[2] / 1e6) for entry in slowest],
+    }
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """Import module in a fresh interpreter and parse what it cost."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr, module)
+
+
+def check_budget(
+    report: Dict[str, Any],
+    max_seconds: float = IMPORT_BUDGET_SECONDS,
+    max_modules: int = IMPORT_BUDGET_MODULES,
+    deferred: Sequence[str] = DEFERRED_PACKAGES,
+) -> List[str]:
+    """
+    Compare a report from measure_import() with the budget.
+
+    Returns:
+        list: One message per exceeded limit; empty when within budget
+    """
+    problems = []
+    if report["seconds"] > max_seconds:
+        problems.append(
+            f"import took {report['seconds']:.2f}s, budget is {max_seconds:.2f}s"
+        )
+    if len(report["modules"]) > max_modules:
+        problems.append(
+            f"{len(report['modules'])} modules imported, budget is {max_modules}"
+        )
+    for package in deferred:
+        if any(name.split(".")[0] == package for name in report["modules"]):
+            problems.append(f"{package} is imported eagerly")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--max-seconds", type=float, default=IMPORT_BUDGET_SECONDS)
+    parser.add_argument("--max-modules", type=int, default=IMPORT_BUDGET_MODULES)
+    args = parser.parse_args()
+
+    report = measure_import(args.module)
+    print(
+        f"import {args.module}: {report['seconds']:.3f}s, "
+        f"{len(report['modules'])} modules"
+    )
+    for name, seconds in report["slowest"]:
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+    problems = check_budget(report, args.max_seconds, args.max_modules)
+    for problem in problems:
+        print(f"over budget: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
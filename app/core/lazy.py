@@ -0,0 +1,66 @@
+"""
+Deferred imports of heavy third-party modules.
+
+scikit-learn (with SciPy) takes seconds to import and pandas a large
+fraction of one, yet most processes that import the app (CLI tools, tests,
+restarted workers) never train a model. lazy_module() returns a stand-in
+that imports the real module on first attribute access, so a module can
+keep its imports at the top while paying for them only when used:
+
+    linear_model = lazy_module("sklearn.linear_model")
+    ...
+    model = linear_model.LogisticRegression()  # sklearn is imported here
+"""
+
+import importlib
+import sys
+import threading
+from types import ModuleType
+
+_import_lock = threading.Lock()
+
+
+class LazyModule(ModuleType):
+    """Module stand-in that imports the named module when first used."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attribute: str):
+        # Only called for attributes not found on the stand-in itself
+        value = getattr(self._load(), attribute)
+        setattr(self, attribute, value)
+        return value
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_module(name: str) -> ModuleType:
+    """
+    Get a module that is imported on first attribute access.
+
+    Args:
+        name (str): Absolute module name, e.g. "sklearn.ensemble"
+
+    Returns:
+        The module itself if it is already imported, otherwise a LazyModule
+    """
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def is_loaded(module: ModuleType) -> bool:
+    """Whether a module from lazy_module() has been imported yet."""
+    return not isinstance(module, LazyModule) or module._module is not None
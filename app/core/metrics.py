@@ -0,0 +1,323 @@
+"""
+Lightweight in-process metrics primitives.
+
+Counters, gauges and histograms are safe to update from any thread. Metrics
+with labels are families holding one child per combination of label values.
+Modules declare their metrics on the shared registry, which renders them in
+the Prometheus text exposition format for GET /metrics. Values that already
+live elsewhere (e.g. the batcher histograms) are exported by collectors,
+called at scrape time. Snapshots of several registries, e.g. of the worker
+processes of one server, can be merged and rendered together (see
+app.core.multiprocess_metrics).
+"""
+
+import bisect
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Prometheus defaults, for latencies in seconds
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Add amount (default 1)."""
+        with self._lock:
+            self._value += amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self._value = 0.0
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class CallbackGauge:
+    """Gauge whose value is read from a callback at scrape time."""
+
+    def __init__(self, callback: Callable[[], float]):
+        self.callback = callback
+
+    @property
+    def value(self) -> float:
+        return self.callback()
+
+
+class Histogram:
+    """Cumulative bucketed histogram, safe to observe from any thread."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record a single observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return cumulative bucket counts keyed by upper bound."""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+        return {"buckets": buckets, "count": count, "sum": total}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._sum = 0.0
+            self._count = 0
+
+
+class Family:
+    """A named metric with one child per combination of label values."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        label_names: Sequence[str] = (),
+        factory: Callable[[], Any] = Counter,
+    ):
+        """
+        Args:
+            name (str): Metric name, e.g. http_requests_total
+            documentation (str): One-line description for # HELP
+            kind (str): "counter", "gauge" or "histogram"
+            label_names: Names of the labels, in the order labels() takes them
+            factory: Callable creating a child (Counter, Gauge or Histogram)
+        """
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> Any:
+        """Get the child for these label values, creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels {self.label_names}")
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def set_child(self, values: Tuple[Any, ...], child: Any) -> None:
+        """Use an existing Counter, Gauge or Histogram as a child."""
+        self._children[tuple(values)] = child
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the current values, in a form that can be stored as JSON.
+
+        Returns:
+            dict: documentation, kind, label_names and samples, a list of
+                [label values, value] with histogram values as snapshot()
+        """
+        return {
+            "documentation": self.documentation,
+            "kind": self.kind,
+            "label_names": list(self.label_names),
+            "samples": [
+                [
+                    [str(value) for value in values],
+                    child.snapshot() if self.kind == "histogram" else child.value,
+                ]
+                for values, child in list(self._children.items())
+            ],
+        }
+
+    def reset(self) -> None:
+        """Zero the counters and histograms; gauges keep their values."""
+        for child in list(self._children.values()):
+            if isinstance(child, (Counter, Histogram)):
+                child.reset()
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: List[str]) -> str:
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_snapshot(families: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Render family snapshots in the Prometheus text exposition format (0.0.4).
+
+    Args:
+        families: Family.snapshot() by metric name, in rendering order
+    """
+    lines: List[str] = []
+    for name, family in families.items():
+        lines.append(f"# HELP {name} {family['documentation']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        for values, value in family["samples"]:
+            pairs = [
+                f'{label}="{_escape(label_value)}"'
+                for label, label_value in zip(family["label_names"], values)
+            ]
+            if family["kind"] != "histogram":
+                lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                continue
+            for bound, count in value["buckets"].items():
+                bucket_pairs = pairs + [f'le="{bound}"']
+                lines.append(f"{name}_bucket{_labels(bucket_pairs)} {count}")
+            lines.append(f"{name}_sum{_labels(pairs)} {_number(value['sum'])}")
+            lines.append(f"{name}_count{_labels(pairs)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def merge_snapshots(
+    snapshots: Iterable[Dict[str, Dict[str, Any]]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Add up registry snapshots sample by sample.
+
+    Counter and gauge values are summed, histogram buckets, sums and counts
+    too. Families and samples keep the order in which they first appear.
+
+    Args:
+        snapshots: Registry.snapshot() results
+
+    Returns:
+        dict: One merged snapshot
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            target = merged.setdefault(name, {**family, "samples": {}})
+            for values, value in family["samples"]:
+                key = tuple(values)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = (
+                        {**value, "buckets": dict(value["buckets"])}
+                        if family["kind"] == "histogram"
+                        else value
+                    )
+                elif family["kind"] == "histogram":
+                    for bound, count in value["buckets"].items():
+                        current["buckets"][bound] = (
+                            current["buckets"].get(bound, 0) + count
+                        )
+                    current["sum"] += value["sum"]
+                    current["count"] += value["count"]
+                else:
+                    target["samples"][key] = current + value
+    for family in merged.values():
+        family["samples"] = [
+            [list(key), value] for key, value in family["samples"].items()
+        ]
+    return merged
+
+
+class Registry:
+    """The metrics rendered by GET /metrics."""
+
+    def __init__(self):
+        self._families: Dict[str, Family] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def _register(self, family: Family) -> Family:
+        if family.name in self._families:
+            raise ValueError(f"Metric '{family.name}' is already registered")
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, documentation: str, labels=()) -> Family:
+        """Register a counter family."""
+        return self._register(Family(name, documentation, "counter", labels, Counter))
+
+    def gauge(self, name: str, documentation: str, labels=()) -> Family:
+        """Register a gauge family."""
+        return self._register(Family(name, documentation, "gauge", labels, Gauge))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        labels=(),
+    ) -> Family:
+        """Register a histogram family with the given bucket upper bounds."""
+        return self._register(
+            Family(name, documentation, "histogram", labels, lambda: Histogram(buckets))
+        )
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Add a callable returning families built at scrape time."""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Family snapshots by name, collectors' families included."""
+        families = {name: family.snapshot() for name, family in self._families.items()}
+        for collector in self._collectors:
+            for family in collector():
+                families[family.name] = family.snapshot()
+        return families
+
+    def reset(self) -> None:
+        """Zero the registered counters and histograms."""
+        for family in self._families.values():
+            family.reset()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        return render_snapshot(self.snapshot())
+
+
+# Shared by every module that records metrics
+registry = Registry()
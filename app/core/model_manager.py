@@ -1,9 +1,22 @@
+import os
+
 from app.models.ml_models import (
     DecisionTreeModel,
     LogisticRegressionModel,
     RandomForestModel,
     load_data,
 )
+from app.models.training import save_report, train_models
+
+DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "logistic_regression")
+MODEL_REPORT_PATH = os.getenv("MODEL_REPORT_PATH")
+
+# Models trained by every ModelManager, by name
+CANDIDATE_MODELS = {
+    "logistic_regression": LogisticRegressionModel,
+    "decision_tree": DecisionTreeModel,
+    "random_forest": RandomForestModel,
+}
 
 
 class ModelManager:
@@ -13,18 +26,20 @@ class ModelManager:
         if self.x_train is None or self.y_train is None:
             raise RuntimeError("Failed to load training data.")
 
-        self.available_models = {
-            "logistic_regression": LogisticRegressionModel(),
-            "decision_tree": DecisionTreeModel(),
-            "random_forest": RandomForestModel(),
-        }
+        candidates = {name: model() for name, model in CANDIDATE_MODELS.items()}
 
-        # Train the models
-        for model in self.available_models.values():
-            model.fit(self.x_train, self.y_train)
+        # Train the models in parallel and evaluate them on the held-out split
+        self.available_models, self.evaluation_report = train_models(
+            candidates, self.x_train, self.y_train, self.x_test, self.y_test
+        )
+        if MODEL_REPORT_PATH:
+            save_report(self.evaluation_report, MODEL_REPORT_PATH)
 
         # Default model
-        self.current_model = self.available_models["logistic_regression"]
+        self.current_model_name = (
+            DEFAULT_MODEL if DEFAULT_MODEL in candidates else "logistic_regression"
+        )
+        self.current_model = self.available_models[self.current_model_name]
 
     def switch_model(self, model_name: str):
         """Switch the active model."""
@@ -34,6 +49,7 @@ class ModelManager:
                 "message": f"Model '{model_name}' is not available.",
             }, 400  # Return error with status code
 
+        self.current_model_name = model_name
         self.current_model = self.available_models[model_name]
         return {
             "status": "success",
@@ -44,6 +60,10 @@ class ModelManager:
         """Get the current active model."""
         return {"current_model": self.current_model.__class__.__name__}
 
+    def get_evaluation_report(self):
+        """Get accuracy and inference latency measured for every model."""
+        return self.evaluation_report
+
     def get_available_models(self):
         """Get a list of available models."""
         return list(self.available_models.keys())
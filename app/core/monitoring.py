@@ -0,0 +1,138 @@
+"""
+Request and database metrics for GET /metrics.
+
+MetricsMiddleware times every HTTP request by route template (e.g.
+/clients/{client_id}, so ids do not explode the number of series) and
+tracks requests in flight. instrument_engine() times SQL statements through
+app.core.statement_timing and counts compiled statement cache hits. Other
+metrics are declared by the modules that record them.
+"""
+
+import os
+import time
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import CallbackGauge, registry
+from app.core.statement_timing import listen_statements
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+DB_LATENCY_BUCKETS = [
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+]
+SQL_OPERATIONS = {"select", "insert", "update", "delete", "pragma", "with"}
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total",
+    "HTTP requests by method, route and status code",
+    ("method", "route", "status"),
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "Time until the response was fully sent, by method and route",
+    labels=("method", "route"),
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests being served", ("method",)
+)
+DB_STATEMENTS = registry.counter(
+    "db_statements_total", "SQL statements executed", ("operation",)
+)
+DB_LATENCY = registry.histogram(
+    "db_statement_duration_seconds",
+    "SQL statement execution time",
+    DB_LATENCY_BUCKETS,
+    ("operation",),
+)
+DB_ERRORS = registry.counter("db_errors_total", "SQL statements that raised")
+DB_POOL_CHECKED_OUT = registry.gauge(
+    "db_pool_checked_out_connections",
+    "Connections checked out of the pool, by database",
+    ("database",),
+)
+DB_STATEMENT_CACHE = registry.counter(
+    "db_statement_cache_total",
+    "Lookups in SQLAlchemy's compiled statement cache by result (hit, miss, ...)",
+    ("result",),
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight requests."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.labels(method, path, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, path).observe(elapsed)
+
+
+def _operation(statement: str) -> str:
+    operation = statement.lstrip()[:6].lower()
+    return operation if operation in SQL_OPERATIONS else "other"
+
+
+def _record_statement(conn, statement, parameters, context, executemany, seconds):
+    operation = _operation(statement)
+    DB_STATEMENTS.labels(operation).inc()
+    DB_LATENCY.labels(operation).observe(seconds)
+    cache_hit = getattr(context, "cache_hit", None)
+    if cache_hit is not None:
+        # CACHE_HIT -> hit, CACHE_MISS -> miss, NO_CACHE_KEY -> no_cache_key, ...
+        result = getattr(cache_hit, "name", str(cache_hit)).lower()
+        DB_STATEMENT_CACHE.labels(result.removeprefix("cache_")).inc()
+
+
+def _handle_error(exception_context):
+    DB_ERRORS.labels().inc()
+
+
+def instrument_engine(engine) -> None:
+    """Record statement counts, durations and cache hits of an engine."""
+    if event.contains(engine, "handle_error", _handle_error):
+        return
+    listen_statements(engine, _record_statement)
+    event.listen(engine, "handle_error", _handle_error)
+    # Read through the engine: dispose() replaces its pool. Only pools that
+    # keep connections (QueuePool) count them.
+    DB_POOL_CHECKED_OUT.set_child(
+        (engine.url.database or engine.url.drivername,),
+        CallbackGauge(lambda: getattr(engine.pool, "checkedout", int)()),
+    )
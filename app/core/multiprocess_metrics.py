@@ -0,0 +1,158 @@
+"""
+Metrics of every worker process of a pre-fork server in one /metrics page.
+
+Each worker has its own registry, and a scrape reaches only one of them, so
+per-process counters would seem to jump backwards from scrape to scrape and
+reset whenever a worker is recycled. In multiprocess mode every worker
+writes a snapshot of its registry to a directory shared by the server
+(every METRICS_FLUSH_SECONDS, and when it stops); the worker that serves
+GET /metrics writes its own and renders the sum of all of them. The server
+moves the counters and histograms of workers that exit into an archive file,
+so totals never go backwards; gauges are summed over live workers only.
+
+app.server enables the mode when it starts more than one worker. A server
+running a single process (e.g. plain uvicorn) serves its own registry.
+"""
+
+import glob
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.metrics import Registry, merge_snapshots, registry, render_snapshot
+
+# Directory shared by the workers; empty for a single process
+METRICS_MULTIPROCESS_DIR = os.getenv("METRICS_MULTIPROCESS_DIR", "")
+# How often a worker writes its snapshot for the other workers to merge
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+ARCHIVE_FILE = "archive.json"
+# Kinds whose values only grow, and so outlive the worker that recorded them
+CUMULATIVE_KINDS = ("counter", "histogram")
+
+logger = logging.getLogger("app.metrics")
+
+
+def _read(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        # Archived in the meantime
+        return None
+
+
+def _write(path: str, snapshot: Dict[str, Any]) -> None:
+    # Readers never see a half-written file
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as file:
+        json.dump(snapshot, file)
+    os.replace(temporary, path)
+
+
+def _cumulative(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        name: family
+        for name, family in snapshot.items()
+        if family["kind"] in CUMULATIVE_KINDS
+    }
+
+
+class MultiprocessMetrics:
+    """Snapshots of the registries of a server's workers, kept in a directory."""
+
+    def __init__(self, registry: Registry, directory: str = ""):
+        self.registry = registry
+        self.directory = directory
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def enable(self, directory: str) -> None:
+        """
+        Switch to multiprocess mode; called by the server before it forks.
+
+        Snapshots left by an earlier server in the directory are removed. What
+        this process recorded so far becomes the archive, and is zeroed in the
+        workers when they start, so that it is not counted once per worker.
+
+        Args:
+            directory (str): Directory for the snapshots, created if missing
+        """
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.json")):
+            os.remove(path)
+        self.directory = directory
+        _write(
+            os.path.join(directory, ARCHIVE_FILE),
+            _cumulative(self.registry.snapshot()),
+        )
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def write(self) -> None:
+        """Write this process's snapshot."""
+        if self.enabled:
+            _write(self._path(os.getpid()), self.registry.snapshot())
+
+    def start(self) -> None:
+        """Start a worker: zero inherited values and write snapshots regularly."""
+        if not self.enabled or self._flusher is not None:
+            return
+        self.registry.reset()
+        self.write()
+        self._stop.clear()
+        self._flusher = threading.Thread(
+            target=self._flush, name="metrics-flush", daemon=True
+        )
+        self._flusher.start()
+
+    def stop(self) -> None:
+        """Stop flushing and write the final snapshot of this worker."""
+        if self._flusher is None:
+            return
+        self._stop.set()
+        self._flusher.join()
+        self._flusher = None
+        self.write()
+
+    def _flush(self) -> None:
+        while not self._stop.wait(METRICS_FLUSH_SECONDS):
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def archive(self, pid: int) -> None:
+        """Fold an exited worker's counters and histograms into the archive."""
+        if not self.enabled:
+            return
+        snapshot = _read(self._path(pid))
+        if snapshot is None:
+            return
+        archive_path = os.path.join(self.directory, ARCHIVE_FILE)
+        archive = _read(archive_path) or {}
+        _write(archive_path, merge_snapshots([archive, _cumulative(snapshot)]))
+        os.remove(self._path(pid))
+
+    def render(self) -> str:
+        """Render the merged metrics of all workers, or this process's alone."""
+        if not self.enabled:
+            return self.registry.render()
+        self.write()
+        snapshots = []
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.json"))):
+            snapshot = _read(path)
+            if snapshot is not None:
+                snapshots.append(snapshot)
+        return render_snapshot(merge_snapshots(snapshots))
+
+
+# Merges the workers of app.server; inert in a single process
+multiprocess_metrics = MultiprocessMetrics(registry, METRICS_MULTIPROCESS_DIR)
@@ -0,0 +1,231 @@
+"""
+Per-request SQL profiling and N+1 detection.
+
+With SQL_PROFILING=header a request sending `X-SQL-Profile: 1` is profiled;
+with SQL_PROFILING=on every request is. Every SQL statement the request
+issues is recorded with its duration and the application call site that
+issued it. The response carries a summary in `X-SQL-Profile` and
+`Server-Timing` headers, and the full profile is logged to the
+app.sql_profile logger. Statements of the same shape (the SQL text with
+parameters and IN lists collapsed) issued N_PLUS_ONE_THRESHOLD times or more
+are flagged as likely N+1 queries, e.g. a lazy load per row of a result.
+
+capture_statements() records everything executed on an engine, from any
+thread, and backs the sql_budget test fixture.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.statement_timing import listen_statements, remove_statement_listener
+
+# off (default), header (requests sending X-SQL-Profile: 1) or on (every request)
+SQL_PROFILING = os.getenv("SQL_PROFILING", "off").lower()
+# Repetitions of one statement shape within a request flagged as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "3"))
+
+PROFILE_HEADER = "x-sql-profile"
+
+logger = logging.getLogger("app.sql_profile")
+
+# Call sites are reported outside app.core (instrumentation, query helpers)
+CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(CORE_DIR))
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+# The profile of the request being served, if it is profiled
+_current_profile: contextvars.ContextVar[Optional["SQLProfile"]] = (
+    contextvars.ContextVar("sql_profile", default=None)
+)
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalize a statement so executions differing only in values compare equal.
+
+    Args:
+        statement (str): SQL as sent to the driver
+
+    Returns:
+        str: The statement with literals replaced by ? and IN lists collapsed
+    """
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _LITERAL.sub("?", shape)
+    return _PLACEHOLDER_LIST.sub("(?, ...)", shape)
+
+
+def call_site() -> str:
+    """Return the innermost project frame outside app.core, as path:line in func."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(PROJECT_ROOT)
+            and not filename.startswith(CORE_DIR)
+            and "site-packages" not in filename
+        ):
+            path = os.path.relpath(filename, PROJECT_ROOT)
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class SQLProfile:
+    """The SQL statements issued during one request or capture."""
+
+    def __init__(self):
+        self.statements: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def record(self, statement: str, seconds: float, site: str) -> None:
+        with self._lock:
+            self.statements.append(
+                {
+                    "statement": statement,
+                    "shape": statement_shape(statement),
+                    "duration_ms": round(seconds * 1000, 3),
+                    "call_site": site,
+                }
+            )
+
+    @property
+    def duration_ms(self) -> float:
+        return round(sum(entry["duration_ms"] for entry in self.statements), 3)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Dict[str, Any]]:
+        """
+        Statement shapes issued at least threshold times: likely N+1 queries.
+
+        Returns:
+            list: Shape, count and distinct call sites, most repeated first
+        """
+        counts = Counter(entry["shape"] for entry in self.statements)
+        return [
+            {
+                "shape": shape,
+                "count": count,
+                "call_sites": sorted(
+                    {
+                        entry["call_site"]
+                        for entry in self.statements
+                        if entry["shape"] == shape
+                    }
+                ),
+            }
+            for shape, count in counts.most_common()
+            if count >= threshold
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "statements": len(self.statements),
+            "duration_ms": self.duration_ms,
+            "repeated": self.repeated(),
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """Return the summary plus every statement in execution order."""
+        return {**self.summary(), "log": list(self.statements)}
+
+
+def _record_statement(conn, statement, parameters, context, executemany, seconds):
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, seconds, call_site())
+
+
+def attach_profiler(engine) -> None:
+    """Record statements of profiled requests executed on an engine."""
+    listen_statements(engine, _record_statement)
+
+
+@contextmanager
+def capture_statements(engine) -> Iterator[SQLProfile]:
+    """
+    Record every statement executed on an engine, from any thread, in a block.
+
+    Args:
+        engine: Engine to listen on
+
+    Yields:
+        SQLProfile: Filled in as statements run
+    """
+    profile = SQLProfile()
+
+    def record(conn, statement, parameters, context, executemany, seconds):
+        profile.record(statement, seconds, call_site())
+
+    listen_statements(engine, record)
+    try:
+        yield profile
+    finally:
+        remove_statement_listener(engine, record)
+
+
+def _profile_requested(scope: Scope) -> bool:
+    if SQL_PROFILING == "on":
+        return True
+    if SQL_PROFILING != "header":
+        return False
+    return Headers(scope=scope).get(PROFILE_HEADER, "").lower() in ("1", "true")
+
+
+class SQLProfilingMiddleware:
+    """ASGI middleware profiling the SQL of requests that ask for it."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = SQLProfile()
+
+        async def send_with_summary(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Statements issued while a response streams are only logged
+                headers = MutableHeaders(scope=message)
+                repeated = profile.repeated()
+                headers["X-SQL-Profile"] = (
+                    f"statements={len(profile)}; duration_ms={profile.duration_ms}; "
+                    f"repeated={len(repeated)}"
+                )
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={profile.duration_ms};desc="{len(profile)} statements"',
+                )
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_summary)
+        finally:
+            _current_profile.reset(token)
+            report = profile.report()
+            level = logging.WARNING if report["repeated"] else logging.INFO
+            logger.log(
+                level,
+                "%s %s %s",
+                scope["method"],
+                scope["path"],
+                json.dumps(report),
+            )
@@ -2,12 +2,16 @@
 Base repository interfaces for data access layer.
 """
 
-from typing import Any, Generic, List, Optional, TypeVar
+import os
+from typing import Any, Dict, Generic, Iterable, List, Optional, Sequence, TypeVar
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session
 
 T = TypeVar("T")
 
+# Rows fetched per round trip when row tuples are streamed from the cursor
+YIELD_PER_ROWS = int(os.getenv("DB_YIELD_PER_ROWS", "1000"))
+
 
 class IRepository(Generic[T]):
     """Base repository interface defining common data access operations."""
@@ -31,3 +35,52 @@ class IRepository(Generic[T]):
     def delete(self, db: Session, id: int) -> None:
         """Delete an entity."""
         raise NotImplementedError
+
+
+def with_columns(query: Query, model: Any, columns: Optional[Sequence[str]]) -> Query:
+    """
+    Restrict the SELECT list to the given columns.
+
+    The query then returns lightweight rows with those attributes instead of
+    entities, skipping ORM hydration; without columns it is left unchanged.
+    """
+    if not columns:
+        return query
+    return query.with_entities(*(getattr(model, name) for name in columns))
+
+
+def criteria_filters(model: Any, criteria: Dict[str, Any]) -> List[Any]:
+    """
+    Build filter clauses from {field: value} or {field__op: value} criteria.
+
+    Supported operators are ge, le, gt and lt; None values are skipped.
+    """
+    filters = []
+    for field, value in criteria.items():
+        if value is not None:
+            if "__" in field:
+                field_name, operator = field.split("__")
+                model_field = getattr(model, field_name)
+                if operator == "ge":
+                    filters.append(model_field >= value)
+                elif operator == "le":
+                    filters.append(model_field <= value)
+                elif operator == "gt":
+                    filters.append(model_field > value)
+                elif operator == "lt":
+                    filters.append(model_field < value)
+            else:
+                filters.append(getattr(model, field) == value)
+    return filters
+
+
+def fetch(query: Query, columns: Optional[Sequence[str]]) -> Iterable[Any]:
+    """
+    Run a query built with with_columns().
+
+    Entities are returned as a list. Row tuples are fetched lazily in batches
+    of YIELD_PER_ROWS, so callers can encode them without holding all rows.
+    """
+    if not columns:
+        return query.all()
+    return iter(query.yield_per(YIELD_PER_ROWS))
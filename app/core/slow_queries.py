@@ -0,0 +1,243 @@
+"""
+Slow-query log with query plans.
+
+Statements taking SLOW_QUERY_MS or longer are logged to app.slow_query and
+aggregated by shape (the SQL with literals and IN lists collapsed, see
+app.core.profiling), so the many statements built by dynamic filters group
+into the few shapes that matter. Parameter values are never kept: only their
+types. The first time a shape is slow its query plan (EXPLAIN QUERY PLAN on
+SQLite, EXPLAIN on PostgreSQL) and the tables it scans in full are captured
+by a background thread on a connection of its own, so the request that ran
+the statement does not wait for it. GET /admin/slow-queries reports the top
+offenders.
+"""
+
+import logging
+import os
+import queue
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.core.profiling import call_site, statement_shape
+from app.core.statement_timing import listen_statements, remove_statement_listener
+
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "true").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Distinct shapes kept; the one with the least total time makes room for a new one
+SLOW_QUERY_MAX_SHAPES = int(os.getenv("SLOW_QUERY_MAX_SHAPES", "200"))
+# Plans waiting to be captured; shapes beyond it are kept without a plan
+SLOW_QUERY_EXPLAIN_QUEUE = int(os.getenv("SLOW_QUERY_EXPLAIN_QUEUE", "20"))
+# Limit on planning one statement (PostgreSQL statement_timeout)
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "1000"))
+
+EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+EXPLAINABLE = ("select", "with", "update", "delete")
+
+# SQLite: "SCAN clients" (no index); PostgreSQL: "Seq Scan on clients"
+_FULL_SCAN = re.compile(r"^SCAN (\w+)$|Seq Scan on (\w+)")
+
+logger = logging.getLogger("app.slow_query")
+
+
+def redact(parameters: Any, executemany: bool) -> Any:
+    """Replace parameter values by their type names."""
+    if executemany:
+        return f"{len(parameters)} parameter sets"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Tables a query plan reads in full rather than through an index."""
+    tables = []
+    for line in plan:
+        match = _FULL_SCAN.search(line.strip())
+        if match:
+            tables.append(match.group(1) or match.group(2))
+    return sorted(set(tables))
+
+
+def explain(engine, statement: str, parameters: Any) -> Optional[List[str]]:
+    """
+    Return the query plan of a statement, or None when the database cannot tell.
+
+    Runs on a raw pooled DBAPI connection, so it is not itself timed or logged.
+
+    Args:
+        engine: Engine the statement ran on
+        statement (str): SQL as sent to the driver
+        parameters: Parameters it ran with (one set)
+    """
+    dialect = engine.dialect.name
+    prefix = EXPLAIN_PREFIXES.get(dialect)
+    if prefix is None or not statement.lstrip().lower().startswith(EXPLAINABLE):
+        return None
+    try:
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            if dialect == "postgresql":
+                # Undone by the rollback when the connection returns to the pool
+                cursor.execute(
+                    "SET LOCAL statement_timeout = %d" % SLOW_QUERY_EXPLAIN_TIMEOUT_MS
+                )
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+            cursor.close()
+        finally:
+            connection.close()
+    except Exception as e:
+        logger.debug(f"Could not explain statement: {e}")
+        return None
+    # SQLite rows are (id, parent, notused, detail); PostgreSQL rows one line
+    return [str(row[-1]) for row in rows]
+
+
+class SlowQueryLog:
+    """Slow statements of one process, aggregated by shape."""
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_MS,
+        max_shapes: int = SLOW_QUERY_MAX_SHAPES,
+    ):
+        self.threshold_ms = threshold_ms
+        self.max_shapes = max_shapes
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._plans: queue.Queue = queue.Queue(SLOW_QUERY_EXPLAIN_QUEUE)
+        self._explainer: Optional[threading.Thread] = None
+
+    def attach(self, engine) -> None:
+        """Time the statements executed on an engine."""
+        listen_statements(engine, self._statement)
+
+    def detach(self, engine) -> None:
+        """Stop timing the statements of an engine."""
+        remove_statement_listener(engine, self._statement)
+
+    def _statement(self, conn, statement, parameters, context, executemany, seconds):
+        elapsed_ms = seconds * 1000
+        if elapsed_ms >= self.threshold_ms:
+            self.record(conn.engine, statement, parameters, executemany, elapsed_ms)
+
+    def _explain_queued(self) -> None:
+        while True:
+            engine, shape, statement, parameters = self._plans.get()
+            try:
+                plan = explain(engine, statement, parameters)
+                with self._lock:
+                    entry = self._entries.get(shape)
+                    if entry is not None:
+                        entry["plan"] = plan
+                        entry["full_scans"] = full_scans(plan or [])
+            finally:
+                self._plans.task_done()
+
+    def _queue_plan(self, engine, shape: str, statement: str, parameters) -> None:
+        with self._lock:
+            if self._explainer is None:
+                self._explainer = threading.Thread(
+                    target=self._explain_queued, name="slow-query-explain", daemon=True
+                )
+                self._explainer.start()
+        try:
+            self._plans.put_nowait((engine, shape, statement, parameters))
+        except queue.Full:
+            logger.debug(f"Explain queue full, no plan for: {shape}")
+
+    def wait_for_plans(self) -> None:
+        """Block until the plans queued so far are captured."""
+        self._plans.join()
+
+    def record(
+        self,
+        engine,
+        statement: str,
+        parameters: Any,
+        executemany: bool,
+        elapsed_ms: float,
+    ) -> None:
+        """Add one slow execution, queueing the plan capture of a new shape."""
+        shape = statement_shape(statement)
+        redacted = redact(parameters, executemany)
+        site = call_site()
+        logger.warning(
+            f"Slow query ({elapsed_ms:.1f} ms) at {site}: {shape} "
+            f"parameters={redacted}"
+        )
+        with self._lock:
+            entry = self._entries.get(shape)
+        if entry is None:
+            entry = {
+                "shape": shape,
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "first_seen": datetime.now(timezone.utc).isoformat(),
+                # Filled in by the explain thread
+                "plan": None,
+                "full_scans": [],
+            }
+            with self._lock:
+                new = shape not in self._entries
+                if new and len(self._entries) >= self.max_shapes:
+                    cheapest = min(
+                        self._entries, key=lambda key: self._entries[key]["total_ms"]
+                    )
+                    del self._entries[cheapest]
+                entry = self._entries.setdefault(shape, entry)
+            if new:
+                self._queue_plan(
+                    engine,
+                    shape,
+                    statement,
+                    parameters[0] if executemany else parameters,
+                )
+        with self._lock:
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["last_seen"] = datetime.now(timezone.utc).isoformat()
+            entry["last_call_site"] = site
+            entry["last_parameters"] = redacted
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> Dict[str, Any]:
+        """
+        Return the worst shapes first.
+
+        Args:
+            limit (int): Number of shapes to return
+            order_by (str): total_ms, count, max_ms or mean_ms
+
+        Returns:
+            dict: Threshold, number of shapes seen and the top entries
+        """
+        with self._lock:
+            entries = [
+                {
+                    **entry,
+                    "total_ms": round(entry["total_ms"], 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                    "mean_ms": round(entry["total_ms"] / entry["count"], 3),
+                }
+                for entry in self._entries.values()
+                if entry["count"]
+            ]
+        entries.sort(key=lambda entry: entry[order_by], reverse=True)
+        return {
+            "threshold_ms": self.threshold_ms,
+            "shapes": len(entries),
+            "queries": entries[:limit],
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Slow statements of the application engine
+slow_query_log = SlowQueryLog()
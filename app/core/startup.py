@@ -0,0 +1,180 @@
+"""
+Start-up resources: things the app needs that are expensive to build.
+
+Each resource is built once, by whichever comes first: the warm-up the
+lifespan starts, or the first request that needs it. Importing the app
+therefore builds nothing. warm_up() builds every registered resource
+concurrently in threads; a resource first builds the resources it depends
+on, so independent ones overlap and dependent ones wait. Build times are
+kept for the /readyz report.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+PENDING, BUILDING, READY, FAILED = "pending", "building", "ready", "failed"
+
+
+class Resource:
+    """A value built on first use by a factory, at most once at a time."""
+
+    def __init__(
+        self,
+        registry: "StartupRegistry",
+        name: str,
+        factory: Callable[[], Any],
+        depends_on: Iterable[str] = (),
+    ):
+        self.registry = registry
+        self.name = name
+        self.factory = factory
+        self.depends_on = tuple(depends_on)
+        self.status = PENDING
+        self.value: Any = None
+        self.error: Optional[str] = None
+        self.started: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == READY
+
+    def get(self) -> Any:
+        """Return the value, building it (and its dependencies) if needed."""
+        if self.status == READY:
+            return self.value
+        for name in self.depends_on:
+            self.registry[name].get()
+        with self._lock:
+            if self.status != READY:
+                self._build()
+        return self.value
+
+    async def aget(self) -> Any:
+        """Like get(), but waits for a build in a thread, off the event loop."""
+        if self.status == READY:
+            return self.value
+        return await asyncio.to_thread(self.get)
+
+    def _build(self) -> None:
+        self.status = BUILDING
+        self.started = time.perf_counter()
+        try:
+            self.value = self.factory()
+        except Exception as exc:
+            # Left to be retried by the next get()
+            self.status = FAILED
+            self.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            self.seconds = time.perf_counter() - self.started
+        self.status = READY
+        self.error = None
+
+
+class StartupRegistry:
+    """Named resources and the warm-up that builds them all."""
+
+    def __init__(self):
+        self.resources: Dict[str, Resource] = {}
+        self.warm_up_started: Optional[float] = None
+        self.warm_up_seconds: Optional[float] = None
+
+    def __getitem__(self, name: str) -> Resource:
+        return self.resources[name]
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        depends_on: Iterable[str] = (),
+    ) -> Resource:
+        """
+        Register a resource; nothing is built until it is needed.
+
+        Args:
+            name (str): Unique resource name, shown in the readiness report
+            factory: Zero-argument callable returning the resource
+            depends_on: Names of resources to build before this one
+
+        Returns:
+            Resource: Handle whose get()/aget() return the built value
+        """
+        if name in self.resources:
+            raise ValueError(f"Resource '{name}' is already registered")
+        resource = Resource(self, name, factory, depends_on)
+        self.resources[name] = resource
+        return resource
+
+    @property
+    def ready(self) -> bool:
+        return all(resource.ready for resource in self.resources.values())
+
+    async def warm_up(self) -> None:
+        """Build every resource, independent ones in parallel threads."""
+        if self.ready:
+            return
+        self.warm_up_started = time.perf_counter()
+        results = await asyncio.gather(
+            *(asyncio.to_thread(resource.get) for resource in self.resources.values()),
+            return_exceptions=True,
+        )
+        self.warm_up_seconds = time.perf_counter() - self.warm_up_started
+        for resource, result in zip(self.resources.values(), results):
+            if isinstance(result, Exception):
+                logging.error(f"Start-up of {resource.name} failed: {resource.error}")
+        logging.info(
+            f"Start-up took {self.warm_up_seconds:.2f}s: "
+            + ", ".join(
+                f"{resource.name} {resource.seconds or 0:.2f}s"
+                for resource in self.resources.values()
+            )
+        )
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Describe the state of every resource.
+
+        Returns:
+            dict: Overall status ("ready", "starting" or "failed"), the
+                warm-up's wall time, and per resource its status, when its
+                build started relative to the warm-up and how long it took
+        """
+        statuses = {resource.status for resource in self.resources.values()}
+        if statuses <= {READY}:
+            overall = READY
+        elif FAILED in statuses:
+            overall = FAILED
+        else:
+            overall = "starting"
+        origin = self.warm_up_started
+        return {
+            "status": overall,
+            "warm_up_seconds": _rounded(self.warm_up_seconds),
+            "resources": {
+                resource.name: {
+                    "status": resource.status,
+                    "depends_on": list(resource.depends_on),
+                    "started_at": (
+                        _rounded(resource.started - origin)
+                        if origin is not None and resource.started is not None
+                        else None
+                    ),
+                    "seconds": _rounded(resource.seconds),
+                    "error": resource.error,
+                }
+                for resource in self.resources.values()
+            },
+        }
+
+
+def _rounded(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds, 4)
+
+
+# Resources are registered by the modules that own them
+startup_registry = StartupRegistry()
@@ -0,0 +1,78 @@
+"""
+One timer for the SQL statements of an engine, shared by its consumers.
+
+Metrics (app.core.monitoring), the request profiler (app.core.profiling) and
+the slow-query log (app.core.slow_queries) all need the duration of every
+statement. Instead of each keeping its own timer stack on the connection,
+listen_statements() registers them with a single pair of engine hooks that
+time each statement once and pass the duration to every listener.
+"""
+
+import threading
+import time
+import weakref
+from typing import Any, Callable, List
+
+from sqlalchemy import event
+
+# Connection.info key of the start times of the statements in progress
+STARTED_KEY = "statement_started"
+
+# listener(conn, statement, parameters, context, executemany, seconds)
+StatementListener = Callable[[Any, str, Any, Any, bool, float], None]
+
+
+class StatementTimer:
+    """Times the statements of one engine and notifies its listeners."""
+
+    def __init__(self):
+        self.listeners: List[StatementListener] = []
+
+    def before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(STARTED_KEY, []).append(time.perf_counter())
+
+    def after(self, conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info[STARTED_KEY].pop()
+        for listener in self.listeners:
+            listener(conn, statement, parameters, context, executemany, seconds)
+
+    def handle_error(self, exception_context):
+        connection = exception_context.connection
+        started = connection and connection.info.get(STARTED_KEY)
+        if started:
+            started.pop()
+
+
+_timers: "weakref.WeakKeyDictionary[Any, StatementTimer]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def listen_statements(engine, listener: StatementListener) -> None:
+    """
+    Call listener with the duration of every statement executed on an engine.
+
+    Registering the same listener again has no effect.
+
+    Args:
+        engine: Engine whose statements are timed
+        listener: Called after each statement that completes
+    """
+    with _lock:
+        timer = _timers.get(engine)
+        if timer is None:
+            timer = _timers[engine] = StatementTimer()
+            event.listen(engine, "before_cursor_execute", timer.before)
+            event.listen(engine, "after_cursor_execute", timer.after)
+            event.listen(engine, "handle_error", timer.handle_error)
+        if listener not in timer.listeners:
+            # Replaced, not appended to, so a statement in progress in
+            # another thread iterates over a list that does not change
+            timer.listeners = [*timer.listeners, listener]
+
+
+def remove_statement_listener(engine, listener: StatementListener) -> None:
+    """Stop calling listener; the hooks stay for the engine's other listeners."""
+    with _lock:
+        timer = _timers.get(engine)
+        if timer is not None and listener in timer.listeners:
+            timer.listeners = [item for item in timer.listeners if item != listener]
@@ -0,0 +1,373 @@
+"""
+Lightweight request tracing with OpenTelemetry-compatible spans.
+
+TracingMiddleware starts a root span per sampled request, continuing the
+trace of an incoming W3C `traceparent` header. Functions decorated with
+@traced and the public methods of classes decorated with @trace_methods
+record child spans, so a slow request breaks down into auth, service,
+repository and model time; the rest of the root span is routing and
+serialization. The context travels in a ContextVar, which follows requests
+into the thread pool.
+
+Spans use the field names of the OTLP span model (traceId, spanId,
+parentSpanId, startTimeUnixNano, ...) and a trace is exported as soon as
+its root span ends: to the app.tracing logger (TRACING_EXPORTER=console) or
+as JSON lines appended to TRACING_FILE (TRACING_EXPORTER=file).
+`python -m app.core.tracing traces.jsonl` summarizes such a file.
+
+Cost is bounded by TRACE_SAMPLE_RATIO (share of new traces recorded;
+unsampled requests only pay a context lookup per instrumented call) and
+TRACE_MAX_SPANS (spans kept per trace, the rest are counted as dropped).
+"""
+
+import argparse
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# none (default), console or file
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+# Share of traces started here that are recorded; incoming traceparent
+# headers keep the caller's decision
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "0.1"))
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "256"))
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+logger = logging.getLogger("app.tracing")
+
+
+class Trace:
+    """The spans of one trace recorded in this process."""
+
+    def __init__(self, trace_id: str, exporter: "Exporter"):
+        self.trace_id = trace_id
+        self.exporter = exporter
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, span: Dict[str, Any], root: bool = False) -> None:
+        """Keep a span; beyond TRACE_MAX_SPANS only the root is kept."""
+        with self._lock:
+            if root or len(self.spans) < TRACE_MAX_SPANS:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+
+class Span:
+    """A timed operation; use as a context manager."""
+
+    def __init__(
+        self,
+        trace: Trace,
+        name: str,
+        parent_id: Optional[str] = None,
+        kind: str = "INTERNAL",
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.trace = trace
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status = {"code": "UNSET"}
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def start(self) -> None:
+        self.start_ns = time.time_ns()
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """Record the span; a local root (no parent or a remote one) exports."""
+        if error is not None:
+            self.status = {
+                "code": "ERROR",
+                "message": f"{type(error).__name__}: {error}",
+            }
+        root = self.kind == "SERVER" or self.parent_id is None
+        self.trace.add(
+            {
+                "traceId": self.trace.trace_id,
+                "spanId": self.span_id,
+                "parentSpanId": self.parent_id,
+                "name": self.name,
+                "kind": self.kind,
+                "startTimeUnixNano": self.start_ns,
+                "endTimeUnixNano": time.time_ns(),
+                "attributes": self.attributes,
+                "status": self.status,
+            },
+            root,
+        )
+        if root:
+            self.trace.exporter.export(self.trace)
+
+    def __enter__(self) -> "Span":
+        self.start()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+        self.end(exc)
+
+
+# The innermost open span of the current request, if it is sampled
+_current_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, **attributes: Any) -> Optional[Span]:
+    """
+    Start a child of the current span; None when the request is not sampled.
+
+    Use as `with start_span(...) or nullcontext():`; @traced does this.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(parent.trace, name, parent.span_id, attributes=attributes)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Record a span for every sampled call of the decorated function."""
+
+    def decorator(function: Callable) -> Callable:
+        span_name = name or function.__qualname__
+
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                parent = _current_span.get()
+                if parent is None:
+                    return await function(*args, **kwargs)
+                with Span(parent.trace, span_name, parent.span_id):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            parent = _current_span.get()
+            if parent is None:
+                return function(*args, **kwargs)
+            with Span(parent.trace, span_name, parent.span_id):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(cls: type) -> type:
+    """Trace every public method of a class as ClassName.method."""
+    for attribute, value in list(vars(cls).items()):
+        if (
+            attribute.startswith("_")
+            or not inspect.isfunction(value)
+            or inspect.isgeneratorfunction(value)
+            or inspect.isasyncgenfunction(value)
+        ):
+            continue
+        setattr(cls, attribute, traced(f"{cls.__name__}.{attribute}")(value))
+    return cls
+
+
+class Exporter:
+    """Drops traces; the default when tracing is off."""
+
+    def export(self, trace: Trace) -> None:
+        pass
+
+
+class ConsoleExporter(Exporter):
+    """Logs each finished trace as one JSON document."""
+
+    def export(self, trace: Trace) -> None:
+        logger.info(
+            json.dumps(
+                {
+                    "traceId": trace.trace_id,
+                    "spans": trace.spans,
+                    "dropped": trace.dropped,
+                }
+            )
+        )
+
+
+class FileExporter(Exporter):
+    """Appends the spans of each finished trace to a JSON-lines file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        lines = "".join(json.dumps(span) + "\n" for span in trace.spans)
+        with self._lock, open(self.path, "a") as file:
+            file.write(lines)
+
+
+def create_exporter(kind: str = TRACING_EXPORTER, path: str = TRACING_FILE) -> Exporter:
+    if kind == "console":
+        return ConsoleExporter()
+    if kind == "file":
+        return FileExporter(path)
+    return Exporter()
+
+
+# Where finished traces go
+exporter = create_exporter()
+
+
+def parse_traceparent(value: Optional[str]):
+    """(trace id, parent span id, sampled) of a W3C traceparent header."""
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), int(match.group(3), 16) & 1 == 1
+
+
+class TracingMiddleware:
+    """ASGI middleware recording a root span for each sampled request."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    @staticmethod
+    def _sampled_context(scope: Scope):
+        incoming = parse_traceparent(Headers(scope=scope).get("traceparent"))
+        if incoming is not None:
+            trace_id, parent_id, sampled = incoming
+            return (trace_id, parent_id) if sampled else None
+        if random.random() < TRACE_SAMPLE_RATIO:
+            return f"{random.getrandbits(128):032x}", None
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or type(exporter) is Exporter:
+            await self.app(scope, receive, send)
+            return
+        context = self._sampled_context(scope)
+        if context is None:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = context
+        root = Span(
+            Trace(trace_id, exporter),
+            scope["method"],
+            parent_id,
+            kind="SERVER",
+            attributes={
+                "http.request.method": scope["method"],
+                "url.path": scope["path"],
+            },
+        )
+        sending: Optional[Span] = None
+
+        async def send_traced(message: Message) -> None:
+            nonlocal sending
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.response.status_code", message["status"])
+                MutableHeaders(scope=message)["X-Trace-Id"] = trace_id
+                # Streamed bodies are encoded while they are sent. Not the
+                # current span: streaming sends from another task's context
+                sending = Span(root.trace, "http.send", root.span_id)
+                sending.start()
+            await send(message)
+            if (
+                message["type"] == "http.response.body"
+                and not message.get("more_body", False)
+                and sending is not None
+            ):
+                sending.end()
+                sending = None
+
+        with root:
+            try:
+                await self.app(scope, receive, send_traced)
+            finally:
+                if sending is not None:
+                    sending.end()
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    root.name = f"{scope['method']} {route}"
+                    root.set_attribute("http.route", route)
+
+
+def summarize(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Count, total and self time (excluding child spans) per span name.
+
+    Args:
+        spans: Spans as written by FileExporter
+
+    Returns:
+        list: One entry per span name, largest self time first
+    """
+    children_ns: Dict[str, int] = defaultdict(int)
+    for span in spans:
+        if span["parentSpanId"]:
+            children_ns[span["parentSpanId"]] += (
+                span["endTimeUnixNano"] - span["startTimeUnixNano"]
+            )
+    totals: Dict[str, Dict[str, float]] = defaultdict(
+        lambda: {"count": 0, "total_ms": 0.0, "self_ms": 0.0}
+    )
+    for span in spans:
+        duration = span["endTimeUnixNano"] - span["startTimeUnixNano"]
+        entry = totals[span["name"]]
+        entry["count"] += 1
+        entry["total_ms"] += duration / 1e6
+        entry["self_ms"] += max(duration - children_ns[span["spanId"]], 0) / 1e6
+    rows = [
+        {
+            "name": name,
+            "count": entry["count"],
+            "total_ms": round(entry["total_ms"], 3),
+            "self_ms": round(entry["self_ms"], 3),
+        }
+        for name, entry in totals.items()
+    ]
+    return sorted(rows, key=lambda row: row["self_ms"], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a trace file by span name")
+    parser.add_argument("path", nargs="?", default=TRACING_FILE)
+    args = parser.parse_args()
+    with open(args.path) as file:
+        spans = [json.loads(line) for line in file if line.strip()]
+    print(f"{'span':<50} {'count':>7} {'total_ms':>11} {'self_ms':>11}")
+    for row in summarize(spans):
+        print(
+            f"{row['name']:<50} {row['count']:>7} "
+            f"{row['total_ms']:>11.3f} {row['self_ms']:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,12 @@ Handles database connection and session management using SQLAlchemy.
 import logging
 import os
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from app.core.startup import startup_registry
+
 # Get database URL from environment variable or use default
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
 
@@ -29,13 +31,62 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+# Columns added after the first release: table -> {column: DDL type}.
+# create_all() only creates missing tables, so existing databases get these
+# through upgrade_schema().
+ADDED_COLUMNS = {
+    "clients": {"version": "INTEGER NOT NULL DEFAULT 1"},
+    "client_cases": {"version": "INTEGER NOT NULL DEFAULT 1"},
+}
+
+
+def upgrade_schema(bind):
+    """
+    Add columns missing from tables created by an older version of the app.
+
+    Args:
+        bind: Engine or connection of the database to upgrade
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    with bind.begin() as connection:
+        for table, columns in ADDED_COLUMNS.items():
+            if table not in existing_tables:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table)}
+            for column, ddl in columns.items():
+                if column not in present:
+                    logging.info(f"Adding column {table}.{column}")
+                    connection.execute(
+                        text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+                    )
+
+
+def prepare_database(bind):
+    """
+    Create missing tables and add missing columns.
+
+    Import app.models first, so that every table is registered on Base.
+
+    Args:
+        bind: Engine of the database to prepare
+    """
+    Base.metadata.create_all(bind=bind)
+    upgrade_schema(bind)
+
+
 def get_db():
     """
     Create a database session and ensure it's closed after use.
 
+    While the app warms up in the background, waits until the "database"
+    start-up resource (schema and read model, see app.main) is built.
+
     Yields:
         Session: SQLAlchemy database session
     """
+    # FastAPI runs sync dependencies in a thread, so this does not block the loop
+    startup_registry["database"].get()
     db = SessionLocal()
     try:
         yield db
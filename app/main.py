@@ -2,28 +2,98 @@
 Main application module for the Common Assessment Tool.
 This module initializes the FastAPI application and includes all routers.
 Handles database initialization and CORS middleware configuration.
+
+Importing it is cheap: the database schema, the recommendation model and the
+ML models are start-up resources, warmed up in parallel by the lifespan and
+otherwise built on first use. /healthz reports liveness; /readyz reports
+readiness with the start-up timing breakdown. /metrics exposes request,
+database, inference and cache metrics in the Prometheus text format.
+SQL_PROFILING reports the SQL statements of each request (see
+app.core.profiling), and /admin/slow-queries the slowest statement shapes
+with their query plans.
 """
 
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.admin.router import router as admin_router
 from app.auth.router import router as auth_router
+from app.changes.router import router as changes_router
 from app.clients.router import router as clients_router
-from app.database import engine
-from app.models import Base
+from app.core.compression import CompressionMiddleware
+from app.core.executor import inference_executor
+from app.core.monitoring import METRICS_ENABLED, MetricsMiddleware, instrument_engine
+from app.core.multiprocess_metrics import multiprocess_metrics
+from app.core.profiling import SQLProfilingMiddleware, attach_profiler
+from app.core.slow_queries import SLOW_QUERY_LOG_ENABLED, slow_query_log
+from app.core.startup import startup_registry
+from app.core.tracing import TracingMiddleware
+from app.database import engine, prepare_database
+from app.models.overview import rebuild_client_overview
 from app.models.router import router as ml_router
 
-# Initialize database tables
-Base.metadata.create_all(bind=engine)
+# Serve requests while warming up (readiness says when it is done), or only after
+WARM_UP_IN_BACKGROUND = os.getenv("WARM_UP_IN_BACKGROUND", "true").lower() == "true"
+
+
+def initialize_database():
+    # Initialize database tables
+    prepare_database(engine)
+    # Populate the client read model if it is new or was bypassed
+    rebuild_client_overview(engine)
+
+
+startup_registry.register("database", initialize_database)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # A worker of app.server shares its metrics with the other workers
+    multiprocess_metrics.start()
+    warm_up = asyncio.create_task(startup_registry.warm_up())
+    if not WARM_UP_IN_BACKGROUND:
+        await warm_up
+    yield
+    # Warm-up threads cannot be interrupted; let them finish
+    await warm_up
+    multiprocess_metrics.stop()
+    # Process-pool workers would otherwise outlive the server
+    inference_executor.shutdown()
+
 
 # Create FastAPI application
 app = FastAPI(
     title="Case Management API",
     description="API for managing client cases",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
+@app.get("/healthz", tags=["health"])
+async def liveness():
+    """Report that the process is up and its event loop answers."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz", tags=["health"])
+async def readiness(response: Response):
+    """
+    Whether every start-up resource is built; 503 until then.
+
+    Returns:
+        dict: Start-up report with the build time of every resource
+    """
+    report = startup_registry.report()
+    if report["status"] != "ready":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return report
+
+
 @app.get("/test", tags=["test"])
 def test_endpoint():
     return {"status": "ok", "message": "API is working!"}
@@ -33,6 +103,11 @@ def test_endpoint():
 app.include_router(auth_router)
 app.include_router(clients_router)
 app.include_router(ml_router)
+app.include_router(changes_router)
+app.include_router(admin_router)
+
+if SLOW_QUERY_LOG_ENABLED:
+    slow_query_log.attach(engine)
 
 # Configure CORS middleware
 app.add_middleware(
@@ -41,4 +116,30 @@ app.add_middleware(
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
     allow_credentials=True,
+    expose_headers=["ETag"],  # Lets browser clients send conditional requests
 )
+
+# Compress JSON responses of COMPRESSION_MINIMUM_SIZE bytes or more
+app.add_middleware(CompressionMiddleware)
+
+# Profiles the SQL of requests as SQL_PROFILING says; a flag check otherwise
+attach_profiler(engine)
+app.add_middleware(SQLProfilingMiddleware)
+
+# Records sampled requests when TRACING_EXPORTER is set
+app.add_middleware(TracingMiddleware)
+
+
+async def metrics():
+    """Metrics of this process, or of every server worker, as Prometheus text."""
+    return Response(
+        multiprocess_metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+if METRICS_ENABLED:
+    instrument_engine(engine)
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+    # Added last, so it is outermost and times compression too
+    app.add_middleware(MetricsMiddleware)
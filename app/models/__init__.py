@@ -1,5 +1,7 @@
 from app.database import Base
 
 from .case import ClientCase
+from .change_log import ChangeLog
 from .client import Client
+from .overview import ClientOverview
 from .user import User, UserRole
@@ -20,6 +20,10 @@ class ClientCase(Base):
     success_rate = Column(
         Integer, CheckConstraint("success_rate >= 0 AND success_rate <= 100")
     )
+    # Incremented on every update; bulk Core updates bump it explicitly
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     client = relationship("Client", back_populates="cases")
     user = relationship("User", back_populates="cases")
+
+    __mapper_args__ = {"version_id_col": version}
@@ -0,0 +1,173 @@
+"""
+Transactional outbox of client and case changes.
+
+Every commit that inserts, updates or deletes clients or client cases also
+appends one change_log row per changed row, in the same transaction, with
+a monotonically increasing sequence number and the row as committed. ORM
+flushes are recorded through session events; bulk Core statements record
+their rows with record_changes(). Changes to the same row within one
+transaction are collapsed into one entry describing the net change.
+
+SQLite serializes writers, so sequence numbers also become visible in
+order and a reader that resumes after the last seq it saw misses nothing.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Integer,
+    String,
+    event,
+    insert,
+    select,
+    tuple_,
+)
+from sqlalchemy.orm import Session
+
+from app.database import Base
+
+from .case import ClientCase
+from .client import Client
+
+# Entity name -> model; keys are (client_id, None) or (client_id, user_id)
+ENTITIES = {"client": Client, "client_case": ClientCase}
+
+# Rows read back per statement when changes are written
+RECORD_CHUNK_SIZE = 500
+# Session.info key of {(entity, key): first operation} awaiting the commit
+PENDING_KEY = "change_log_pending"
+# Session.info flag set when the committing transaction appended changes
+LOGGED_KEY = "change_log_logged"
+
+ChangeKey = Tuple[int, Optional[int]]
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    # AUTOINCREMENT: sequence numbers are never reused, even after deletes
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(20), nullable=False)
+    client_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer)
+    op = Column(String(10), nullable=False)
+    # Row version after the change; NULL for deletes
+    version = Column(Integer)
+    # Every column of the row after the change; NULL for deletes
+    data = Column(JSON)
+    changed_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+
+
+def record_changes(db: Session, entity: str, keys: Iterable[Any], op: str) -> None:
+    """
+    Record rows changed by bulk statements, to be logged when the session commits.
+
+    Args:
+        db (Session): Session whose transaction made the changes
+        entity (str): "client" (keys are ids) or "client_case" (keys are
+            (client_id, user_id) tuples)
+        keys: Changed rows
+        op (str): "insert", "update" or "delete"
+    """
+    pending = db.info.setdefault(PENDING_KEY, {})
+    for key in keys:
+        if entity == "client":
+            key = (key, None)
+        # The first operation tells inserts apart from updates of existing rows
+        pending.setdefault((entity, tuple(key)), op)
+
+
+def _current_rows(db, entity: str, keys) -> Dict[ChangeKey, Dict[str, Any]]:
+    table = ENTITIES[entity].__table__
+    rows = {}
+    for start in range(0, len(keys), RECORD_CHUNK_SIZE):
+        chunk = keys[start : start + RECORD_CHUNK_SIZE]
+        if entity == "client":
+            condition = table.c.id.in_([client_id for client_id, _ in chunk])
+        else:
+            condition = tuple_(table.c.client_id, table.c.user_id).in_(chunk)
+        for row in db.execute(select(table).where(condition)):
+            data = dict(row._mapping)
+            if entity == "client":
+                rows[(data["id"], None)] = data
+            else:
+                rows[(data["client_id"], data["user_id"])] = data
+    return rows
+
+
+def write_change_log(db, pending: Dict[Tuple[str, ChangeKey], str]) -> None:
+    """Append the net change of every pending row, reading rows as they are now."""
+    by_entity: Dict[str, list] = {}
+    for entity, key in pending:
+        by_entity.setdefault(entity, []).append(key)
+    current = {
+        entity: _current_rows(db, entity, keys) for entity, keys in by_entity.items()
+    }
+
+    now = _utcnow()
+    entries = []
+    for (entity, key), first_op in pending.items():
+        row = current[entity].get(key)
+        if row is None and first_op == "insert":
+            # Created and deleted again before anyone could see it
+            continue
+        if row is None:
+            op = "delete"
+        else:
+            op = "insert" if first_op == "insert" else "update"
+        entries.append(
+            {
+                "entity": entity,
+                "client_id": key[0],
+                "user_id": key[1],
+                "op": op,
+                "version": None if row is None else row["version"],
+                "data": row,
+                "changed_at": now,
+            }
+        )
+    if entries:
+        db.execute(insert(ChangeLog.__table__), entries)
+        db.info[LOGGED_KEY] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_changes(session, flush_context):
+    for instances, op in (
+        (session.new, "insert"),
+        (session.dirty, "update"),
+        (session.deleted, "delete"),
+    ):
+        for instance in instances:
+            if isinstance(instance, Client):
+                entity, key = "client", instance.id
+            elif isinstance(instance, ClientCase):
+                entity, key = "client_case", (instance.client_id, instance.user_id)
+            else:
+                continue
+            if op == "update" and not session.is_modified(instance):
+                continue
+            record_changes(session, entity, [key], op)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_pending_changes(session):
+    session.flush()
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        write_change_log(session, pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending_changes(session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(LOGGED_KEY, None)
@@ -49,5 +49,9 @@ class Client(Base):
     substance_use = Column(Boolean)
     time_unemployed = Column(Integer, CheckConstraint("time_unemployed >= 0"))
     need_mental_health_support_bool = Column(Boolean)
+    # Incremented on every ORM update; exposed as the ETag of the client
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     cases = relationship("ClientCase", back_populates="client")
+
+    __mapper_args__ = {"version_id_col": version}
@@ -1,12 +1,15 @@
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
-from sklearn.tree import DecisionTreeClassifier
 
+from app.core.lazy import lazy_module
 from app.database import SessionLocal
 from app.models import Client, ClientCase
 
+# scikit-learn is imported when a model is first built, not with the app
+ensemble = lazy_module("sklearn.ensemble")
+linear_model = lazy_module("sklearn.linear_model")
+model_selection = lazy_module("sklearn.model_selection")
+tree = lazy_module("sklearn.tree")
+
 
 class MLModel:
     """Base class for machine learning models."""
@@ -20,7 +23,7 @@ class MLModel:
 
 class LogisticRegressionModel(MLModel):
     def __init__(self):
-        self.model = LogisticRegression(max_iter=200)
+        self.model = linear_model.LogisticRegression(max_iter=200)
 
     def fit(self, X_train, y_train):
         try:
@@ -41,7 +44,7 @@ class LogisticRegressionModel(MLModel):
 
 class DecisionTreeModel(MLModel):
     def __init__(self):
-        self.model = DecisionTreeClassifier(random_state=42)
+        self.model = tree.DecisionTreeClassifier(random_state=42)
 
     def fit(self, X_train, y_train):
         try:
@@ -58,7 +61,7 @@ class DecisionTreeModel(MLModel):
 
 class RandomForestModel(MLModel):
     def __init__(self):
-        self.model = RandomForestClassifier(random_state=42)
+        self.model = ensemble.RandomForestClassifier(random_state=42)
 
     def fit(self, X_train, y_train):
         try:
@@ -126,7 +129,7 @@ def load_data():
     y = np.array(y)
 
     # Split the data into training and testing sets
-    X_train, X_test, y_train, y_test = train_test_split(
+    X_train, X_test, y_train, y_test = model_selection.train_test_split(
         X, y, test_size=0.3, random_state=42
     )
 
@@ -0,0 +1,224 @@
+"""
+Denormalized read model of clients for the query services.
+
+client_overview holds one row per client with its fields and its best
+success rate, so criteria and success-rate searches run without touching
+client_cases. client_overview_cases holds the case worker, services and
+success rate of each case, indexed by case worker, for caseload lists and
+service searches. Both keep the versions of the rows they were built from,
+so a start-up check can tell when they are out of step.
+
+Rows are refreshed inside the transaction that changes their client or
+cases: ORM flushes mark the affected clients through session events, bulk
+Core statements mark them with mark_overview_stale(), and the marked rows
+are rebuilt just before the commit.
+"""
+
+from typing import Iterable
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Integer,
+    Table,
+    delete,
+    event,
+    func,
+    insert,
+    select,
+)
+from sqlalchemy.orm import Session
+
+from app.database import Base
+
+from .case import ClientCase
+from .client import Client
+
+SERVICE_COLUMNS = [
+    "employment_assistance",
+    "life_stabilization",
+    "retention_services",
+    "specialized_services",
+    "employment_related_financial_supports",
+    "employer_financial_supports",
+    "enhanced_referrals",
+]
+CLIENT_COLUMNS = [
+    column.name
+    for column in Client.__table__.columns
+    if column.name not in ("id", "version")
+]
+
+# Clients refreshed per statement; keeps bound parameters under SQLite's limit
+REFRESH_CHUNK_SIZE = 500
+# Session.info key of the client ids whose rows must be rebuilt before commit
+STALE_KEY = "client_overview_stale"
+
+client_overview = Table(
+    "client_overview",
+    Base.metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    *(Column(name, Client.__table__.c[name].type) for name in CLIENT_COLUMNS),
+    # Highest success rate of the client's cases; NULL without cases
+    Column("best_success_rate", Integer, index=True),
+    # Version of the client row
+    Column("version", Integer, nullable=False, default=0),
+)
+
+client_overview_cases = Table(
+    "client_overview_cases",
+    Base.metadata,
+    Column("client_id", Integer, primary_key=True, autoincrement=False),
+    Column("user_id", Integer, primary_key=True, autoincrement=False, index=True),
+    *(Column(name, Boolean) for name in SERVICE_COLUMNS),
+    Column("success_rate", Integer),
+    # Version of the case row
+    Column("version", Integer, nullable=False),
+)
+
+
+class ClientOverview(Base):
+    __table__ = client_overview
+
+
+def _chunks(ids):
+    ids = sorted(ids)
+    for start in range(0, len(ids), REFRESH_CHUNK_SIZE):
+        yield ids[start : start + REFRESH_CHUNK_SIZE]
+
+
+def _overview_rows(connection, client_ids):
+    clients = Client.__table__
+    cases = ClientCase.__table__
+    rows = {
+        row.id: {
+            "id": row.id,
+            **{name: row._mapping[name] for name in CLIENT_COLUMNS},
+            "best_success_rate": None,
+            "version": row.version,
+        }
+        for row in connection.execute(
+            select(
+                clients.c.id,
+                *(clients.c[name] for name in CLIENT_COLUMNS),
+                clients.c.version,
+            ).where(clients.c.id.in_(client_ids))
+        )
+    }
+    overview_cases = []
+    case_rows = connection.execute(
+        select(
+            cases.c.client_id,
+            cases.c.user_id,
+            *(cases.c[name] for name in SERVICE_COLUMNS),
+            cases.c.success_rate,
+            cases.c.version,
+        ).where(cases.c.client_id.in_(client_ids))
+    )
+    for case in case_rows:
+        row = rows.get(case.client_id)
+        if row is None:
+            continue
+        overview_cases.append(dict(case._mapping))
+        if case.success_rate is not None:
+            row["best_success_rate"] = max(
+                row["best_success_rate"] or 0, case.success_rate
+            )
+    return list(rows.values()), overview_cases
+
+
+def refresh_client_overview(connection, client_ids: Iterable[int]) -> None:
+    """
+    Rebuild the overview rows of the given clients from the normalized tables.
+
+    Args:
+        connection: Session or connection, inside the caller's transaction
+        client_ids: Clients whose rows are rebuilt; deleted clients lose theirs
+    """
+    for chunk in _chunks(set(client_ids)):
+        rows, overview_cases = _overview_rows(connection, chunk)
+        connection.execute(
+            delete(client_overview).where(client_overview.c.id.in_(chunk))
+        )
+        connection.execute(
+            delete(client_overview_cases).where(
+                client_overview_cases.c.client_id.in_(chunk)
+            )
+        )
+        if rows:
+            connection.execute(insert(client_overview), rows)
+        if overview_cases:
+            connection.execute(insert(client_overview_cases), overview_cases)
+
+
+def _fingerprint(connection, table):
+    # Row count and version sum; any versioned write or delete changes one
+    return tuple(
+        connection.execute(
+            select(func.count(), func.coalesce(func.sum(table.c.version), 0))
+        ).one()
+    )
+
+
+def rebuild_client_overview(bind, force: bool = False) -> bool:
+    """
+    Rebuild every overview row when the read model is out of step.
+
+    The row counts and version sums of clients and client_overview, and of
+    client_cases and client_overview_cases, are compared. This catches an
+    empty read model as well as writes that bypassed it, such as an update
+    by another version of the app.
+
+    Args:
+        bind: Engine of the database
+        force (bool): Rebuild even if the read model is in step
+
+    Returns:
+        bool: Whether the read model was rebuilt
+    """
+    with bind.begin() as connection:
+        in_step = all(
+            _fingerprint(connection, table) == _fingerprint(connection, projection)
+            for table, projection in [
+                (Client.__table__, client_overview),
+                (ClientCase.__table__, client_overview_cases),
+            ]
+        )
+        if in_step and not force:
+            return False
+        connection.execute(delete(client_overview))
+        connection.execute(delete(client_overview_cases))
+        client_ids = connection.execute(select(Client.__table__.c.id)).scalars()
+        refresh_client_overview(connection, list(client_ids))
+    return True
+
+
+def mark_overview_stale(db: Session, client_ids: Iterable[int]) -> None:
+    """Rebuild these clients' overview rows when the session next commits."""
+    db.info.setdefault(STALE_KEY, set()).update(client_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed_clients(session, flush_context):
+    # new/dirty/deleted still describe what this flush wrote
+    changed = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Client):
+            changed.add(instance.id)
+        elif isinstance(instance, ClientCase):
+            changed.add(instance.client_id)
+    if changed:
+        mark_overview_stale(session, changed)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_stale_clients(session):
+    session.flush()
+    stale = session.info.pop(STALE_KEY, None)
+    if stale:
+        refresh_client_overview(session, stale)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale_clients(session):
+    session.info.pop(STALE_KEY, None)
@@ -1,16 +1,40 @@
 from typing import Dict
 
-from fastapi import APIRouter, Response
+from fastapi import APIRouter, Depends, Response
 from pydantic import BaseModel, ValidationError
 
 from app.clients.schema import PredictionInput
-from app.core.model_manager import ModelManager
+from app.core.batching import MicroBatcher, batcher_stats
+from app.core.executor import inference_executor
+from app.core.model_manager import CANDIDATE_MODELS, ModelManager
+from app.core.startup import startup_registry
 
 # Initialize FastAPI router for ML-related endpoints
 router = APIRouter(prefix="/ml", tags=["ml_models"])
 
-# Initialize ModelManager for managing ML models
-model_manager = ModelManager()
+# ModelManager trains its models at start-up or on first use, not at import.
+# Training reads the clients table, so the schema must be up to date first.
+model_manager_resource = startup_registry.register(
+    "model_manager", ModelManager, depends_on=["database"]
+)
+for name in CANDIDATE_MODELS:
+    inference_executor.register_loader(
+        name, lambda name=name: model_manager_resource.get().available_models[name]
+    )
+
+
+async def get_model_manager() -> ModelManager:
+    """Dependency returning the trained ModelManager."""
+    return await model_manager_resource.aget()
+
+
+async def _predict_with_current_model(rows):
+    model_manager = await get_model_manager()
+    return await inference_executor.run(model_manager.current_model_name, rows)
+
+
+# Coalesce concurrent /predict calls into one predict on the current model
+predict_batcher = MicroBatcher("ml_predict", _predict_with_current_model)
 
 
 # Pydantic model to handle the model name for switching
@@ -19,7 +43,7 @@ class ModelSwitchRequest(BaseModel):
 
 
 @router.get("/current-model", response_model=Dict[str, str])
-async def get_current_model():
+async def get_current_model(model_manager: ModelManager = Depends(get_model_manager)):
     """
     Get information about the current model being used in the system.
     Returns:
@@ -34,7 +58,9 @@ async def get_current_model():
 
 
 @router.get("/available-models", response_model=Dict[str, list])
-async def get_available_models():
+async def get_available_models(
+    model_manager: ModelManager = Depends(get_model_manager),
+):
     """
     Get a list of available machine learning models supported by the system.
     Returns:
@@ -47,8 +73,22 @@ async def get_available_models():
         return {"error": f"Failed to get available models: {str(e)}"}
 
 
+@router.get("/model-report")
+async def get_model_report(model_manager: ModelManager = Depends(get_model_manager)):
+    """
+    Get the evaluation report produced when the models were trained.
+    Returns:
+        Dict with cross-validated and held-out accuracy plus inference latency per model.
+    """
+    return model_manager.get_evaluation_report()
+
+
 @router.post("/switch-model")
-async def switch_model(model_request: ModelSwitchRequest, response: Response):
+async def switch_model(
+    model_request: ModelSwitchRequest,
+    response: Response,
+    model_manager: ModelManager = Depends(get_model_manager),
+):
     """
     Switch the active machine learning model.
     Args:
@@ -65,6 +105,42 @@ async def switch_model(model_request: ModelSwitchRequest, response: Response):
     return result
 
 
+def encode_features(data: PredictionInput) -> list:
+    """
+    Encode a prediction input as the feature row the ML models were trained on.
+
+    Args:
+        data (PredictionInput): Validated prediction input
+
+    Returns:
+        list: Feature values, with text answers converted to numbers
+    """
+    return [
+        data.age,
+        data.work_experience,
+        data.canada_workex,
+        int(data.level_of_schooling),  # Convert to integer
+        1 if data.fluent_english.lower() == "true" else 0,  # Convert to 0/1
+        data.reading_english_scale,
+        data.speaking_english_scale,
+        data.writing_english_scale,
+        data.numeracy_scale,
+        data.computer_scale,
+        1 if data.transportation_bool.lower() == "true" else 0,  # Convert to 0/1
+        1 if data.caregiver_bool.lower() == "true" else 0,  # Convert to 0/1
+        int(data.housing),  # Convert to integer
+        int(data.income_source),  # Convert to integer
+        1 if data.felony_bool.lower() == "true" else 0,  # Convert to 0/1
+        1 if data.attending_school.lower() == "true" else 0,  # Convert to 0/1
+        1 if data.currently_employed.lower() == "true" else 0,  # Convert to 0/1
+        1 if data.substance_use.lower() == "true" else 0,  # Convert to 0/1
+        data.time_unemployed,
+        (
+            1 if data.need_mental_health_support_bool.lower() == "true" else 0
+        ),  # Convert to 0/1
+    ]
+
+
 @router.post("/predict")
 async def predict(data: PredictionInput):
     """
@@ -75,40 +151,23 @@ async def predict(data: PredictionInput):
         JSON response with the prediction result.
     """
     try:
-        # Convert input data into a list of features with explicit numeric conversion
-        features = [
-            data.age,
-            data.work_experience,
-            data.canada_workex,
-            int(data.level_of_schooling),  # Convert to integer
-            1 if data.fluent_english.lower() == "true" else 0,  # Convert to 0/1
-            data.reading_english_scale,
-            data.speaking_english_scale,
-            data.writing_english_scale,
-            data.numeracy_scale,
-            data.computer_scale,
-            1 if data.transportation_bool.lower() == "true" else 0,  # Convert to 0/1
-            1 if data.caregiver_bool.lower() == "true" else 0,  # Convert to 0/1
-            int(data.housing),  # Convert to integer
-            int(data.income_source),  # Convert to integer
-            1 if data.felony_bool.lower() == "true" else 0,  # Convert to 0/1
-            1 if data.attending_school.lower() == "true" else 0,  # Convert to 0/1
-            1 if data.currently_employed.lower() == "true" else 0,  # Convert to 0/1
-            1 if data.substance_use.lower() == "true" else 0,  # Convert to 0/1
-            data.time_unemployed,
-            1
-            if data.need_mental_health_support_bool.lower() == "true"
-            else 0,  # Convert to 0/1
-        ]
-
-        # Convert to 2D array for prediction
-        model = model_manager.current_model
-        prediction = model.predict(
-            [features]
-        )  # Make sure the input is in the expected format
+        features = encode_features(data)
+
+        # Queue the row; it is scored together with concurrent requests
+        prediction = await predict_batcher.submit([features])
 
         # Return the prediction as a list
         return {"prediction": prediction.tolist()}
 
     except ValidationError as e:
         return {"error": "Invalid input data", "details": e.errors()}
+
+
+@router.get("/batching-stats")
+async def get_batching_stats():
+    """
+    Get batch-size and queue-wait histograms for the inference batchers.
+    Returns:
+        Dict keyed by batcher name.
+    """
+    return batcher_stats()
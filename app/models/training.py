@@ -0,0 +1,156 @@
+"""
+Parallel training and evaluation pipeline for the prediction models.
+
+Every candidate model is cross-validated, fitted on the full training split,
+scored on the held-out test split and timed at inference, with candidates
+running in parallel worker processes. The resulting report lets the serving
+model be chosen on a measured latency/accuracy trade-off.
+"""
+
+import copy
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from app.core.lazy import lazy_module
+
+model_selection = lazy_module("sklearn.model_selection")
+
+TRAINING_JOBS = int(os.getenv("MODEL_TRAINING_JOBS", str(os.cpu_count() or 1)))
+CV_FOLDS = int(os.getenv("MODEL_CV_FOLDS", "5"))
+LATENCY_SAMPLES = 50
+
+
+def score_predictions(task: str, y_true, y_pred) -> Dict[str, float]:
+    """Accuracy for classifiers; R² and mean absolute error for regressors."""
+    y_true = np.asarray(y_true, dtype=float)
+    y_pred = np.asarray(y_pred, dtype=float)
+    if task == "classification":
+        return {"accuracy": float(np.mean(y_true == y_pred))}
+    residual = np.sum((y_true - y_pred) ** 2)
+    total = np.sum((y_true - y_true.mean()) ** 2)
+    return {
+        "r2": float(1 - residual / total) if total else 0.0,
+        "mae": float(np.mean(np.abs(y_true - y_pred))),
+    }
+
+
+def measure_latency(model, X) -> Dict[str, float]:
+    """Time a batch predict over X and single-row predicts on a sample of it."""
+    started = time.perf_counter()
+    model.predict(X)
+    batch_seconds = time.perf_counter() - started
+
+    row_seconds = []
+    for row in X[:LATENCY_SAMPLES]:
+        started = time.perf_counter()
+        model.predict(row.reshape(1, -1))
+        row_seconds.append(time.perf_counter() - started)
+
+    return {
+        "batch_predict_ms": round(batch_seconds * 1000, 3),
+        "batch_rows": len(X),
+        "rows_per_second": round(len(X) / batch_seconds, 1) if batch_seconds else None,
+        "single_row_p50_ms": round(float(np.percentile(row_seconds, 50)) * 1000, 3),
+        "single_row_p95_ms": round(float(np.percentile(row_seconds, 95)) * 1000, 3),
+    }
+
+
+def train_and_evaluate(name, model, X_train, y_train, X_test, y_test, task, cv_folds):
+    """
+    Cross-validate, fit and evaluate one candidate model.
+
+    Returns:
+        tuple: (name, fitted model, metrics dict)
+    """
+    X_train, X_test = np.asarray(X_train), np.asarray(X_test)
+    y_train, y_test = np.asarray(y_train), np.asarray(y_test)
+
+    fold_scores = []
+    folds = model_selection.KFold(n_splits=cv_folds, shuffle=True, random_state=42)
+    for train_index, val_index in folds.split(X_train):
+        fold_model = copy.deepcopy(model)
+        fold_model.fit(X_train[train_index], y_train[train_index])
+        fold_scores.append(
+            score_predictions(
+                task, y_train[val_index], fold_model.predict(X_train[val_index])
+            )
+        )
+
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+
+    metrics = {"fit_seconds": round(fit_seconds, 3)}
+    for metric in fold_scores[0]:
+        values = [scores[metric] for scores in fold_scores]
+        metrics[f"cv_{metric}_mean"] = round(float(np.mean(values)), 4)
+        metrics[f"cv_{metric}_std"] = round(float(np.std(values)), 4)
+    for metric, value in score_predictions(task, y_test, model.predict(X_test)).items():
+        metrics[f"test_{metric}"] = round(value, 4)
+    metrics.update(measure_latency(model, X_test))
+    return name, model, metrics
+
+
+def train_models(
+    models: Dict[str, Any],
+    X_train,
+    y_train,
+    X_test,
+    y_test,
+    task: str = "classification",
+    cv_folds: int = CV_FOLDS,
+    n_jobs: int = TRAINING_JOBS,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Train and evaluate candidate models, in parallel processes when n_jobs > 1.
+
+    Args:
+        models: Unfitted candidates keyed by name, each with fit/predict
+        X_train, y_train: Training split
+        X_test, y_test: Held-out split used for test metrics and latency
+        task (str): "classification" or "regression"
+        cv_folds (int): Number of cross-validation folds
+        n_jobs (int): Maximum number of worker processes
+
+    Returns:
+        tuple: (fitted models keyed by name, evaluation report)
+    """
+    tasks = [
+        (name, model, X_train, y_train, X_test, y_test, task, cv_folds)
+        for name, model in models.items()
+    ]
+    workers = min(n_jobs, len(tasks))
+    if workers > 1:
+        # Training runs in warm-up threads and in the pre-fork master; forking a
+        # process with threads running can copy locks held by them
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            results = list(pool.map(train_and_evaluate, *zip(*tasks)))
+    else:
+        results = [train_and_evaluate(*args) for args in tasks]
+
+    fitted = {name: model for name, model, _ in results}
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "task": task,
+        "cv_folds": cv_folds,
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "workers": workers,
+        "models": {name: metrics for name, _, metrics in results},
+    }
+    return fitted, report
+
+
+def save_report(report: Dict[str, Any], filename: str) -> None:
+    """Write an evaluation report as JSON."""
+    with open(filename, "w") as report_file:
+        json.dump(report, report_file, indent=2)
@@ -0,0 +1,273 @@
+"""
+Pre-fork production server.
+
+The master process imports the app and builds every start-up resource (the
+schema, the recommendation forest and its explainer, the /ml estimators)
+once. It then freezes the garbage collector on those objects and forks the
+workers, which all accept connections from one listening socket. The
+workers start out sharing the master's memory copy-on-write. Frozen objects
+are never visited by the collector, so their pages stay shared instead of
+being copied into every worker the first time it collects.
+
+A worker that exits, because it crashed or was recycled after its request
+limit, is replaced by a new fork of the master and is ready at once. SIGHUP
+recycles every worker; SIGTERM or SIGINT shut the server down gracefully.
+
+With more than one worker, /metrics merges the metrics of all of them (see
+app.core.multiprocess_metrics), in METRICS_MULTIPROCESS_DIR or a temporary
+directory removed on shutdown.
+
+Usage:
+    python -m app.server --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import logging
+import os
+import random
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+import traceback
+from typing import Dict, Optional
+
+import uvicorn
+
+from app.core.multiprocess_metrics import METRICS_MULTIPROCESS_DIR, multiprocess_metrics
+
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", str(os.cpu_count() or 1)))
+# Recycle a worker after this many requests (0: never), plus up to the jitter
+# so that workers started together are not all recycled together
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0"))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0"))
+# Seconds workers get to finish their requests before they are killed
+SERVER_GRACEFUL_TIMEOUT = float(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+
+# A worker exiting sooner than this after its start is respawned with a delay
+MIN_WORKER_LIFETIME = 1.0
+REAP_INTERVAL = 0.2
+
+logger = logging.getLogger("app.server")
+
+
+def preload_app():
+    """
+    Import the app and build its start-up resources in this process.
+
+    Returns:
+        FastAPI: The application, ready to be served by forked workers
+    """
+    from app.core.startup import startup_registry
+    from app.database import engine
+    from app.main import app
+
+    asyncio.run(startup_registry.warm_up())
+    report = startup_registry.report()
+    if report["status"] != "ready":
+        raise RuntimeError(f"Start-up failed: {report['resources']}")
+    # Pooled connections must not be shared by processes
+    engine.dispose()
+    # Everything allocated so far lives as long as the server
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Open the listening socket that every worker accepts from."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """Master process that forks, supervises and recycles uvicorn workers."""
+
+    def __init__(
+        self,
+        app,
+        sock: socket.socket,
+        workers: int = SERVER_WORKERS,
+        max_requests: int = SERVER_MAX_REQUESTS,
+        max_requests_jitter: int = SERVER_MAX_REQUESTS_JITTER,
+        graceful_timeout: float = SERVER_GRACEFUL_TIMEOUT,
+        log_level: str = "info",
+    ):
+        """
+        Args:
+            app: ASGI application, already warmed up
+            sock (socket.socket): Bound, listening socket
+            workers (int): Number of worker processes
+            max_requests (int): Requests after which a worker is recycled; 0
+                for never
+            max_requests_jitter (int): Random extra requests per worker
+            graceful_timeout (float): Seconds to wait for workers on shutdown
+            log_level (str): uvicorn log level of the workers
+        """
+        self.app = app
+        self.sock = sock
+        self.worker_count = max(1, workers)
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        # pid -> (slot, start time)
+        self.workers: Dict[int, tuple] = {}
+        self.stopping = False
+        self.recycle_requested = False
+        # Created for the metrics of the workers, and removed, by this server
+        self.metrics_directory: Optional[str] = None
+
+    def run(self) -> None:
+        """Fork the workers and supervise them until asked to stop."""
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGHUP, self._request_recycle)
+        logger.info(
+            f"Master {os.getpid()} starting {self.worker_count} workers on "
+            f"{self.sock.getsockname()}"
+        )
+        if self.worker_count > 1 and not multiprocess_metrics.enabled:
+            directory = METRICS_MULTIPROCESS_DIR
+            if not directory:
+                directory = self.metrics_directory = tempfile.mkdtemp(
+                    prefix="app-metrics-"
+                )
+            multiprocess_metrics.enable(directory)
+        for slot in range(self.worker_count):
+            self._spawn(slot)
+        while not self.stopping:
+            if self.recycle_requested:
+                self.recycle_requested = False
+                logger.info("Recycling all workers")
+                self._signal_workers(signal.SIGTERM)
+            self._reap()
+            time.sleep(REAP_INTERVAL)
+        self._shutdown()
+
+    def _request_stop(self, signum, frame):
+        self.stopping = True
+
+    def _request_recycle(self, signum, frame):
+        self.recycle_requested = True
+
+    def _signal_workers(self, signum: int) -> None:
+        for pid in list(self.workers):
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signum)
+
+    def _reap(self) -> None:
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            slot, started = self.workers.pop(pid)
+            multiprocess_metrics.archive(pid)
+            logger.info(
+                f"Worker {slot} (pid {pid}) exited with status "
+                f"{os.waitstatus_to_exitcode(status)}"
+            )
+            if self.stopping:
+                continue
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                # Do not spin when workers die right after starting
+                time.sleep(MIN_WORKER_LIFETIME)
+            self._spawn(slot)
+
+    def _spawn(self, slot: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(slot)
+        self.workers[pid] = (slot, time.monotonic())
+        logger.info(f"Worker {slot} started with pid {pid}")
+        return pid
+
+    def _run_worker(self, slot: int) -> None:
+        # Forked children must never return into the master's loop; anything
+        # that ends the worker other than a clean return exits with status 1
+        exit_code = 1
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(signum, signal.SIG_DFL)
+            random.seed()
+            config = uvicorn.Config(
+                self.app,
+                lifespan="on",
+                log_level=self.log_level,
+                limit_max_requests=self._request_limit(),
+            )
+            uvicorn.Server(config).run(sockets=[self.sock])
+            exit_code = 0
+        except Exception:  # pylint: disable=broad-except
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)  # pylint: disable=protected-access
+
+    def _request_limit(self) -> Optional[int]:
+        if self.max_requests <= 0:
+            return None
+        return self.max_requests + random.randint(0, self.max_requests_jitter)
+
+    def _shutdown(self) -> None:
+        logger.info("Shutting down workers")
+        self._signal_workers(signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(REAP_INTERVAL)
+        if self.workers:
+            logger.warning(f"Killing {len(self.workers)} workers after timeout")
+            self._signal_workers(signal.SIGKILL)
+            for pid in list(self.workers):
+                os.waitpid(pid, 0)
+            self.workers.clear()
+        self.sock.close()
+        if self.metrics_directory:
+            shutil.rmtree(self.metrics_directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--max-requests", type=int, default=SERVER_MAX_REQUESTS)
+    parser.add_argument(
+        "--max-requests-jitter", type=int, default=SERVER_MAX_REQUESTS_JITTER
+    )
+    parser.add_argument(
+        "--graceful-timeout", type=float, default=SERVER_GRACEFUL_TIMEOUT
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    started = time.perf_counter()
+    app = preload_app()
+    logger.info(f"Preloaded the app in {time.perf_counter() - started:.2f}s")
+    server = PreforkServer(
+        app,
+        bind_socket(args.host, args.port),
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        log_level=args.log_level,
+    )
+    server.run()
+
+
+if __name__ == "__main__":
+    main()
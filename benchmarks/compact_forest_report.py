@@ -0,0 +1,105 @@
+"""
+Compare the pickled recommendation forest with its compact export.
+
+Reports file size, load time, resident memory added by loading and by
+predicting, predict latency for one recommendation (129 rows) and the
+largest prediction difference. Each format is loaded in a fresh interpreter so RSS numbers are
+not polluted by the other one.
+
+Usage:
+    python -m benchmarks.compact_forest_report
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+MODEL_DIR = os.path.join("app", "clients", "service")
+FILES = {
+    "pickle": os.path.join(MODEL_DIR, "model.pkl"),
+    "compact": os.path.join(MODEL_DIR, "model.cforest"),
+}
+
+
+def rss_kb():
+    """Return the current resident set size in KiB (Linux)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def measure(fmt):
+    """Load one format and measure it; runs inside the child interpreter."""
+    import pickle
+    import warnings
+
+    import numpy as np
+
+    from app.clients.service.compact_forest import load_compact_forest
+
+    warnings.filterwarnings("ignore")
+    if fmt == "pickle":
+        # Import sklearn up front so only the model itself is measured
+        import sklearn.ensemble  # noqa: F401
+
+    rows = np.random.default_rng(42).integers(0, 15, size=(129, 31)).astype(float)
+
+    before = rss_kb()
+    started = time.perf_counter()
+    if fmt == "pickle":
+        with open(FILES["pickle"], "rb") as model_file:
+            model = pickle.load(model_file)
+    else:
+        model = load_compact_forest(FILES["compact"])
+    load_seconds = time.perf_counter() - started
+    after_load = rss_kb()
+
+    model.predict(rows)
+    timings = []
+    for _ in range(50):
+        started = time.perf_counter()
+        predictions = model.predict(rows)
+        timings.append(time.perf_counter() - started)
+
+    return {
+        "file_bytes": os.path.getsize(FILES[fmt]),
+        "load_ms": round(load_seconds * 1000, 2),
+        "rss_after_load_kb": after_load - before,
+        "rss_after_predict_kb": rss_kb() - before,
+        "predict_129_rows_ms": round(float(np.median(timings)) * 1000, 3),
+        "predictions": predictions.tolist(),
+    }
+
+
+def main():
+    if len(sys.argv) > 1:
+        print(json.dumps(measure(sys.argv[1])))
+        return
+
+    results = {}
+    for fmt in FILES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.compact_forest_report", fmt],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results[fmt] = json.loads(output.strip().splitlines()[-1])
+
+    max_diff = max(
+        abs(a - b)
+        for a, b in zip(
+            results["pickle"].pop("predictions"), results["compact"].pop("predictions")
+        )
+    )
+    for fmt, result in results.items():
+        print(fmt, json.dumps(result))
+    print("max_abs_prediction_diff", max_diff)
+
+
+if __name__ == "__main__":
+    main()
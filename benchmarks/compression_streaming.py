@@ -0,0 +1,167 @@
+"""
+Measure streamed and compressed responses for a very large client search.
+
+Builds a throwaway SQLite database with `--scale` copies of the clients in
+sql_app.db and drives GET /clients/search/by-criteria, returning every
+client, through the ASGI app in process. Each mode runs in a fresh
+subprocess so its peak RSS is its own: buffered (one encoded body) or
+streamed (CLIENT_STREAM_CHUNK_ROWS rows at a time), each with and without
+gzip. Reports time to first byte, total time, bytes on the wire and peak RSS.
+
+Usage:
+    python -m benchmarks.compression_streaming --scale 1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+MODES = [
+    ("buffered", "identity"),
+    ("buffered", "gzip"),
+    ("streamed", "identity"),
+    ("streamed", "gzip"),
+]
+
+
+def build_scaled_database(path, scale):
+    """Copy the clients of sql_app.db `scale` times, in SQLite itself."""
+    from benchmarks.sparse_fields import build_database
+
+    engine = build_database(path, 0)
+    with engine.begin() as connection:
+        connection.execute(text("ATTACH DATABASE './sql_app.db' AS source"))
+        columns = ", ".join(
+            row[1]
+            for row in connection.execute(text("PRAGMA source.table_info(clients)"))
+            if row[1] not in ("id", "version")
+        )
+        for _ in range(scale):
+            connection.execute(
+                text(
+                    f"INSERT INTO clients ({columns}) "
+                    f"SELECT {columns} FROM source.clients"
+                )
+            )
+        rows = connection.execute(text("SELECT count(*) FROM clients")).scalar()
+    engine.dispose()
+    return rows
+
+
+async def _request(app, encoding):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/clients/search/by-criteria",
+        "raw_path": b"/clients/search/by-criteria",
+        "query_string": b"age_min=18",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"accept-encoding", encoding.encode())],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+    disconnected = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    stats = {"status": None, "first_byte": None, "bytes": 0}
+    started = time.perf_counter()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            stats["status"] = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            if stats["first_byte"] is None:
+                stats["first_byte"] = time.perf_counter() - started
+            stats["bytes"] += len(message["body"])
+
+    await app(scope, receive, send)
+    stats["total"] = time.perf_counter() - started
+    disconnected.set()
+    return stats
+
+
+def run_mode(path, mode, encoding):
+    """Run one request in this process and return its measurements."""
+    if mode == "buffered":
+        # Larger than any result, so the whole list is encoded in one go
+        os.environ["CLIENT_STREAM_CHUNK_ROWS"] = str(10**9)
+    from sqlalchemy.orm import sessionmaker
+
+    from app.auth.router import get_admin_user
+    from app.database import get_db
+    from app.main import app
+
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    Session = sessionmaker(bind=engine)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_admin_user] = lambda: None
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    stats = asyncio.run(_request(app, encoding))
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    stats.update(baseline_mb=baseline_kb // 1024, peak_mb=peak_kb // 1024)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=int, default=1000)
+    parser.add_argument("--run", nargs=3, metavar=("PATH", "MODE", "ENCODING"))
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_mode(*args.run)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        rows = build_scaled_database(path, args.scale)
+        print(f"rows={rows}")
+        for mode, encoding in MODES:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.compression_streaming"]
+                + ["--run", path, mode, encoding],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{mode:<9} {encoding:<9} status={stats['status']} "
+                f"ttfb_ms={stats['first_byte'] * 1000:.0f} "
+                f"total_ms={stats['total'] * 1000:.0f} "
+                f"wire_mb={stats['bytes'] / 2**20:.1f} "
+                f"peak_rss_mb={stats['peak_mb']} (baseline {stats['baseline_mb']})"
+            )
+
+
+if __name__ == "__main__":
+    main()
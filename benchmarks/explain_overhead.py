@@ -0,0 +1,88 @@
+"""
+Measure what explain=true adds to a recommendation request.
+
+Times plain scoring (build the 129 candidate rows, predict, summarize) against
+scoring plus TreeSHAP attributions for the returned recommendations, and exits
+non-zero when explaining costs more than MAX_OVERHEAD times plain scoring.
+
+Usage:
+    python -m benchmarks.explain_overhead
+"""
+
+import sys
+import time
+import warnings
+
+import numpy as np
+
+MAX_OVERHEAD = 5.0
+REPEATS = 50
+
+CLIENT = {
+    "age": 30,
+    "gender": "2",
+    "work_experience": 5,
+    "canada_workex": 2,
+    "dep_num": 1,
+    "canada_born": "true",
+    "citizen_status": "true",
+    "level_of_schooling": "8",
+    "fluent_english": "true",
+    "reading_english_scale": 8,
+    "speaking_english_scale": 7,
+    "writing_english_scale": 7,
+    "numeracy_scale": 8,
+    "computer_scale": 9,
+    "transportation_bool": "true",
+    "caregiver_bool": "false",
+    "housing": "5",
+    "income_source": "3",
+    "felony_bool": "false",
+    "attending_school": "false",
+    "currently_employed": "false",
+    "substance_use": "false",
+    "time_unemployed": 6,
+    "need_mental_health_support_bool": "false",
+}
+
+
+def median_ms(func):
+    func()
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    warnings.filterwarnings("ignore")
+    from app.clients.service import logic
+
+    started = time.perf_counter()
+    logic.get_explainer()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    def score():
+        rows = logic.build_scoring_rows(CLIENT)
+        predictions = logic.predict_rows(rows)
+        return rows, predictions, logic.summarize_predictions(rows, predictions)
+
+    def score_and_explain():
+        rows, predictions, _ = score()
+        logic.explain_top_recommendations(rows, predictions)
+
+    plain = median_ms(score)
+    explained = median_ms(score_and_explain)
+    ratio = explained / plain
+    print(f"explainer_build_ms {build_ms:.1f}")
+    print(f"score_ms {plain:.2f}")
+    print(f"score_and_explain_ms {explained:.2f}")
+    print(f"overhead_ratio {ratio:.2f} (limit {MAX_OVERHEAD})")
+    if ratio > MAX_OVERHEAD:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compare the ORM/Pydantic and row-tuple/orjson read paths for client lists.
+
+Times GET /clients/search/by-criteria returning every client of a throwaway
+database, with CLIENT_FAST_READS off (ORM entities validated through
+ClientResponse) and on (Core rows encoded directly), and checks that both
+return identical bytes.
+
+Usage:
+    python -m benchmarks.fast_reads --rows 10000
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.router import get_admin_user
+from app.clients import router as clients_router
+from app.database import get_db
+from app.main import app
+from benchmarks.sparse_fields import build_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = build_database(os.path.join(directory, "bench.db"), args.rows)
+        Session = sessionmaker(bind=engine)
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_admin_user] = lambda: None
+        client = TestClient(app)
+        bodies = {}
+        try:
+            for name, fast in (("orm", False), ("fast", True)):
+                clients_router.FAST_READS = fast
+                timings = []
+                for _ in range(args.repeats):
+                    started = time.perf_counter()
+                    response = client.get(
+                        "/clients/search/by-criteria", params={"age_min": 18}
+                    )
+                    timings.append(time.perf_counter() - started)
+                    response.raise_for_status()
+                bodies[name] = response.content
+                print(
+                    f"{name:<5} rows={args.rows} "
+                    f"median_ms={statistics.median(timings) * 1000:.1f} "
+                    f"bytes={len(response.content)}"
+                )
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+        print("identical_bytes", bodies["orm"] == bodies["fast"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Mixed-traffic load test for the inference executor.
+
+Concurrent recommendation requests (CPU-bound) run alongside a stream of
+cheap requests against a locally started server; the script reports the
+p50/p99 latency of both for every executor mode so the effect of moving
+predicts off the event loop is visible. The seeded admin account from
+initialize_data.py is used to log in.
+
+Usage:
+    python -m benchmarks.inference_load [--duration 10] [--heavy 4] [--light 8]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+RECOMMENDATION_INPUT = {
+    "age": 30,
+    "gender": "2",
+    "work_experience": 5,
+    "canada_workex": 2,
+    "dep_num": 1,
+    "canada_born": "true",
+    "citizen_status": "true",
+    "level_of_schooling": "8",
+    "fluent_english": "true",
+    "reading_english_scale": 8,
+    "speaking_english_scale": 7,
+    "writing_english_scale": 7,
+    "numeracy_scale": 8,
+    "computer_scale": 9,
+    "transportation_bool": "true",
+    "caregiver_bool": "false",
+    "housing": "5",
+    "income_source": "3",
+    "felony_bool": "false",
+    "attending_school": "false",
+    "currently_employed": "false",
+    "substance_use": "false",
+    "time_unemployed": 6,
+    "need_mental_health_support_bool": "false",
+}
+
+
+def percentiles(latencies):
+    """Return p50/p99 in milliseconds."""
+    if not latencies:
+        return {"count": 0, "p50_ms": None, "p99_ms": None}
+    values = np.array(latencies) * 1000.0
+    return {
+        "count": len(values),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+    }
+
+
+def free_port():
+    """Pick an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port):
+    """Start uvicorn with the given executor mode and wait until it answers."""
+    env = dict(os.environ, INFERENCE_EXECUTOR=mode)
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/test", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"Server for mode '{mode}' did not start")
+
+
+async def run_load(base_url, duration, heavy, light, username, password):
+    """Drive the server with mixed traffic and collect latencies."""
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        response = await client.post(
+            "/auth/token", data={"username": username, "password": password}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        latencies = {"recommendation": [], "current_model": []}
+        deadline = time.perf_counter() + duration
+
+        async def worker(kind, method, url, **kwargs):
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.request(method, url, **kwargs)
+                if response.status_code == 200:
+                    latencies[kind].append(time.perf_counter() - started)
+
+        await asyncio.gather(
+            *[
+                worker(
+                    "recommendation",
+                    "POST",
+                    "/clients/recommendations",
+                    json=RECOMMENDATION_INPUT,
+                    headers=headers,
+                )
+                for _ in range(heavy)
+            ],
+            *[
+                worker("current_model", "GET", "/ml/current-model")
+                for _ in range(light)
+            ],
+        )
+    return {kind: percentiles(values) for kind, values in latencies.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed-traffic inference load test")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--heavy", type=int, default=4)
+    parser.add_argument("--light", type=int, default=8)
+    parser.add_argument("--modes", default="inline,thread,process")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    args = parser.parse_args()
+
+    # The executor kind is read from the environment at import time, so each
+    # mode gets its own server process
+    for mode in args.modes.split(","):
+        port = free_port()
+        server = start_server(mode, port)
+        try:
+            result = asyncio.run(
+                run_load(
+                    f"http://127.0.0.1:{port}",
+                    args.duration,
+                    args.heavy,
+                    args.light,
+                    args.username,
+                    args.password,
+                )
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        print(mode, json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
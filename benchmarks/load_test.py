@@ -0,0 +1,372 @@
+"""
+End-to-end load test of the API with a stored baseline.
+
+Starts `uvicorn app.main:app` on a copy of sql_app.db (or targets a running
+server with --base-url) and runs each scenario in turn: concurrent clients
+send requests back to back for a fixed duration after a short warm-up.
+Throughput, error count and p50/p95/p99 latency per scenario are written to
+a JSON result file. With --baseline the results are compared against a
+stored result file: a scenario regresses when its throughput drops, or its
+p95 latency grows, by more than --tolerance, and the exit status is then 1.
+The seeded admin account from initialize_data.py is used to log in.
+
+Usage:
+    python -m benchmarks.load_test --duration 10 --concurrency 8 \
+        --output load_results.json --baseline benchmarks/baselines/load_test.json
+    python -m benchmarks.load_test --save-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+from benchmarks.inference_load import RECOMMENDATION_INPUT, free_port
+from benchmarks.prefork import start_server
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "load_test.json")
+SERVICES = [
+    "employment_assistance",
+    "life_stabilization",
+    "retention_services",
+    "specialized_services",
+    "employment_related_financial_supports",
+    "employer_financial_supports",
+    "enhanced_referrals",
+]
+
+
+class Context:
+    """What scenarios need from the seeded database, looked up once."""
+
+    def __init__(self, headers, credentials, client_ids, case_keys, case_worker_id):
+        self.headers = headers
+        self.credentials = credentials
+        self.client_ids = client_ids
+        self.case_keys = case_keys
+        self.case_worker_id = case_worker_id
+
+
+async def prepare(client, username, password):
+    """Log in and collect client ids and case keys to spread requests over."""
+    credentials = {"username": username, "password": password}
+    response = await client.post("/auth/token", data=credentials)
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.get(
+        "/clients/search/by-criteria", params={"fields": "id"}, headers=headers
+    )
+    response.raise_for_status()
+    client_ids = [item["id"] for item in response.json()]
+    # The admin account is the case worker of the seeded cases
+    case_worker_id = 1
+    response = await client.get(
+        f"/clients/case-worker/{case_worker_id}",
+        params={"fields": "id"},
+        headers=headers,
+    )
+    response.raise_for_status()
+    case_keys = [(item["id"], case_worker_id) for item in response.json()]
+    return Context(headers, credentials, client_ids, case_keys, case_worker_id)
+
+
+async def login(client, context):
+    return await client.post("/auth/token", data=context.credentials)
+
+
+async def clients_page(client, context):
+    skip = random.randrange(0, max(len(context.client_ids) - 50, 1))
+    return await client.get(
+        "/clients/", params={"skip": skip, "limit": 50}, headers=context.headers
+    )
+
+
+async def client_by_id(client, context):
+    client_id = random.choice(context.client_ids)
+    return await client.get(f"/clients/{client_id}", headers=context.headers)
+
+
+async def client_services(client, context):
+    client_id = random.choice(context.client_ids)
+    return await client.get(f"/clients/{client_id}/services", headers=context.headers)
+
+
+async def search_by_criteria(client, context):
+    params = {"age_min": random.randint(18, 60), "gender": random.randint(1, 2)}
+    return await client.get(
+        "/clients/search/by-criteria", params=params, headers=context.headers
+    )
+
+
+async def search_by_services(client, context):
+    params = {service: random.random() < 0.5 for service in random.sample(SERVICES, 2)}
+    return await client.get(
+        "/clients/search/by-services", params=params, headers=context.headers
+    )
+
+
+async def search_by_success_rate(client, context):
+    params = {"min_rate": random.randint(50, 100)}
+    return await client.get(
+        "/clients/search/success-rate", params=params, headers=context.headers
+    )
+
+
+async def case_worker_clients(client, context):
+    return await client.get(
+        f"/clients/case-worker/{context.case_worker_id}", headers=context.headers
+    )
+
+
+async def update_services(client, context):
+    client_id, user_id = random.choice(context.case_keys)
+    return await client.put(
+        f"/clients/{client_id}/services/{user_id}",
+        json={"success_rate": random.randint(0, 100)},
+        headers=context.headers,
+    )
+
+
+async def ml_predict(client, context):
+    return await client.post("/ml/predict", json=RECOMMENDATION_INPUT)
+
+
+async def recommendations(client, context):
+    return await client.post(
+        "/clients/recommendations", json=RECOMMENDATION_INPUT, headers=context.headers
+    )
+
+
+SCENARIOS = {
+    "login": login,
+    "clients_page": clients_page,
+    "client_by_id": client_by_id,
+    "client_services": client_services,
+    "search_by_criteria": search_by_criteria,
+    "search_by_services": search_by_services,
+    "search_by_success_rate": search_by_success_rate,
+    "case_worker_clients": case_worker_clients,
+    "update_services": update_services,
+    "ml_predict": ml_predict,
+    "recommendations": recommendations,
+}
+
+
+def latency_summary(latencies):
+    """Percentiles in milliseconds of latencies in seconds."""
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    values = np.array(latencies) * 1000.0
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+async def run_scenario(client, context, scenario, duration, concurrency, warmup):
+    """Drive one scenario from concurrency clients; warm-up calls not counted."""
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    async def worker():
+        nonlocal errors
+        while True:
+            request_started = time.perf_counter()
+            if request_started >= deadline:
+                return
+            try:
+                response = await scenario(client, context)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if request_started < measure_from:
+                continue
+            if ok:
+                latencies.append(time.perf_counter() - request_started)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - measure_from
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        **latency_summary(latencies),
+    }
+
+
+async def run_load_test(base_url, names, args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=args.timeout, limits=limits
+    ) as client:
+        context = await prepare(client, args.username, args.password)
+        results = {}
+        for name in names:
+            results[name] = await run_scenario(
+                client,
+                context,
+                SCENARIOS[name],
+                args.duration,
+                args.concurrency,
+                args.warmup,
+            )
+            print(f"{name:<24} {format_result(results[name])}", flush=True)
+        return results
+
+
+def format_result(result):
+    return (
+        f"rps={result['requests_per_second']:<8} errors={result['errors']:<4} "
+        f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms"
+    )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """
+    Regressions of results against a baseline result file.
+
+    Args:
+        results (dict): Scenario name -> result of this run
+        baseline (dict): Result file to compare against
+        tolerance (float): Allowed relative throughput drop and p95 growth
+
+    Returns:
+        list: One message per regressed metric
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline["scenarios"].get(name)
+        if reference is None:
+            continue
+        if result["errors"] > reference["errors"]:
+            regressions.append(
+                f"{name}: {result['errors']} errors (baseline {reference['errors']})"
+            )
+        if result["requests_per_second"] < reference["requests_per_second"] * (
+            1 - tolerance
+        ):
+            regressions.append(
+                f"{name}: throughput {result['requests_per_second']} req/s "
+                f"(baseline {reference['requests_per_second']})"
+            )
+        if (
+            result["p95_ms"] is not None
+            and reference["p95_ms"] is not None
+            and result["p95_ms"] > reference["p95_ms"] * (1 + tolerance)
+        ):
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']} ms (baseline {reference['p95_ms']})"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", help="Target a running server instead")
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help="Comma-separated scenarios to run, in order",
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--output", default="load_results.json")
+    parser.add_argument("--baseline", help="Result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help=f"Also write the results to {os.path.relpath(BASELINE_PATH)}",
+    )
+    args = parser.parse_args()
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        server = None
+        base_url = args.base_url
+        if base_url is None:
+            # Scenarios write, so the server gets a copy of the seeded database
+            database = os.path.join(directory, "load_test.db")
+            shutil.copy("sql_app.db", database)
+            port = free_port()
+            server = start_server(
+                [sys.executable, "-m", "uvicorn", "app.main:app"], port, database
+            )
+            base_url = f"http://127.0.0.1:{port}"
+        try:
+            results = asyncio.run(run_load_test(base_url, names, args))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+            "duration": args.duration,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        shutil.copy(args.output, BASELINE_PATH)
+        print(f"Baseline written to {BASELINE_PATH}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Measure what the /metrics instrumentation adds to each request.
+
+Runs the app in a subprocess with METRICS_ENABLED=false and then true (it is
+read at import), each on a copy of sql_app.db, and times in-process requests
+to /healthz (middleware only) and GET /clients/{id} (middleware plus SQL
+statement events). Also reports the cost of single counter and histogram
+updates.
+
+Usage:
+    python -m benchmarks.metrics_overhead --requests 2000 --rounds 3
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+URLS = ["/healthz", "/clients/1"]
+
+
+def measure(requests):
+    """Median and mean latency in microseconds of each URL, in this process."""
+    from fastapi.testclient import TestClient
+
+    from app.auth.router import get_admin_user, get_current_user
+    from app.main import app
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app.dependency_overrides[get_admin_user] = lambda: None
+    app.dependency_overrides[get_current_user] = lambda: None
+    client = TestClient(app)
+    results = {}
+    for url in URLS:
+        for _ in range(100):
+            client.get(url).raise_for_status()
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            client.get(url)
+            timings.append(time.perf_counter() - started)
+        results[url] = {
+            "median_us": statistics.median(timings) * 1e6,
+            "mean_us": statistics.fmean(timings) * 1e6,
+        }
+    return results
+
+
+def primitive_costs(iterations=200000):
+    """Nanoseconds per counter increment and histogram observation."""
+    from app.core.metrics import Registry
+
+    registry = Registry()
+    counter = registry.counter("bench_total", "Benchmark", ("route",))
+    histogram = registry.histogram("bench_seconds", "Benchmark", labels=("route",))
+    costs = {}
+    for name, update in (
+        ("counter_inc_ns", lambda: counter.labels("/clients/{id}").inc()),
+        ("histogram_observe_ns", lambda: histogram.labels("/x").observe(0.01)),
+    ):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            update()
+        costs[name] = round((time.perf_counter() - started) / iterations * 1e9)
+    return costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.requests)))
+        return
+
+    # Alternate the modes and keep each one's best round, as SQLite timings
+    # drift between processes
+    results = {"false": {}, "true": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(args.rounds):
+            for enabled in ("false", "true"):
+                database = os.path.join(directory, f"metrics-{enabled}.db")
+                shutil.copy("sql_app.db", database)
+                env = dict(
+                    os.environ,
+                    METRICS_ENABLED=enabled,
+                    DATABASE_URL=f"sqlite:///{database}",
+                )
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.metrics_overhead", "--measure"]
+                    + ["--requests", str(args.requests)],
+                    env=env,
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                measured = json.loads(output.strip().splitlines()[-1])
+                for url, timing in measured.items():
+                    best = results[enabled].get(url)
+                    if best is None or timing["median_us"] < best["median_us"]:
+                        results[enabled][url] = timing
+
+    for url in URLS:
+        off, on = results["false"][url], results["true"][url]
+        overhead = on["median_us"] - off["median_us"]
+        print(
+            f"{url:<12} off_median_us={off['median_us']:.0f} "
+            f"on_median_us={on['median_us']:.0f} "
+            f"overhead_us={overhead:.0f} ({overhead / off['median_us']:+.1%})"
+        )
+    print(primitive_costs())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""
+Micro-benchmarks of the scoring hot paths, with a regression comparison.
+
+`run` times each stage of recommendation scoring (convert_text,
+clean_input_data, create_matrix, build_scoring_rows, the model's predict and
+interpret_and_calculate), the /ml/predict input validation and feature
+encoding, and the predict of every ModelManager model, on batches of records
+built from data_commontool.csv. Each stage and batch size is called in a loop
+long enough for the clock (garbage collection off, as timeit does); --samples
+rounds time every loop once, and each call is then repeated under tracemalloc
+for its peak memory and the memory it keeps (its result). Results go to a JSON
+file with the raw samples and the environment they were measured in.
+
+`compare` tests, per stage and batch size, whether the timings of two runs
+differ (two-sided Mann-Whitney U test on the samples): a change is significant
+when p < --alpha and the medians differ by more than --min-change. Peak memory
+is deterministic and compared directly. A fixed reference workload is timed
+along with the stages; its ratio between the runs shows how much the machine
+itself sped up or slowed down, and --normalize divides it out. The exit status
+is 1 when anything regressed.
+
+Usage:
+    python -m benchmarks.micro run --sizes 1,64 --output micro_before.json
+    python -m benchmarks.micro run --sizes 1,64 --output micro_after.json
+    python -m benchmarks.micro compare micro_before.json micro_after.json \
+        --normalize
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+from scipy.stats import mannwhitneyu
+
+from benchmarks.load_test import git_commit
+
+# Memory changes below this are noise from interning and free lists
+MIN_MEMORY_CHANGE_BYTES = 1024
+# Timed with every run to tell how fast the machine was
+REFERENCE_STAGE = "reference"
+_REFERENCE_MATRIX = np.arange(10000, dtype=np.float64).reshape(100, 100) / 1e4
+
+
+def reference_workload():
+    """Run fixed interpreter and NumPy work that no change to the app affects."""
+    total = 0
+    for value in range(2000):
+        total += value % 7
+    return total + float((_REFERENCE_MATRIX @ _REFERENCE_MATRIX).sum())
+
+
+def records(size):
+    """
+    Front-end style inputs (text answers) from data_commontool.csv rows.
+
+    Args:
+        size (int): Number of records, cycling through the CSV
+
+    Returns:
+        list: One dict per record, every value a string
+    """
+    from app.clients.service.logic import COLUMN_FEATURES
+    from app.clients.service.synthetic import BOOLEAN_COLUMNS, load_csv
+
+    columns = load_csv()
+    rows = len(columns["age"])
+    return [
+        {
+            name: (
+                ("true" if columns[name][index % rows] else "false")
+                if name in BOOLEAN_COLUMNS
+                else str(columns[name][index % rows])
+            )
+            for name in COLUMN_FEATURES
+        }
+        for index in range(size)
+    ]
+
+
+def build_stages(size, models):
+    """
+    Build the benchmarked calls for one batch size.
+
+    Inputs are prepared here, outside the timed calls.
+
+    Args:
+        size (int): Records per call
+        models (dict): ModelManager.available_models
+
+    Returns:
+        dict: Stage name -> function of no arguments processing size records
+    """
+    from app.clients.schema import PredictionInput
+    from app.clients.service import logic
+    from app.models.router import encode_features
+
+    batch = records(size)
+    texts = [value for record in batch for value in record.values()]
+    cleaned = [logic.clean_input_data(record) for record in batch]
+    scoring_rows = np.concatenate([logic.build_scoring_rows(r) for r in batch])
+    inputs = [PredictionInput(**record) for record in batch]
+    features = np.array([encode_features(data) for data in inputs])
+
+    stages = {
+        "logic.convert_text": lambda: [logic.convert_text(text) for text in texts],
+        "logic.clean_input_data": lambda: [
+            logic.clean_input_data(record) for record in batch
+        ],
+        "logic.create_matrix": lambda: [logic.create_matrix(row) for row in cleaned],
+        "logic.build_scoring_rows": lambda: [
+            logic.build_scoring_rows(record) for record in batch
+        ],
+        # All candidate rows of the batch in one predict, as the batcher does
+        "logic.predict_rows": lambda: logic.predict_rows(scoring_rows),
+        "logic.interpret_and_calculate": lambda: [
+            logic.interpret_and_calculate(record) for record in batch
+        ],
+        "ml_predict.validate": lambda: [PredictionInput(**record) for record in batch],
+        "ml_predict.encode_features": lambda: [
+            encode_features(data) for data in inputs
+        ],
+    }
+    for name, model in models.items():
+        stages[f"model_manager.predict.{name}"] = lambda model=model: model.predict(
+            features
+        )
+    return stages
+
+
+def calibrate(func, min_time):
+    """
+    Return the calls per sample so that a sample takes at least min_time.
+
+    Doubles the loop count from 1, so short calls are not dominated by clock
+    resolution.
+    """
+    func()
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - started >= min_time:
+            return loops
+        loops *= 2
+
+
+def time_sample(func, loops):
+    """Seconds per call of func over loops calls, garbage collection off."""
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        return (time.perf_counter() - started) / loops
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def memory_usage(func):
+    """Peak and retained bytes allocated by one call, traced by tracemalloc."""
+    tracemalloc.start()
+    try:
+        func()
+        gc.collect()
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak - before, current - before
+
+
+def environment():
+    import sklearn
+
+    cpu = platform.processor()
+    with contextlib.suppress(OSError), open("/proc/cpuinfo") as file:
+        cpu = next(
+            (
+                line.split(":", 1)[1].strip()
+                for line in file
+                if line.startswith("model name")
+            ),
+            cpu,
+        )
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu": cpu,
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "scikit_learn": sklearn.__version__,
+        "recommendation_model_format": os.getenv(
+            "RECOMMENDATION_MODEL_FORMAT", "pickle"
+        ),
+    }
+
+
+def run(args):
+    from app.core.model_manager import ModelManager
+
+    warnings.filterwarnings("ignore")
+    # Trains the models on the clients of DATABASE_URL, like the app does
+    models = ModelManager().available_models
+    benchmarks = [(REFERENCE_STAGE, 1, reference_workload)] + [
+        (name, size, func)
+        for size in args.sizes
+        for name, func in build_stages(size, models).items()
+        if not args.stages or any(name.startswith(s) for s in args.stages)
+    ]
+    loops = [calibrate(func, args.min_time) for _, _, func in benchmarks]
+    # One sample of every benchmark per round: machine load drifting during
+    # the run spreads over every benchmark's samples instead of shifting some
+    timings = [[] for _ in benchmarks]
+    for _ in range(args.samples):
+        for index, (_, _, func) in enumerate(benchmarks):
+            timings[index].append(time_sample(func, loops[index]))
+
+    results = []
+    for (name, size, func), count, samples in zip(benchmarks, loops, timings):
+        peak, retained = memory_usage(func)
+        median = statistics.median(samples)
+        result = {
+            "stage": name,
+            "size": size,
+            "loops": count,
+            "samples_us": [round(value * 1e6, 3) for value in samples],
+            "median_us": round(median * 1e6, 3),
+            "mean_us": round(statistics.mean(samples) * 1e6, 3),
+            "stdev_us": round(statistics.stdev(samples) * 1e6, 3),
+            "per_record_us": round(median * 1e6 / size, 3),
+            "peak_bytes": peak,
+            "retained_bytes": retained,
+        }
+        results.append(result)
+        print(
+            f"{name:<42} size={size:<5} median={result['median_us']:>12.1f}us "
+            f"per_record={result['per_record_us']:>10.1f}us "
+            f"peak={peak / 1024:>9.1f}KiB"
+        )
+    report = {"meta": {**environment(), "samples": args.samples}, "results": results}
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def compare_runs(baseline, current, alpha, min_change, normalize=False):
+    """
+    Significant changes between two result files.
+
+    Args:
+        baseline (dict): Result file of the reference run
+        current (dict): Result file of the run under test
+        alpha (float): Significance level of the Mann-Whitney U test
+        min_change (float): Smallest relative change of the median reported
+        normalize (bool): Scale the current timings by how much faster the
+            machine ran the reference workload
+
+    Returns:
+        list: One entry per stage and size in both runs, with a status of
+        regressed, improved or unchanged
+    """
+    reference = {(r["stage"], r["size"]): r for r in baseline["results"]}
+    factor = machine_factor(baseline, current) if normalize else 1.0
+    rows = []
+    for result in current["results"]:
+        before = reference.get((result["stage"], result["size"]))
+        if before is None or result["stage"] == REFERENCE_STAGE:
+            continue
+        samples = [value / factor for value in result["samples_us"]]
+        ratio = statistics.median(samples) / before["median_us"]
+        p_value = float(
+            mannwhitneyu(before["samples_us"], samples, alternative="two-sided").pvalue
+        )
+        status = "unchanged"
+        if p_value < alpha and ratio > 1 + min_change:
+            status = "regressed"
+        elif p_value < alpha and ratio < 1 - min_change:
+            status = "improved"
+        memory_change = result["peak_bytes"] - before["peak_bytes"]
+        memory_status = "unchanged"
+        if abs(memory_change) >= max(
+            MIN_MEMORY_CHANGE_BYTES, before["peak_bytes"] * min_change
+        ):
+            memory_status = "regressed" if memory_change > 0 else "improved"
+        rows.append(
+            {
+                "stage": result["stage"],
+                "size": result["size"],
+                "baseline_us": before["median_us"],
+                "current_us": round(statistics.median(samples), 3),
+                "ratio": round(ratio, 3),
+                "p_value": p_value,
+                "status": status,
+                "baseline_peak_bytes": before["peak_bytes"],
+                "current_peak_bytes": result["peak_bytes"],
+                "memory_status": memory_status,
+            }
+        )
+    return rows
+
+
+def machine_factor(baseline, current):
+    """Median time of the reference workload in current over baseline."""
+    medians = [
+        next(
+            (r["median_us"] for r in run["results"] if r["stage"] == REFERENCE_STAGE),
+            None,
+        )
+        for run in (baseline, current)
+    ]
+    if None in medians:
+        return 1.0
+    return medians[1] / medians[0]
+
+
+def compare(args):
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    for key in (
+        "python",
+        "numpy",
+        "scikit_learn",
+        "cpu",
+        "recommendation_model_format",
+    ):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(
+                f"WARNING {key} differs: {baseline['meta'].get(key)} "
+                f"-> {current['meta'].get(key)}"
+            )
+    factor = machine_factor(baseline, current)
+    print(
+        f"Reference workload x{factor:.3f}"
+        + (" (current timings scaled by its inverse)" if args.normalize else "")
+    )
+    rows = compare_runs(baseline, current, args.alpha, args.min_change, args.normalize)
+    regressions = 0
+    for row in rows:
+        flags = []
+        if row["status"] != "unchanged":
+            flags.append(f"time {row['status']}")
+        if row["memory_status"] != "unchanged":
+            flags.append(f"memory {row['memory_status']}")
+        regressions += "regressed" in (row["status"], row["memory_status"])
+        print(
+            f"{row['stage']:<42} size={row['size']:<5} "
+            f"{row['baseline_us']:>11.1f}us -> {row['current_us']:>11.1f}us "
+            f"x{row['ratio']:<6} p={row['p_value']:<8.2g} "
+            f"peak {row['baseline_peak_bytes'] / 1024:.1f}"
+            f"->{row['current_peak_bytes'] / 1024:.1f}KiB "
+            f"{', '.join(flags).upper()}"
+        )
+    if regressions:
+        print(
+            f"{regressions} regressions (alpha={args.alpha}, min change "
+            f"{args.min_change:.0%})"
+        )
+        sys.exit(1)
+    print(f"No regressions (alpha={args.alpha}, min change {args.min_change:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Time every stage")
+    run_parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=[1, 64],
+        help="Comma-separated batch sizes (records per call)",
+    )
+    run_parser.add_argument(
+        "--stages",
+        type=lambda value: [name.strip() for name in value.split(",")],
+        help="Comma-separated stage name prefixes to run (default: all)",
+    )
+    run_parser.add_argument("--samples", type=int, default=20)
+    run_parser.add_argument(
+        "--min-time", type=float, default=0.02, help="Seconds per sample, at least"
+    )
+    run_parser.add_argument("--output", default="micro_results.json")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--alpha", type=float, default=0.01)
+    compare_parser.add_argument("--min-change", type=float, default=0.1)
+    compare_parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="Correct for machine speed with the reference workload",
+    )
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Compare the single-process server with the pre-fork server.
+
+Starts `uvicorn app.main:app` and `python -m app.server --workers N` in
+turn, each on a copy of sql_app.db, drives them with concurrent
+recommendation requests and reports aggregate throughput, latency and the
+memory of every process before and after the load. RSS counts shared pages
+in every process that maps them; PSS splits them between those processes
+(so summing PSS gives the real footprint) and USS counts only the pages a
+process has to itself. The seeded admin account from initialize_data.py is
+used to log in.
+
+Usage:
+    python -m benchmarks.prefork --workers 4 --duration 15 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.inference_load import RECOMMENDATION_INPUT, free_port, percentiles
+
+
+def memory(pid):
+    """RSS, PSS and USS of a process in MB, from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as smaps:
+        for line in smaps:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": round(fields["Rss"], 1),
+        "pss_mb": round(fields["Pss"], 1),
+        "uss_mb": round(fields["Private_Clean"] + fields["Private_Dirty"], 1),
+    }
+
+
+def server_processes(pid):
+    """Return the server process followed by its children (the pre-fork workers)."""
+    with open(f"/proc/{pid}/task/{pid}/children") as children:
+        return [pid] + [int(child) for child in children.read().split()]
+
+
+def start_server(command, port, database):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}")
+    server = subprocess.Popen(
+        command + ["--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 180
+    while time.time() < deadline:
+        try:
+            response = httpx.get(f"http://127.0.0.1:{port}/readyz", timeout=1)
+            if response.status_code == 200:
+                return server
+        except httpx.TransportError:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"{command} did not become ready")
+
+
+async def run_load(base_url, duration, concurrency, username, password):
+    """Send recommendation requests from concurrency clients for duration."""
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=60, limits=limits
+    ) as client:
+        response = await client.post(
+            "/auth/token", data={"username": username, "password": password}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/clients/recommendations",
+                    json=RECOMMENDATION_INPUT,
+                    headers=headers,
+                )
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "errors": errors,
+        **percentiles(latencies),
+    }
+
+
+def report_memory(label, pid):
+    processes = server_processes(pid)
+    usage = [memory(process) for process in processes]
+    for process, process_usage in zip(processes, usage):
+        role = "server" if process == pid else "worker"
+        print(f"  {label:<7} {role} {process}: {process_usage}")
+    total_pss = sum(process_usage["pss_mb"] for process_usage in usage)
+    print(f"  {label:<7} total PSS: {total_pss:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    args = parser.parse_args()
+
+    setups = {
+        "single": [sys.executable, "-m", "uvicorn", "app.main:app"],
+        f"prefork x{args.workers}": [
+            sys.executable,
+            "-m",
+            "app.server",
+            "--workers",
+            str(args.workers),
+        ],
+    }
+    print(f"{os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, command in setups.items():
+            database = os.path.join(directory, "bench.db")
+            shutil.copy("sql_app.db", database)
+            port = free_port()
+            server = start_server(command, port, database)
+            try:
+                print(name)
+                report_memory("before", server.pid)
+                result = asyncio.run(
+                    run_load(
+                        f"http://127.0.0.1:{port}",
+                        args.duration,
+                        args.concurrency,
+                        args.username,
+                        args.password,
+                    )
+                )
+                report_memory("after", server.pid)
+                print(f"  load: {result}")
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
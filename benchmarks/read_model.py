@@ -0,0 +1,85 @@
+"""
+Compare client searches served by joins and by the client_overview read model.
+
+Builds a throwaway database of synthetic clients with their cases spread
+over a few case workers (app.clients.service.synthetic), then times the search
+endpoints with CLIENT_READ_MODEL off (joins over client_cases) and on.
+
+Usage:
+    python -m benchmarks.read_model --rows 50000
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.router import get_admin_user, get_current_user
+from app.clients.service import client_service
+from app.clients.service.synthetic import SyntheticGenerator, write_database
+from app.database import get_db
+from app.main import app
+from benchmarks.sparse_fields import build_database
+
+CASE_WORKERS = 5
+# Only ids are returned, so timings are dominated by the query, not encoding
+SEARCHES = [
+    ("/clients/search/by-services", {"employment_assistance": True, "fields": "id"}),
+    ("/clients/search/success-rate", {"min_rate": 70, "fields": "id"}),
+    ("/clients/case-worker/3", {"fields": "id"}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = build_database(os.path.join(directory, "bench.db"), 0)
+        generator = SyntheticGenerator.from_csv(
+            seed=args.seed, case_workers=CASE_WORKERS
+        )
+        write_database(generator, engine, args.rows)
+        Session = sessionmaker(bind=engine)
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_admin_user] = lambda: None
+        app.dependency_overrides[get_current_user] = lambda: None
+        client = TestClient(app)
+        try:
+            for url, params in SEARCHES:
+                for name, read_model in (("joins", False), ("read_model", True)):
+                    client_service.READ_MODEL = read_model
+                    timings = []
+                    for _ in range(args.repeats):
+                        started = time.perf_counter()
+                        response = client.get(url, params=params)
+                        timings.append(time.perf_counter() - started)
+                        response.raise_for_status()
+                    print(
+                        f"{url:<30} {name:<10} rows={len(response.json())} "
+                        f"median_ms={statistics.median(timings) * 1000:.1f}"
+                    )
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Measure sparse fieldsets on a large client search.
+
+Builds a throwaway SQLite database with many copies of the clients in
+sql_app.db and times GET /clients/search/by-criteria in process, returning
+every client, once with all fields and once per sparse fieldset. Reports
+median latency and response size.
+
+Usage:
+    python -m benchmarks.sparse_fields --rows 50000
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.router import get_admin_user
+from app.database import Base, get_db
+from app.main import app
+from app.models import Client
+
+FIELDSETS = [None, "age,gender,currently_employed,time_unemployed", "age"]
+
+
+def build_database(path, rows):
+    source = create_engine("sqlite:///./sql_app.db")
+    columns = [c for c in Client.__table__.columns if c.name not in ("id", "version")]
+    with source.connect() as connection:
+        seed = [dict(row._mapping) for row in connection.execute(select(*columns))]
+
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for start in range(0, rows, len(seed)):
+            connection.execute(insert(Client), seed[: rows - start])
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = build_database(os.path.join(directory, "bench.db"), args.rows)
+        Session = sessionmaker(bind=engine)
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_admin_user] = lambda: None
+        client = TestClient(app)
+        try:
+            for fields in FIELDSETS:
+                params = {"age_min": 18}
+                if fields:
+                    params["fields"] = fields
+                timings = []
+                for _ in range(args.repeats):
+                    started = time.perf_counter()
+                    response = client.get("/clients/search/by-criteria", params=params)
+                    timings.append(time.perf_counter() - started)
+                    response.raise_for_status()
+                print(
+                    f"fields={fields or 'all':<48} rows={len(response.json())} "
+                    f"median_ms={statistics.median(timings) * 1000:.1f} "
+                    f"bytes={len(response.content)}"
+                )
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
-import pandas as pd
+import csv
 
 from app.auth.router import get_password_hash
 from app.database import SessionLocal
 from app.models import Client, ClientCase, User, UserRole
 
+CSV_PATH = "app/clients/service/data_commontool.csv"
+
 
 def initialize_database():
     print("Starting database initialization...")
@@ -39,33 +41,16 @@ def initialize_database():
         else:
             print("Case worker already exists")
 
-        # Load CSV data
+        # Load CSV data; every column holds an integer, flags are 0 or 1
         print("Loading CSV data...")
-        df = pd.read_csv("app/clients/service/data_commontool.csv")
-
-        # Convert data types
-        integer_columns = [
-            "age",
-            "gender",
-            "work_experience",
-            "canada_workex",
-            "dep_num",
-            "level_of_schooling",
-            "reading_english_scale",
-            "speaking_english_scale",
-            "writing_english_scale",
-            "numeracy_scale",
-            "computer_scale",
-            "housing",
-            "income_source",
-            "time_unemployed",
-            "success_rate",
-        ]
-        for col in integer_columns:
-            df[col] = pd.to_numeric(df[col], errors="raise")
+        with open(CSV_PATH, newline="") as csv_file:
+            rows = [
+                {column: int(value) for column, value in record.items()}
+                for record in csv.DictReader(csv_file)
+            ]
 
         # Process each row in CSV
-        for _, row in df.iterrows():
+        for row in rows:
             # Create client
             client = Client(
                 age=int(row["age"]),
@@ -6,11 +6,11 @@ mkdir -p /code/data
 
 # Create a Python script to create the database tables
 cat > create_tables.py << 'EOF'
-from app.database import engine
-from app.models import Base
+import app.models  # noqa: F401 (registers every table)
+from app.database import engine, prepare_database
 
 print("Creating database tables...")
-Base.metadata.create_all(bind=engine)
+prepare_database(engine)
 print("Database tables created successfully!")
 EOF
 
@@ -20,5 +20,6 @@ python create_tables.py
 # Initialize the database with sample data
 python initialize_data.py
 
-# Start the application
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000
+# Start the application: the models are loaded once, then SERVER_WORKERS
+# (default: one per CPU) workers are forked and share them
+exec python -m app.server --host 0.0.0.0 --port 8000
@@ -1,9 +1,12 @@
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.auth.router import get_password_hash
+from app.core.profiling import N_PLUS_ONE_THRESHOLD, capture_statements
 from app.database import Base, get_db
 from app.main import app
 from app.models import Client, ClientCase, User, UserRole
@@ -174,3 +177,23 @@ def admin_headers(admin_token):
 @pytest.fixture
 def case_worker_headers(case_worker_token):
     return {"Authorization": f"Bearer {case_worker_token}"}
+
+
+@pytest.fixture
+def sql_budget():
+    """
+    Context manager asserting the SQL a block issues on the test database.
+
+    with sql_budget(2): client.get(...) fails if the request issues more than
+    two statements, or one statement shape N_PLUS_ONE_THRESHOLD times.
+    """
+
+    @contextmanager
+    def budget(max_statements, max_repeats=N_PLUS_ONE_THRESHOLD - 1):
+        with capture_statements(engine) as profile:
+            yield profile
+        report = profile.report()
+        assert len(profile) <= max_statements, report
+        assert not profile.repeated(max_repeats + 1), report
+
+    return budget
@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.core.batching import MicroBatcher
+from app.core.executor import InferenceExecutor
+
+
+class RecordingModel:
+    """Stand-in model that records the size of every predict call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, rows):
+        self.calls.append(len(rows))
+        return rows.sum(axis=1)
+
+
+def test_concurrent_requests_are_coalesced():
+    model = RecordingModel()
+    batcher = MicroBatcher("test_coalesce", model.predict, window_ms=20)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit([1, 2]),
+            batcher.submit([[3, 4], [5, 6]]),
+            batcher.submit([7, 8]),
+        )
+
+    results = asyncio.run(run())
+    assert model.calls == [4]
+    assert [r.tolist() for r in results] == [[3.0], [7.0, 11.0], [15.0]]
+
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] == 1
+    assert stats["batch_size"]["sum"] == 4
+    assert stats["queue_wait_seconds"]["count"] == 3
+
+
+def test_max_batch_rows_flushes_early():
+    model = RecordingModel()
+    batcher = MicroBatcher(
+        "test_max_rows", model.predict, window_ms=10_000, max_batch_rows=2
+    )
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit([i, i]) for i in range(4)))
+
+    results = asyncio.run(run())
+    assert model.calls == [2, 2]
+    assert [r.tolist() for r in results] == [[0.0], [2.0], [4.0], [6.0]]
+
+
+def test_prediction_errors_reach_every_caller():
+    def failing_predict(rows):
+        raise ValueError("model exploded")
+
+    batcher = MicroBatcher("test_errors", failing_predict, window_ms=5)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit([1]), batcher.submit([2]), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_process_executor_uses_preloaded_models():
+    executor = InferenceExecutor(kind="process", workers=1)
+    executor.register_model("sum", RecordingModel())
+    try:
+        result = asyncio.run(executor.run("sum", np.ones((2, 3))))
+    finally:
+        executor.shutdown()
+    assert result.tolist() == [3.0, 3.0]
+
+
+class SlowModel:
+    def predict(self, rows):
+        time.sleep(0.2)
+        return rows.sum(axis=1)
+
+
+def test_registering_a_model_keeps_queued_predictions():
+    executor = InferenceExecutor(kind="process", workers=1)
+    executor.register_model("slow", SlowModel())
+
+    async def run():
+        queued = [
+            asyncio.create_task(executor.run("slow", np.ones((1, 2)))) for _ in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        # Restarts the pool for the new model, without cancelling the queue
+        executor.register_model("sum", RecordingModel())
+        results = await asyncio.gather(*queued)
+        return results, await executor.run("sum", np.ones((1, 3)))
+
+    try:
+        results, added = asyncio.run(run())
+    finally:
+        executor.shutdown()
+    assert [result.tolist() for result in results] == [[2.0]] * 3
+    assert added.tolist() == [3.0]
+
+
+def test_executor_queue_is_bounded():
+    release = threading.Event()
+
+    class BlockingModel:
+        def predict(self, rows):
+            release.wait(5)
+            return rows
+
+    executor = InferenceExecutor(kind="thread", workers=1, max_pending=1)
+    executor.register_model("blocking", BlockingModel())
+
+    async def run():
+        first = asyncio.create_task(executor.run("blocking", np.ones((1, 1))))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as exc_info:
+            await executor.run("blocking", np.ones((1, 1)))
+        release.set()
+        await first
+        return exc_info.value.status_code
+
+    try:
+        assert asyncio.run(run()) == 503
+    finally:
+        executor.shutdown()
+
+
+def test_recommendations_match_unbatched_logic(client, admin_headers):
+    from app.clients.service.logic import interpret_and_calculate
+
+    data = {
+        "age": 30,
+        "gender": "2",
+        "work_experience": 5,
+        "canada_workex": 2,
+        "dep_num": 1,
+        "canada_born": "true",
+        "citizen_status": "true",
+        "level_of_schooling": "8",
+        "fluent_english": "true",
+        "reading_english_scale": 8,
+        "speaking_english_scale": 7,
+        "writing_english_scale": 7,
+        "numeracy_scale": 8,
+        "computer_scale": 9,
+        "transportation_bool": "true",
+        "caregiver_bool": "false",
+        "housing": "5",
+        "income_source": "3",
+        "felony_bool": "false",
+        "attending_school": "false",
+        "currently_employed": "false",
+        "substance_use": "false",
+        "time_unemployed": 6,
+        "need_mental_health_support_bool": "false",
+    }
+    response = client.post("/clients/recommendations", json=data, headers=admin_headers)
+    assert response.status_code == 200
+    expected = interpret_and_calculate(data)
+    body = response.json()
+    assert body["baseline"] == pytest.approx(expected["baseline"])
+    assert [names for _, names in body["interventions"]] == [
+        names for _, names in expected["interventions"]
+    ]
+    assert np.allclose(
+        [score for score, _ in body["interventions"]],
+        [score for score, _ in expected["interventions"]],
+    )
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import threading
+import time
+
+from fastapi import status
+from sqlalchemy import select
+
+from app.changes import service as change_service
+from app.changes.consumer import ChangeFeedConsumer, apply_change
+from app.models import ChangeLog, Client, ClientCase
+from tests.conftest import TestingSessionLocal, engine
+from tests.test_ingest import VALID_CLIENT
+
+
+def _table_rows():
+    with engine.connect() as connection:
+        rows = {}
+        for entity, model in (("client", Client), ("client_case", ClientCase)):
+            for row in connection.execute(select(model.__table__)):
+                data = dict(row._mapping)
+                user_id = data.get("user_id")
+                client_id = data["id"] if entity == "client" else data["client_id"]
+                rows[(entity, client_id, user_id)] = data
+        return rows
+
+
+def test_change_log_entries(client, admin_token, admin_headers):
+    """Test the entries written for single and bulk writes"""
+    consumer = ChangeFeedConsumer(http=client, token=admin_token, wait=0)
+    initial = consumer.poll()
+    assert [c["op"] for c in initial] == ["insert"] * 4
+
+    client.put("/clients/1", json={"age": 40}, headers=admin_headers)
+    client.post(
+        "/clients/case-assignments/reassign",
+        json={"from_case_worker_id": 2, "to_case_worker_id": 1},
+        headers=admin_headers,
+    )
+    changes = consumer.poll()
+    assert [(c["entity"], c["op"], c["client_id"], c["user_id"]) for c in changes] == [
+        ("client", "update", 1, None),
+        ("client_case", "insert", 2, 1),
+        ("client_case", "delete", 2, 2),
+    ]
+    assert changes[0]["data"]["age"] == 40
+    assert changes[0]["version"] == 2
+    assert changes[2]["data"] is None
+    assert [c["seq"] for c in initial + changes] == sorted(
+        c["seq"] for c in initial + changes
+    )
+    assert consumer.poll() == []
+
+
+def test_consumer_rebuilds_state(client, admin_token, admin_headers):
+    """Test that applying the feed reproduces the tables"""
+    consumer = ChangeFeedConsumer(http=client, token=admin_token, wait=0)
+    rows = {}
+    client.patch(
+        "/clients/services/bulk",
+        json={"filter": {"employment_assistance": True}, "patch": {"success_rate": 5}},
+        headers=admin_headers,
+    )
+    client.post(
+        "/clients/bulk",
+        content="\n".join([json.dumps(VALID_CLIENT)] * 3),
+        headers={**admin_headers, "Content-Type": "application/x-ndjson"},
+    )
+    client.post(
+        "/clients/case-assignments/bulk",
+        json={"assignments": [{"client_id": 3, "user_id": 2}]},
+        headers=admin_headers,
+    )
+    client.delete("/clients/1", headers=admin_headers)
+    for change in consumer.poll():
+        apply_change(rows, change)
+    assert rows == _table_rows()
+
+
+def test_rolled_back_changes_are_not_logged(test_db):
+    """Test that only committed changes reach the log"""
+    before = test_db.query(ChangeLog).count()
+    test_db.get(Client, 1).age = 50
+    test_db.flush()
+    test_db.rollback()
+    test_db.commit()
+    assert test_db.query(ChangeLog).count() == before
+
+
+def test_long_poll_wakes_on_commit(test_db, monkeypatch):
+    """Test that a waiting poll returns as soon as this process commits"""
+    monkeypatch.setattr(change_service, "CHANGE_FEED_POLL_SECONDS", 30)
+    since = change_service.get_changes(test_db)[-1]["seq"]
+
+    def update_client():
+        db = TestingSessionLocal()
+        try:
+            db.get(Client, 2).age = 33
+            db.commit()
+        finally:
+            db.close()
+
+    async def wait_and_update():
+        waiting = asyncio.create_task(
+            change_service.wait_for_changes(test_db, since, timeout=10)
+        )
+        await asyncio.sleep(0.1)
+        await asyncio.get_running_loop().run_in_executor(None, update_client)
+        return await waiting
+
+    started = time.monotonic()
+    changes = asyncio.run(wait_and_update())
+    assert time.monotonic() - started < 5
+    assert [(c["client_id"], c["data"]["age"]) for c in changes] == [(2, 33)]
+
+
+def test_long_poll_reads_off_the_event_loop(test_db, monkeypatch):
+    """Test that the blocking change query does not run on the event loop"""
+    threads = []
+    get_changes = change_service.get_changes
+
+    def record_thread(*args):
+        threads.append(threading.get_ident())
+        return get_changes(*args)
+
+    monkeypatch.setattr(change_service, "get_changes", record_thread)
+    assert asyncio.run(change_service.wait_for_changes(test_db, 0))
+    assert threads and threading.get_ident() not in threads
+
+
+def test_stream_changes(test_db):
+    """Test the server-sent events for logged changes"""
+
+    async def first_events(count):
+        stream = change_service.stream_changes(test_db, since=2)
+        return [await stream.__anext__() for _ in range(count)]
+
+    events = asyncio.run(first_events(3))
+    assert events[0] == b"retry: 1000\n\n"
+    assert events[1].startswith(b"id: 3\nevent: change\ndata: {")
+    assert json.loads(events[2].split(b"data: ")[1])["seq"] == 4
+
+
+def test_changes_requires_admin(client, case_worker_headers):
+    """Test that only admins can read the feed"""
+    response = client.get("/changes/", headers=case_worker_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = client.get("/changes/stream")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
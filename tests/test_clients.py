@@ -1,5 +1,37 @@
+import pytest
 from fastapi import status
 
+from app.clients.repository import case_repository
+from app.models import ClientCase
+
+
+@pytest.fixture(params=["on_conflict", "lookup"])
+def case_inserts(request, monkeypatch):
+    """Insert cases with ON CONFLICT, or as on a dialect without it"""
+    if request.param == "lookup":
+        monkeypatch.setattr(case_repository, "CONFLICT_DIALECTS", {})
+    return request.param
+
+
+@pytest.fixture
+def second_case(test_db):
+    """Give client 1 a second case, with case worker 2, matching its first"""
+    test_db.add(
+        ClientCase(
+            client_id=1,
+            user_id=2,
+            employment_assistance=True,
+            life_stabilization=True,
+            retention_services=False,
+            specialized_services=False,
+            employment_related_financial_supports=True,
+            employer_financial_supports=False,
+            enhanced_referrals=True,
+            success_rate=80,
+        )
+    )
+    test_db.commit()
+
 
 # Test GET Operations
 def test_get_clients_unauthorized(client):
@@ -100,6 +132,21 @@ def test_get_clients_by_case_worker(client, admin_headers, case_worker_headers):
     assert response.status_code == status.HTTP_200_OK
 
 
+def test_case_searches_list_each_client_once(client, admin_headers, second_case):
+    """Test that a client with several matching cases is listed once"""
+    for url, params, expected in [
+        ("/clients/search/by-services", {"employment_assistance": True}, [1, 2]),
+        ("/clients/search/by-services", {"enhanced_referrals": True}, [1]),
+        ("/clients/case-worker/2", {}, [1, 2]),
+    ]:
+        for fields in ({}, {"fields": "age"}):
+            response = client.get(
+                url, params={**params, **fields}, headers=admin_headers
+            )
+            assert response.status_code == status.HTTP_200_OK
+            assert sorted(item["id"] for item in response.json()) == expected
+
+
 # Test UPDATE Operations
 def test_update_client(client, admin_headers):
     """Test updating client information"""
@@ -131,6 +178,153 @@ def test_create_case_assignment(client, admin_headers):
     assert response.status_code == status.HTTP_400_BAD_REQUEST
 
 
+# Test Bulk Case Assignment
+def test_bulk_case_assignment(client, admin_headers, case_inserts):
+    """Test creating many case assignments at once"""
+    payload = {
+        "assignments": [
+            {"client_id": 1, "user_id": 2},
+            {"client_id": 1, "user_id": 1},
+            {"client_id": 1, "user_id": 2},
+            {"client_id": 999, "user_id": 1},
+            {"client_id": 2, "user_id": 999},
+        ]
+    }
+    response = client.post(
+        "/clients/case-assignments/bulk", json=payload, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["created"] == [{"client_id": 1, "user_id": 2}]
+    assert data["skipped"] == [{"client_id": 1, "user_id": 1}]
+    assert [(item["client_id"], item["user_id"]) for item in data["invalid"]] == [
+        (999, 1),
+        (2, 999),
+    ]
+
+    response = client.get("/clients/case-worker/2", headers=admin_headers)
+    assert {c["id"] for c in response.json()} == {1, 2}
+
+
+def test_reassign_cases(client, admin_headers, case_inserts):
+    """Test moving a case worker's cases to another case worker"""
+    payload = {"from_case_worker_id": 2, "to_case_worker_id": 1, "client_ids": [2, 1]}
+    response = client.post(
+        "/clients/case-assignments/reassign", json=payload, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["created"] == [{"client_id": 2, "user_id": 1}]
+    assert data["skipped"] == []
+    assert [item["client_id"] for item in data["invalid"]] == [1]
+
+    # Services move with the case
+    services = client.get("/clients/2/services", headers=admin_headers).json()
+    assert len(services) == 1
+    assert services[0]["user_id"] == 1
+    assert services[0]["success_rate"] == 85
+
+    payload = {"from_case_worker_id": 1, "to_case_worker_id": 999}
+    response = client.post(
+        "/clients/case-assignments/reassign", json=payload, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+# Test Bulk Service Updates
+def test_bulk_update_services_by_keys(client, admin_headers):
+    """Test bulk service updates with per-case patches"""
+    payload = {
+        "items": [
+            {"client_id": 1, "user_id": 1, "update": {"retention_services": True}},
+            {"client_id": 2, "user_id": 2, "update": {"success_rate": 90}},
+            {"client_id": 1, "user_id": 2, "update": {"success_rate": 10}},
+        ]
+    }
+    response = client.patch(
+        "/clients/services/bulk", json=payload, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["updated"] == 2
+    assert data["not_found"] == 1
+    assert [item["status"] for item in data["results"]] == [
+        "updated",
+        "updated",
+        "not_found",
+    ]
+
+    services = client.get("/clients/1/services", headers=admin_headers).json()
+    assert services[0]["retention_services"] is True
+    assert services[0]["success_rate"] == 75
+    services = client.get("/clients/2/services", headers=admin_headers).json()
+    assert services[0]["success_rate"] == 90
+
+
+def test_bulk_update_services_by_filter(client, admin_headers, case_worker_headers):
+    """Test bulk service updates with a filter and a single patch"""
+    payload = {
+        "filter": {"employment_assistance": True},
+        "patch": {"enhanced_referrals": True},
+    }
+    response = client.patch(
+        "/clients/services/bulk", json=payload, headers=case_worker_headers
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    response = client.patch(
+        "/clients/services/bulk", json=payload, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["updated"] == 2
+    response = client.get(
+        "/clients/search/by-services",
+        params={"enhanced_referrals": True},
+        headers=admin_headers,
+    )
+    assert len(response.json()) == 2
+
+    # An empty filter would update every case
+    response = client.patch(
+        "/clients/services/bulk",
+        json={"filter": {}, "patch": {"success_rate": 1}},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    services = client.get("/clients/1/services", headers=admin_headers).json()
+    assert services[0]["success_rate"] != 1
+
+    # Items and filter cannot be combined
+    payload["items"] = []
+    response = client.patch(
+        "/clients/services/bulk", json=payload, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_bulk_update_services_by_client_ids(client, admin_headers, monkeypatch):
+    """Test that a client_ids filter is applied in chunks and has a size limit"""
+    monkeypatch.setattr(case_repository, "BULK_CHUNK_SIZE", 1)
+    payload = {
+        "filter": {"client_ids": [2, 1, 2, 999]},
+        "patch": {"success_rate": 40},
+    }
+    response = client.patch(
+        "/clients/services/bulk", json=payload, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["updated"] == 2
+    for client_id in (1, 2):
+        services = client.get(f"/clients/{client_id}/services", headers=admin_headers)
+        assert services.json()[0]["success_rate"] == 40
+
+    payload["filter"]["client_ids"] = list(range(10001))
+    response = client.patch(
+        "/clients/services/bulk", json=payload, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 # Test DELETE Operation
 def test_delete_client(client, admin_headers):
     """Test deleting a client"""
@@ -145,3 +339,151 @@ def test_delete_client(client, admin_headers):
     # Test deleting non-existent client
     response = client.delete("/clients/999", headers=admin_headers)
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+# Test Batch Fetch
+def test_get_clients_batch(client, admin_headers):
+    """Test fetching many clients at once, with and without services"""
+    response = client.get(
+        "/clients/batch", params={"ids": "2,999,1"}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [c["id"] for c in data["clients"]] == [2, 1]
+    assert data["missing"] == [999]
+    assert "services" not in data["clients"][0]
+
+    response = client.post(
+        "/clients/batch",
+        json={"ids": [1, 2], "include_services": True},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    clients = response.json()["clients"]
+    assert [len(c["services"]) for c in clients] == [1, 1]
+    assert clients[1]["services"][0]["success_rate"] == 85
+
+    response = client.get(
+        "/clients/batch", params={"ids": "1,a"}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+# Test Sparse Fieldsets
+def test_sparse_fields(client, admin_headers):
+    """Test restricting client endpoints to a subset of fields"""
+    response = client.get(
+        "/clients/", params={"fields": "age,gender"}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["total"] == 2
+    assert set(data["clients"][0]) == {"id", "age", "gender"}
+
+    for url, params in [
+        ("/clients/search/by-criteria", {"age_min": 18}),
+        ("/clients/search/by-services", {"employment_assistance": True}),
+        ("/clients/search/success-rate", {"min_rate": 70}),
+        ("/clients/case-worker/2", {}),
+    ]:
+        full = client.get(url, params=params, headers=admin_headers).json()
+        response = client.get(
+            url, params={**params, "fields": "housing"}, headers=admin_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [
+            {"id": item["id"], "housing": item["housing"]} for item in full
+        ]
+
+    response = client.get(
+        "/clients/", params={"fields": "age,password"}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_fast_reads_match_orm_path(client, admin_headers, monkeypatch, second_case):
+    """Test that the row-tuple fast path returns the same bytes as the ORM path"""
+    from app.clients import router as clients_router
+
+    urls = [
+        "/clients/",
+        "/clients/search/by-criteria?age_min=18",
+        "/clients/search/by-services?employment_assistance=true",
+        "/clients/search/success-rate?min_rate=70",
+        "/clients/case-worker/2",
+    ]
+    monkeypatch.setattr(clients_router, "FAST_READS", False)
+    expected = [client.get(url, headers=admin_headers).content for url in urls]
+    monkeypatch.setattr(clients_router, "FAST_READS", True)
+    assert [client.get(url, headers=admin_headers).content for url in urls] == expected
+    # Client 1 has two cases above the rate, and is listed once
+    response = client.get(urls[3], headers=admin_headers)
+    assert sorted(item["id"] for item in response.json()) == [1, 2]
+
+    # Standard library fallback when orjson is not installed
+    monkeypatch.setattr("app.core.fast_json.orjson", None)
+    assert [client.get(url, headers=admin_headers).content for url in urls] == expected
+
+
+# Test Conditional Requests
+def test_client_etags(client, admin_headers):
+    """Test ETags, 304 on unchanged polls and If-Match on updates"""
+    response = client.get("/clients/1", headers=admin_headers)
+    etag = response.headers["ETag"]
+
+    response = client.get(
+        "/clients/1", headers={**admin_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+
+    response = client.put(
+        "/clients/1", json={"age": 40}, headers={**admin_headers, "If-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    new_etag = response.headers["ETag"]
+    assert new_etag != etag
+
+    # The old ETag is now stale for both reads and writes
+    response = client.get(
+        "/clients/1", headers={**admin_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] == new_etag
+    response = client.put(
+        "/clients/1", json={"age": 41}, headers={**admin_headers, "If-Match": etag}
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert client.get("/clients/1", headers=admin_headers).json()["age"] == 40
+
+
+def test_service_etags(client, admin_headers):
+    """Test service ETags change with single and bulk updates"""
+    response = client.get("/clients/2/services", headers=admin_headers)
+    etag = response.headers["ETag"]
+    response = client.get(
+        "/clients/2/services", headers={**admin_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    payload = {"items": [{"client_id": 2, "user_id": 2, "update": {"success_rate": 5}}]}
+    client.patch("/clients/services/bulk", json=payload, headers=admin_headers)
+    response = client.get(
+        "/clients/2/services", headers={**admin_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["success_rate"] == 5
+
+    response = client.put(
+        "/clients/2/services/2",
+        json={"success_rate": 50},
+        headers={**admin_headers, "If-Match": '"case-2-2-1"'},
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    response = client.put(
+        "/clients/2/services/2",
+        json={"success_rate": 50},
+        headers={**admin_headers, "If-Match": '"case-2-2-2"'},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] == '"case-2-2-3"'
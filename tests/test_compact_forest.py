@@ -0,0 +1,57 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from app.clients.service.compact_forest import (
+    export_compact_forest,
+    load_compact_forest,
+)
+from app.clients.service.logic import COMPACT_MODEL_PATH, MODEL_PATH
+
+
+@pytest.fixture
+def training_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 6))
+    y = X[:, 0] * 3 + np.sin(X[:, 1]) + rng.normal(scale=0.1, size=300)
+    return X, y
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_compact_forest_matches_sklearn(tmp_path, training_data, mmap):
+    X, y = training_data
+    model = RandomForestRegressor(n_estimators=20, random_state=42).fit(X, y)
+    path = tmp_path / "forest.cforest"
+    export_compact_forest(model, path)
+
+    compact = load_compact_forest(path, mmap=mmap)
+    X_new = np.random.default_rng(1).normal(size=(200, 6))
+    assert np.allclose(compact.predict(X_new), model.predict(X_new), atol=1e-4)
+
+
+def test_compact_forest_pickles_by_path(tmp_path, training_data):
+    X, y = training_data
+    model = RandomForestRegressor(n_estimators=5, random_state=42).fit(X, y)
+    path = tmp_path / "forest.cforest"
+    export_compact_forest(model, path)
+    compact = load_compact_forest(path)
+
+    restored = pickle.loads(pickle.dumps(compact))
+    assert np.array_equal(restored.predict(X), compact.predict(X))
+
+
+def test_classifiers_are_rejected(tmp_path, training_data):
+    X, y = training_data
+    model = RandomForestClassifier(n_estimators=2).fit(X, y > 0)
+    with pytest.raises(ValueError):
+        export_compact_forest(model, tmp_path / "forest.cforest")
+
+
+def test_shipped_compact_model_matches_pickle():
+    with open(MODEL_PATH, "rb") as model_file:
+        model = pickle.load(model_file)
+    compact = load_compact_forest(COMPACT_MODEL_PATH)
+    rows = np.random.default_rng(2).integers(0, 15, size=(129, 31)).astype(float)
+    assert np.allclose(compact.predict(rows), model.predict(rows), atol=1e-4)
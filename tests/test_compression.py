@@ -0,0 +1,103 @@
+import gzip
+import zlib
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.clients import router as clients_router
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.core.etag import is_not_modified, precondition_holds
+from app.core.fast_json import dumps, iter_json_array
+
+URL = "/clients/search/by-criteria?age_min=18"
+
+
+def test_negotiate_encoding():
+    """Test Accept-Encoding negotiation with quality values"""
+    assert negotiate_encoding("gzip, deflate, br") == "gzip"
+    assert negotiate_encoding("deflate, br") is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("*") in ("gzip", "zstd")
+    assert negotiate_encoding("*;q=0, gzip;q=0.5") == "gzip"
+
+
+def test_iter_json_array_matches_dumps():
+    """Test that chunked array encoding equals encoding all rows at once"""
+    fields = ("id", "name")
+    rows = [(1, "a"), (2, "é"), (3, None)]
+    for chunks in ([rows], [rows[:1], rows[1:]], [[], rows[:2], [], rows[2:]]):
+        encoded = b"".join(iter_json_array(chunks, fields))
+        assert encoded == dumps([dict(zip(fields, row)) for row in rows])
+    assert b"".join(iter_json_array([], fields)) == b"[]"
+
+
+def test_large_response_is_compressed(client, admin_headers):
+    """Test that responses above the threshold are gzipped when accepted"""
+    plain = client.get(URL, headers={**admin_headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    response = client.get(URL, headers={**admin_headers, "Accept-Encoding": "gzip"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    # httpx decodes transparently; the payload itself is unchanged
+    assert response.content == plain.content
+
+
+def test_small_response_is_not_compressed(client, admin_headers):
+    """Test that responses below the threshold are sent as is"""
+    response = client.get(
+        "/clients/1/services", headers={**admin_headers, "Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
+
+
+def test_compressed_etag_names_the_coding():
+    """Test that a compressed body gets its own strong ETag, usable in If-Match"""
+    app = Starlette(
+        routes=[
+            Route(
+                "/",
+                lambda request: JSONResponse([1, 2, 3], headers={"ETag": '"v1"'}),
+            )
+        ]
+    )
+    client = TestClient(CompressionMiddleware(app, minimum_size=1))
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == '"v1-gzip"'
+    assert response.json() == [1, 2, 3]
+    assert precondition_holds(response.headers["etag"], '"v1"')
+    assert is_not_modified(response.headers["etag"], '"v1"')
+    assert not precondition_holds('W/"v1"', '"v1"')
+    assert not precondition_holds('"v2-gzip"', '"v1"')
+
+    response = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert response.headers["etag"] == '"v1"'
+
+
+def test_streamed_list_matches_buffered(client, admin_headers, monkeypatch):
+    """Test that streamed lists decompress to the same bytes as buffered ones"""
+    headers = {**admin_headers, "Accept-Encoding": "identity"}
+    buffered = client.get(URL, headers=headers)
+    assert "content-length" in buffered.headers
+
+    monkeypatch.setattr(clients_router, "STREAM_CHUNK_ROWS", 1)
+    streamed = client.get(URL, headers=headers)
+    assert "content-length" not in streamed.headers
+    assert streamed.content == buffered.content
+
+    with client.stream(
+        "GET", URL, headers={**admin_headers, "Accept-Encoding": "gzip"}
+    ) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw) == buffered.content
+    # Every chunk ended with a sync flush, so a prefix is already decodable
+    partial = zlib.decompressobj(31).decompress(raw[: len(raw) // 2])
+    assert buffered.content.startswith(partial) and partial
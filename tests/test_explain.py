@@ -0,0 +1,138 @@
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from app.clients.service.compact_forest import (
+    export_compact_forest,
+    load_compact_forest,
+)
+from app.clients.service.explain import ForestExplainer
+from app.clients.service.logic import COLUMN_FEATURES, COLUMN_INTERVENTIONS
+
+
+def _conditional_expectation(tree, x, known):
+    """Compute the expected tree output when only the features in `known` are seen."""
+
+    def walk(node):
+        if tree.children_left[node] < 0:
+            return tree.value[node].item()
+        split = tree.feature[node]
+        left, right = tree.children_left[node], tree.children_right[node]
+        if split in known:
+            goes_left = np.float32(x[split]) <= tree.threshold[node]
+            return walk(left if goes_left else right)
+        cover = tree.weighted_n_node_samples
+        return (walk(left) * cover[left] + walk(right) * cover[right]) / cover[node]
+
+    return walk(0)
+
+
+def _brute_force_shap(model, x):
+    n = len(x)
+    phi = np.zeros(n)
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        for i in range(n):
+            others = [j for j in range(n) if j != i]
+            for size in range(n):
+                weight = factorial(size) * factorial(n - size - 1) / factorial(n)
+                for subset in combinations(others, size):
+                    known = set(subset)
+                    phi[i] += weight * (
+                        _conditional_expectation(tree, x, known | {i})
+                        - _conditional_expectation(tree, x, known)
+                    )
+    return phi / len(model.estimators_)
+
+
+@pytest.fixture
+def small_forest():
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 5, size=(200, 5)).astype(float)
+    y = X[:, 0] * 2 + X[:, 1] * X[:, 2] + rng.normal(scale=0.1, size=200)
+    model = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0)
+    return model.fit(X, y), X
+
+
+def test_shap_values_match_brute_force(small_forest):
+    model, X = small_forest
+    explainer = ForestExplainer(model)
+    shap_values = explainer.shap_values(X[:4])
+    for row, phi in zip(X[:4], shap_values):
+        assert np.allclose(phi, _brute_force_shap(model, row))
+
+
+def test_shap_values_add_up_to_prediction(small_forest):
+    model, X = small_forest
+    explainer = ForestExplainer(model)
+    shap_values = explainer.shap_values(X)
+    assert np.allclose(
+        explainer.expected_value + shap_values.sum(axis=1), model.predict(X)
+    )
+
+
+def test_compact_forest_explains_like_sklearn(tmp_path, small_forest):
+    model, X = small_forest
+    path = tmp_path / "forest.cforest"
+    export_compact_forest(model, path)
+    compact = ForestExplainer(load_compact_forest(path))
+    assert np.allclose(
+        compact.shap_values(X[:20]),
+        ForestExplainer(model).shap_values(X[:20]),
+        atol=1e-4,
+    )
+
+
+def check_recommendations_with_explanations(client, headers):
+    """Request recommendations with and without explanations and check them."""
+    data = {
+        "age": 45,
+        "gender": "1",
+        "work_experience": 12,
+        "canada_workex": 4,
+        "dep_num": 2,
+        "canada_born": "false",
+        "citizen_status": "true",
+        "level_of_schooling": "5",
+        "fluent_english": "false",
+        "reading_english_scale": 4,
+        "speaking_english_scale": 5,
+        "writing_english_scale": 3,
+        "numeracy_scale": 6,
+        "computer_scale": 4,
+        "transportation_bool": "false",
+        "caregiver_bool": "true",
+        "housing": "3",
+        "income_source": "2",
+        "felony_bool": "false",
+        "attending_school": "false",
+        "currently_employed": "false",
+        "substance_use": "false",
+        "time_unemployed": 18,
+        "need_mental_health_support_bool": "true",
+    }
+    plain = client.post("/clients/recommendations", json=data, headers=headers)
+    assert "explanations" not in plain.json()
+
+    response = client.post(
+        "/clients/recommendations?explain=true", json=data, headers=headers
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["explanations"]) == len(body["interventions"])
+    for (score, _), explanation in zip(body["interventions"], body["explanations"]):
+        assert list(explanation["features"]) == COLUMN_FEATURES
+        assert list(explanation["interventions"]) == COLUMN_INTERVENTIONS
+        total = (
+            explanation["base_value"]
+            + sum(explanation["features"].values())
+            + sum(explanation["interventions"].values())
+        )
+        assert total == pytest.approx(score)
+
+
+def test_recommendations_with_explanations(client, admin_headers):
+    check_recommendations_with_explanations(client, admin_headers)
@@ -0,0 +1,41 @@
+from app.core.import_budget import check_budget, measure_import, parse_importtime
+from app.core.lazy import LazyModule, is_loaded, lazy_module
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 | site
+INFO:root:interleaved log line
+import time:      2000 |       2000 |     pandas.core
+import time:       500 |       2500 |   pandas
+import time:       300 |        300 |   json
+import time:      1000 |       3800 | app.tool
+"""
+
+
+def test_app_import_within_budget():
+    """Test the module count and deferred packages of importing app.main"""
+    report = measure_import("app.main")
+    # Wall-clock time depends on the machine; python -m app.core.import_budget
+    # checks it
+    assert check_budget(report, max_seconds=float("inf")) == []
+
+
+def test_parse_importtime():
+    """Test that only the measured module and its imports are counted"""
+    report = parse_importtime(IMPORTTIME_OUTPUT, "app.tool")
+    assert report["seconds"] == 0.0038
+    assert report["modules"] == ["pandas.core", "pandas", "json", "app.tool"]
+    assert report["slowest"][0] == ("pandas.core", 0.002)
+    assert check_budget(report, max_seconds=1, max_modules=3) == [
+        "4 modules imported, budget is 3",
+        "pandas is imported eagerly",
+    ]
+
+
+def test_lazy_module_imports_on_first_use():
+    """Test that a lazy module is imported on first attribute access"""
+    module = LazyModule("colorsys")
+    assert not is_loaded(module)
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert is_loaded(module)
+    assert lazy_module("os") is __import__("os")
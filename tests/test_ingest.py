@@ -0,0 +1,153 @@
+import asyncio
+import json
+import random
+
+from fastapi import status
+from pydantic import ValidationError
+
+from app.clients.schema import ClientBase
+from app.clients.service import ingest
+from app.clients.service.ingest import FIELD_RULES, ingest_records, validate_chunk
+
+VALID_CLIENT = ClientBase.model_config["json_schema_extra"]["example"]
+
+
+def test_validation_matches_client_schema():
+    rng = random.Random(0)
+    candidates = ["", None, "abc", -1, 0, 1, 2, 5, 11, 15, 18, 40, "7", "true", "no"]
+    candidates += ["--5", "-", "²"]
+    records = []
+    for _ in range(300):
+        record = dict(VALID_CLIENT)
+        for name in rng.sample(list(FIELD_RULES), 2):
+            record[name] = rng.choice(candidates)
+        records.append(record)
+
+    columns, errors = validate_chunk(records)
+    for index, record in enumerate(records):
+        try:
+            expected = ClientBase(**record).model_dump()
+        except ValidationError as exc:
+            invalid_fields = {error["loc"][0] for error in exc.errors()}
+            assert set(errors[index]) == invalid_fields
+        else:
+            assert errors[index] == {}
+            assert {name: columns[name][index] for name in FIELD_RULES} == expected
+
+
+def test_bulk_create_clients_ndjson(client, admin_headers):
+    invalid = dict(VALID_CLIENT, age=16, housing="x")
+    lines = [json.dumps(VALID_CLIENT), json.dumps(invalid), "not json", ""]
+    lines.append(json.dumps(dict(VALID_CLIENT, age=60)))
+    response = client.post(
+        "/clients/bulk",
+        content="\n".join(lines),
+        headers={**admin_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    report = [json.loads(line) for line in response.text.splitlines()]
+    assert [item.get("status") for item in report[:4]] == [
+        "created",
+        "invalid",
+        "invalid",
+        "created",
+    ]
+    assert set(report[1]["errors"]) == {"age", "housing"}
+    assert report[-1]["summary"] == {"rows": 4, "created": 2, "invalid": 2}
+
+    response = client.get(f"/clients/{report[3]['id']}", headers=admin_headers)
+    assert response.json()["age"] == 60
+
+
+def test_bulk_create_clients_csv(client, admin_headers):
+    header = ",".join(VALID_CLIENT)
+    row = ",".join(str(value).lower() for value in VALID_CLIENT.values())
+    response = client.post(
+        "/clients/bulk",
+        content="\n".join([header, row, row, "1,2"]),
+        headers={**admin_headers, "Content-Type": "text/csv"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    report = [json.loads(line) for line in response.text.splitlines()]
+    assert report[-1]["summary"] == {"rows": 3, "created": 2, "invalid": 1}
+
+    response = client.get("/clients/", headers=admin_headers)
+    assert response.json()["total"] == 4
+
+    response = client.post(
+        "/clients/bulk",
+        content="{}",
+        headers={**admin_headers, "Content-Type": "application/json"},
+    )
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+
+def test_bulk_create_reports_malformed_integers_per_row(client, admin_headers):
+    lines = [json.dumps(dict(VALID_CLIENT, age=age)) for age in ["--5", "²", 30]]
+    response = client.post(
+        "/clients/bulk",
+        content="\n".join(lines),
+        headers={**admin_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    report = [json.loads(line) for line in response.text.splitlines()]
+    assert report[0]["errors"] == report[1]["errors"] == {"age": "must be an integer"}
+    assert report[-1]["summary"] == {"rows": 3, "created": 1, "invalid": 2}
+
+
+def test_bulk_create_reports_undecodable_and_long_lines(
+    client, admin_headers, monkeypatch
+):
+    monkeypatch.setattr(ingest, "MAX_LINE_BYTES", 1000)
+    line = json.dumps(VALID_CLIENT).encode()
+    body = b"\n".join([line, b'{"age": "\xff"}', b" " * 5000 + line, line])
+    response = client.post(
+        "/clients/bulk",
+        content=body,
+        headers={**admin_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    report = [json.loads(line) for line in response.text.splitlines()]
+    assert [item.get("status") for item in report[:4]] == [
+        "created",
+        "invalid",
+        "invalid",
+        "created",
+    ]
+    assert report[1]["errors"] == {"record": "not valid UTF-8"}
+    assert report[2]["errors"] == {"record": "line longer than 1000 bytes"}
+    assert report[-1]["summary"] == {"rows": 4, "created": 2, "invalid": 2}
+
+
+def test_ingest_stops_at_a_failed_chunk():
+    async def stream():
+        for _ in range(5):
+            yield json.dumps(VALID_CLIENT).encode() + b"\n"
+
+    inserted = []
+
+    def insert_rows(rows):
+        if inserted:
+            raise RuntimeError("database is locked")
+        inserted.extend(rows)
+        return list(range(1, len(rows) + 1))
+
+    async def collect():
+        return [
+            item async for item in ingest_records(stream(), "ndjson", insert_rows, 2)
+        ]
+
+    report = asyncio.run(collect())
+    assert [item.get("status") for item in report[:-1]] == [
+        "created",
+        "created",
+        "failed",
+        "failed",
+    ]
+    assert report[-1]["summary"] == {
+        "rows": 4,
+        "created": 2,
+        "invalid": 0,
+        "failed": 2,
+        "error": "database is locked",
+    }
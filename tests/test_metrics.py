@@ -0,0 +1,140 @@
+import re
+
+from fastapi import status
+
+from app.core.metrics import Registry
+from app.core.multiprocess_metrics import MultiprocessMetrics
+from app.core.monitoring import instrument_engine
+from tests.conftest import engine
+from tests.test_explain import check_recommendations_with_explanations
+
+
+def _value(text, name, **labels):
+    """Value of one sample in a Prometheus text page, 0 when absent."""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    sample = f"{name}{{{label_text}}}" if labels else name
+    match = re.search(rf"^{re.escape(sample)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_render_text_format():
+    """Test the Prometheus text format of each metric kind"""
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("path",))
+    requests.labels('/a"b').inc(2)
+    registry.gauge("in_flight", "In flight").labels().set(3)
+    latency = registry.histogram("latency_seconds", "Latency", [0.1, 1])
+    latency.labels().observe(0.05)
+    latency.labels().observe(0.5)
+
+    assert registry.render() == (
+        "# HELP requests_total Requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{path="/a\\"b"} 2\n'
+        "# HELP in_flight In flight\n"
+        "# TYPE in_flight gauge\n"
+        "in_flight 3\n"
+        "# HELP latency_seconds Latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 1\n'
+        'latency_seconds_bucket{le="1"} 2\n'
+        'latency_seconds_bucket{le="+Inf"} 2\n'
+        "latency_seconds_sum 0.55\n"
+        "latency_seconds_count 2\n"
+    )
+
+
+def test_multiprocess_metrics(tmp_path, monkeypatch):
+    """Test that workers' metrics add up and outlive workers that exit"""
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("path",))
+    in_flight = registry.gauge("in_flight", "In flight")
+    latency = registry.histogram("latency_seconds", "Latency", [1])
+    requests.labels("/a").inc(5)
+    store = MultiprocessMetrics(registry)
+    # The master's values are archived and zeroed in the workers
+    store.enable(str(tmp_path))
+
+    def run_worker(pid, count):
+        monkeypatch.setattr("os.getpid", lambda: pid)
+        store.registry.reset()
+        requests.labels("/a").inc(count)
+        in_flight.labels().set(1)
+        latency.labels().observe(0.5)
+        store.write()
+
+    run_worker(101, 2)
+    run_worker(102, 3)
+    text = store.render()
+    assert _value(text, "requests_total", path="/a") == 10
+    assert _value(text, "in_flight") == 2
+    assert _value(text, "latency_seconds_count") == 2
+
+    store.archive(101)
+    text = store.render()
+    assert _value(text, "requests_total", path="/a") == 10
+    assert _value(text, "in_flight") == 1
+    assert _value(text, "latency_seconds_bucket", le="1") == 2
+
+
+def test_request_and_database_metrics(client, admin_headers):
+    """Test that requests are counted by route template and SQL by operation"""
+    instrument_engine(engine)
+    before = client.get("/metrics").text
+    route = {"method": "GET", "route": "/clients/{client_id}", "status": "200"}
+
+    etag = client.get("/clients/1", headers=admin_headers).headers["ETag"]
+    response = client.get(
+        "/clients/1", headers={**admin_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    after = client.get("/metrics")
+    assert after.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = after.text
+    assert _value(after, "http_requests_total", **route) == (
+        _value(before, "http_requests_total", **route) + 1
+    )
+    assert (
+        _value(
+            after,
+            "http_request_duration_seconds_count",
+            method="GET",
+            route="/clients/{client_id}",
+        )
+        == _value(
+            before,
+            "http_request_duration_seconds_count",
+            method="GET",
+            route="/clients/{client_id}",
+        )
+        + 2
+    )
+    assert _value(after, "http_conditional_reads_total", result="hit") == (
+        _value(before, "http_conditional_reads_total", result="hit") + 1
+    )
+    assert _value(after, "db_statements_total", operation="select") > _value(
+        before, "db_statements_total", operation="select"
+    )
+    assert _value(after, "db_statement_cache_total", result="hit") > 0
+    assert _value(after, "http_requests_in_flight", method="GET") == 1
+
+
+def test_inference_metrics(client, admin_headers):
+    """Test that recommendation requests record inference and batch metrics"""
+    before = client.get("/metrics").text
+    check_recommendations_with_explanations(client, admin_headers)
+    after = client.get("/metrics").text
+
+    def count(text, name, **labels):
+        return _value(text, f"{name}_count", **labels)
+
+    model = {"model": "recommendation"}
+    batcher = {"batcher": "recommendation"}
+    assert count(after, "inference_duration_seconds", **model) >= (
+        count(before, "inference_duration_seconds", **model) + 1
+    )
+    assert count(after, "inference_batch_rows", **batcher) > 0
+    assert count(after, "recommendation_explain_duration_seconds") == (
+        count(before, "recommendation_explain_duration_seconds") + 1
+    )
@@ -1,12 +1,16 @@
 import pytest
 
 from app.core.model_manager import load_data  # Ensure this loads the real data
+from app.database import engine, prepare_database
 from app.models.ml_models import (
     DecisionTreeModel,
     LogisticRegressionModel,
     RandomForestModel,
 )
+from app.models.training import train_models
 
+# The app's start-up upgrades the schema; this module reads the data before it
+prepare_database(engine)
 # Load the real dataset (features and success rate)
 X_train, X_test, y_train, y_test = load_data()
 
@@ -42,3 +46,17 @@ def test_random_forest_fit(models):
     assert (
         model.predict(X_test).shape[0] == y_test.shape[0]
     ), "Prediction output shape mismatch"
+
+
+def test_parallel_training_reports_accuracy_and_latency(models):
+    fitted, report = train_models(
+        models, X_train, y_train, X_test, y_test, cv_folds=3, n_jobs=2
+    )
+    assert set(fitted) == set(models)
+    assert report["workers"] == 2
+    for name, model in fitted.items():
+        assert model.predict(X_test).shape[0] == y_test.shape[0]
+        metrics = report["models"][name]
+        assert 0.0 <= metrics["test_accuracy"] <= 1.0
+        assert 0.0 <= metrics["cv_accuracy_mean"] <= 1.0
+        assert metrics["single_row_p50_ms"] > 0
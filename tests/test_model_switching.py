@@ -51,6 +51,19 @@ def test_get_current_model(test_client, test_admin_headers):
     assert "current_model" in response.json()
 
 
+# Test the training evaluation report
+def test_model_report(test_client):
+    response = test_client.get("/ml/model-report")
+    assert response.status_code == 200
+    report = response.json()
+    assert set(report["models"]) == {
+        "logistic_regression",
+        "decision_tree",
+        "random_forest",
+    }
+    assert "test_accuracy" in report["models"]["random_forest"]
+
+
 # Test prediction with valid data after switching the model
 def test_prediction(test_client, test_admin_headers):
     data = {
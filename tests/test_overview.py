@@ -0,0 +1,160 @@
+import json
+
+from fastapi import status
+from sqlalchemy import select, update
+
+from app.clients.service import client_service
+from app.models import Client, ClientOverview
+from app.models.overview import (
+    client_overview,
+    client_overview_cases,
+    rebuild_client_overview,
+)
+from tests.conftest import engine
+from tests.test_ingest import VALID_CLIENT
+
+
+def _snapshot():
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(client_overview).order_by(client_overview.c.id)
+        )
+        cases = connection.execute(
+            select(client_overview_cases).order_by(
+                client_overview_cases.c.client_id, client_overview_cases.c.user_id
+            )
+        )
+        return [tuple(row) for row in rows] + [tuple(row) for row in cases]
+
+
+def _assert_in_step():
+    # The incrementally maintained rows must equal a rebuild from the tables
+    maintained = _snapshot()
+    rebuild_client_overview(engine, force=True)
+    assert maintained == _snapshot()
+
+
+def test_overview_follows_commands(client, admin_headers):
+    """Test that every write path keeps the read model in step with the tables"""
+    _assert_in_step()
+
+    client.put("/clients/2", json={"currently_employed": False}, headers=admin_headers)
+    _assert_in_step()
+
+    client.put(
+        "/clients/1/services/1",
+        json={"success_rate": 95, "retention_services": True},
+        headers=admin_headers,
+    )
+    _assert_in_step()
+
+    client.post(
+        "/clients/case-assignments/bulk",
+        json={"assignments": [{"client_id": 1, "user_id": 2}]},
+        headers=admin_headers,
+    )
+    _assert_in_step()
+
+    client.patch(
+        "/clients/services/bulk",
+        json={"filter": {"user_id": 2}, "patch": {"life_stabilization": True}},
+        headers=admin_headers,
+    )
+    _assert_in_step()
+
+    client.post(
+        "/clients/case-assignments/reassign",
+        json={"from_case_worker_id": 2, "to_case_worker_id": 1, "client_ids": [2]},
+        headers=admin_headers,
+    )
+    _assert_in_step()
+
+    response = client.post(
+        "/clients/bulk",
+        content=json.dumps(VALID_CLIENT),
+        headers={**admin_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    _assert_in_step()
+
+    client.delete("/clients/1", headers=admin_headers)
+    _assert_in_step()
+    with engine.connect() as connection:
+        assert len(connection.execute(select(client_overview)).all()) == 2
+
+
+def test_overview_row(test_db):
+    """Test the denormalized columns of a client with cases"""
+    row = test_db.get(ClientOverview, 1)
+    assert row.age == 25
+    assert row.version == 1
+    assert row.best_success_rate == 75
+    cases = test_db.execute(
+        select(client_overview_cases).where(client_overview_cases.c.client_id == 1)
+    ).all()
+    assert len(cases) == 1
+    assert cases[0].user_id == 1
+    assert cases[0].employment_assistance is True
+    assert cases[0].retention_services is False
+
+
+def test_rebuild_client_overview(test_db):
+    """Test that a read model missing rows is rebuilt at start-up"""
+    test_db.query(ClientOverview).delete()
+    test_db.commit()
+    assert test_db.query(ClientOverview).count() == 0
+
+    assert rebuild_client_overview(engine) is True
+    assert test_db.query(ClientOverview).count() == 2
+    assert rebuild_client_overview(engine) is False
+
+
+def test_rebuild_after_bypassing_write(test_db):
+    """Test that a versioned write outside the app's session is caught"""
+    assert rebuild_client_overview(engine) is False
+    with engine.begin() as connection:
+        connection.execute(
+            update(Client.__table__)
+            .where(Client.__table__.c.id == 1)
+            .values(age=40, version=Client.__table__.c.version + 1)
+        )
+    assert rebuild_client_overview(engine) is True
+    test_db.expire_all()
+    assert test_db.get(ClientOverview, 1).age == 40
+
+
+def test_read_model_matches_joins(client, admin_headers, monkeypatch):
+    """Test that searches from the read model match the normalized tables"""
+    # Client 1 gets a second case whose services differ from its first
+    client.post(
+        "/clients/case-assignments/bulk",
+        json={"assignments": [{"client_id": 1, "user_id": 2}]},
+        headers=admin_headers,
+    )
+    client.put(
+        "/clients/1/services/2",
+        json={"retention_services": True, "success_rate": 90},
+        headers=admin_headers,
+    )
+    urls = [
+        # Services spread over two cases of client 1 do not match together
+        "/clients/search/by-services?employment_assistance=true"
+        "&retention_services=true",
+        "/clients/search/by-services?retention_services=true",
+        "/clients/search/by-services",
+        "/clients/search/success-rate?min_rate=80",
+        "/clients/search/by-criteria?age_min=18",
+        "/clients/case-worker/2",
+    ]
+    responses = []
+    for read_model in (False, True):
+        monkeypatch.setattr(client_service, "READ_MODEL", read_model)
+        responses.append(
+            [
+                sorted(
+                    item["id"] for item in client.get(url, headers=admin_headers).json()
+                )
+                for url in urls
+            ]
+        )
+    assert responses[0] == responses[1] == [[2], [1, 2], [1, 2], [1, 2], [1, 2], [1, 2]]
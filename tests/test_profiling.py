@@ -0,0 +1,77 @@
+import logging
+
+import pytest
+
+from app.core import profiling
+from app.core.profiling import attach_profiler, capture_statements, statement_shape
+from app.models import ClientCase
+from tests.conftest import TestingSessionLocal, engine
+
+
+def test_statement_shape():
+    """Test that statements differing only in values have the same shape"""
+    assert statement_shape(
+        "SELECT * FROM clients\n WHERE id IN (?, ?, ?) AND age > 30"
+    ) == statement_shape("SELECT * FROM clients WHERE id IN (?, ?) AND age > 45")
+    assert statement_shape("SELECT name FROM t WHERE name = 'o''x'") == (
+        "SELECT name FROM t WHERE name = ?"
+    )
+
+
+def test_lazy_loads_flagged_as_n_plus_one(test_db):
+    """Test that a lazy load per row is reported with its call site"""
+    db = TestingSessionLocal()
+    try:
+        with capture_statements(engine) as profile:
+            cases = db.query(ClientCase).all()
+            clients = [case.client for case in cases]
+    finally:
+        db.close()
+
+    assert len(clients) == 2
+    assert len(profile) == 3
+    [repeated] = profile.repeated(threshold=2)
+    assert repeated["count"] == 2
+    assert repeated["shape"].startswith("SELECT clients.id")
+    [site] = repeated["call_sites"]
+    assert site.startswith("tests/test_profiling.py:")
+
+
+@pytest.mark.parametrize(
+    "url,max_statements",
+    [
+        ("/clients/1", 2),
+        ("/clients/1/services", 2),
+        ("/clients/?limit=10", 3),
+        ("/clients/batch?ids=1,2&include_services=true", 3),
+        ("/clients/search/by-services?employment_assistance=true", 2),
+        ("/clients/search/success-rate?min_rate=70", 2),
+        ("/clients/case-worker/1", 2),
+    ],
+)
+def test_endpoint_sql_budgets(client, admin_headers, sql_budget, url, max_statements):
+    """Test the statements issued by read endpoints, authentication included"""
+    with sql_budget(max_statements):
+        response = client.get(url, headers=admin_headers)
+    assert response.status_code == 200
+
+
+def test_profiling_header(client, admin_headers, monkeypatch, caplog):
+    """Test that requests asking for a profile get a summary and a log entry"""
+    attach_profiler(engine)
+    monkeypatch.setattr(profiling, "SQL_PROFILING", "header")
+
+    response = client.get("/clients/1", headers=admin_headers)
+    assert "X-SQL-Profile" not in response.headers
+
+    with caplog.at_level(logging.INFO, logger="app.sql_profile"):
+        response = client.get(
+            "/clients/1", headers={**admin_headers, "X-SQL-Profile": "1"}
+        )
+    assert response.status_code == 200
+    assert response.headers["X-SQL-Profile"].startswith("statements=2; ")
+    assert response.headers["X-SQL-Profile"].endswith("; repeated=0")
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    [record] = [r for r in caplog.records if r.name == "app.sql_profile"]
+    assert record.getMessage().startswith("GET /clients/1 ")
+    assert "client_repository.py" in record.getMessage()
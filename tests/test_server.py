@@ -0,0 +1,93 @@
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists(f"/proc/{os.getpid()}/task/{os.getpid()}/children"),
+    reason="needs fork and /proc",
+)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _workers(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as children:
+        return set(children.read().split())
+
+
+def test_prefork_server_recycles_workers(tmp_path):
+    """Test that workers are forked, recycled after max requests and stopped"""
+    database = tmp_path / "server.db"
+    shutil.copy("sql_app.db", database)
+    port = _free_port()
+    master = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "app.server",
+            "--port",
+            str(port),
+            "--workers",
+            "2",
+            "--max-requests",
+            "3",
+            "--log-level",
+            "warning",
+        ],
+        env=dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{database}",
+            # Live workers' snapshots are at most this old in /metrics
+            METRICS_FLUSH_SECONDS="0.2",
+        ),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 120
+        while True:
+            assert time.monotonic() < deadline and master.poll() is None
+            try:
+                # Workers are forked after the warm-up, so they are ready at once
+                assert httpx.get(f"{base_url}/readyz").status_code == 200
+                break
+            except httpx.TransportError:
+                time.sleep(0.2)
+        first_workers = _workers(master.pid)
+        assert len(first_workers) == 2
+
+        for _ in range(20):
+            assert httpx.get(f"{base_url}/healthz").status_code == 200
+        # Workers that exit within a second are replaced after a short delay
+        deadline = time.monotonic() + 10
+        while len(workers := _workers(master.pid)) != 2:
+            assert time.monotonic() < deadline
+            time.sleep(0.2)
+        assert workers != first_workers
+
+        # Every worker's requests, recycled workers included, are counted once
+        # the live workers have flushed their snapshots
+        healthz = 'http_requests_total{method="GET",route="/healthz",status="200"}'
+        deadline = time.monotonic() + 10
+        while f"{healthz} 20\n" not in httpx.get(f"{base_url}/metrics").text:
+            assert time.monotonic() < deadline
+            time.sleep(0.2)
+
+        master.send_signal(signal.SIGTERM)
+        assert master.wait(timeout=30) == 0
+    finally:
+        if master.poll() is None:
+            master.kill()
+            master.wait()
@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+from fastapi import status
+
+from app.clients.repository.client_repository import ClientRepository
+from app.core import slow_queries
+from app.core.slow_queries import SlowQueryLog, full_scans, slow_query_log
+from tests.conftest import engine
+
+
+def test_full_scans():
+    """Test that full table scans are found in SQLite and PostgreSQL plans"""
+    assert full_scans(
+        ["SCAN clients", "SEARCH client_cases USING INDEX sqlite_autoindex (id=?)"]
+    ) == ["clients"]
+    assert full_scans(["SCAN c USING COVERING INDEX ix_c"]) == []
+    assert full_scans(["Seq Scan on clients  (cost=0.00..1.02 rows=1 width=4)"]) == [
+        "clients"
+    ]
+
+
+@pytest.fixture
+def all_queries_logged(monkeypatch):
+    """Log every statement on the test database as slow."""
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0)
+    slow_query_log.clear()
+    slow_query_log.attach(engine)
+    yield slow_query_log
+    slow_query_log.detach(engine)
+    slow_query_log.clear()
+
+
+def test_slow_queries_grouped_by_shape_with_plan(test_db, caplog):
+    """Test that dynamic filters group by shape, with plans and no values"""
+    log = SlowQueryLog(threshold_ms=0)
+    log.attach(engine)
+    try:
+        repository = ClientRepository()
+        for age in (20, 30, 40):
+            repository.get_by_criteria(test_db, {"age__ge": age})
+        repository.get_by_criteria(test_db, {"age__ge": 20, "gender": 1})
+        repository.get_by_ids(test_db, [1, 2])
+    finally:
+        log.detach(engine)
+    log.wait_for_plans()
+
+    queries = log.top(order_by="count")["queries"]
+    age_only = queries[0]
+    assert age_only["count"] == 3
+    assert age_only["shape"].endswith("WHERE clients.age >= ?")
+    assert age_only["plan"] == ["SCAN clients"]
+    assert age_only["full_scans"] == ["clients"]
+    assert age_only["last_parameters"] == ["int"]
+    assert age_only["last_call_site"].startswith("app/clients/repository/")
+    [by_ids] = [entry for entry in queries if " IN " in entry["shape"]]
+    assert by_ids["full_scans"] == []
+    assert "parameters=['int']" in caplog.text
+
+
+def test_slow_queries_endpoint(
+    client, admin_headers, case_worker_headers, all_queries_logged
+):
+    """Test that admins get the top offenders and can clear them"""
+    client.get("/clients/search/by-criteria?age_min=18", headers=admin_headers)
+    response = client.get(
+        "/admin/slow-queries", params={"limit": 2}, headers=admin_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    report = response.json()
+    assert report["threshold_ms"] == 0
+    assert report["shapes"] >= 2
+    assert len(report["queries"]) == 2
+    totals = [entry["total_ms"] for entry in report["queries"]]
+    assert totals == sorted(totals, reverse=True)
+
+    response = client.get("/admin/slow-queries", headers=case_worker_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    response = client.delete("/admin/slow-queries", headers=admin_headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert all_queries_logged.top()["shapes"] == 0
+
+
+def test_plans_are_captured_off_the_request_thread(test_db, monkeypatch):
+    """Test that a slow statement does not wait for its plan"""
+    threads = []
+    explain = slow_queries.explain
+
+    def record_thread(*args):
+        threads.append(threading.get_ident())
+        return explain(*args)
+
+    monkeypatch.setattr(slow_queries, "explain", record_thread)
+    log = SlowQueryLog(threshold_ms=0)
+    log.attach(engine)
+    try:
+        ClientRepository().get_by_criteria(test_db, {"age__ge": 20})
+    finally:
+        log.detach(engine)
+    log.wait_for_plans()
+    assert threads and threading.get_ident() not in threads
+    [entry] = [q for q in log.top()["queries"] if q["shape"].endswith("age >= ?")]
+    assert entry["plan"] == ["SCAN clients"]
@@ -0,0 +1,124 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app import database
+from app.core.startup import StartupRegistry
+from app.main import app
+
+
+def _sleeper(seconds, value):
+    def factory():
+        time.sleep(seconds)
+        return value
+
+    return factory
+
+
+def test_importing_app_builds_nothing():
+    """Test that importing app.main loads no model and touches no table"""
+    code = (
+        "import app.main\n"
+        "from app.core.startup import startup_registry\n"
+        "print(sorted({r.status for r in startup_registry.resources.values()}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "['pending']"
+
+
+def test_warm_up_overlaps_independent_resources():
+    """Test that independent resources build in parallel, dependents after"""
+    registry = StartupRegistry()
+    # Only passed when a and b build at the same time
+    barrier = threading.Barrier(2, timeout=10)
+    built = []
+
+    def meet(name, value):
+        def factory():
+            barrier.wait()
+            built.append(name)
+            return value
+
+        return factory
+
+    def dependent_factory():
+        built.append("c")
+        return registry["a"].get() + 10
+
+    registry.register("a", meet("a", 1))
+    registry.register("b", meet("b", 2))
+    dependent = registry.register("c", dependent_factory, depends_on=["a"])
+
+    asyncio.run(registry.warm_up())
+    assert registry.report()["status"] == "ready"
+    assert built.index("c") > built.index("a")
+    assert dependent.get() == 11
+
+
+def test_failed_resource_is_reported_and_retried():
+    """Test that a failed build shows in the report and is retried on use"""
+    registry = StartupRegistry()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("no data")
+        return "model"
+
+    resource = registry.register("flaky", flaky)
+    asyncio.run(registry.warm_up())
+    report = registry.report()
+    assert report["status"] == "failed"
+    assert report["resources"]["flaky"]["error"] == "RuntimeError: no data"
+    assert resource.get() == "model"
+    assert registry.report()["status"] == "ready"
+
+
+def test_duplicate_resource_names_are_rejected():
+    """Test that a resource name can only be registered once"""
+    registry = StartupRegistry()
+    registry.register("a", lambda: 1)
+    with pytest.raises(ValueError):
+        registry.register("a", lambda: 2)
+
+
+def test_liveness_and_readiness_probes():
+    """Test that /readyz turns ready after the lifespan warm-up"""
+    with TestClient(app) as client:
+        assert client.get("/healthz").json() == {"status": "ok"}
+        deadline = time.monotonic() + 60
+        response = client.get("/readyz")
+        while response.status_code != status.HTTP_200_OK:
+            assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+            assert time.monotonic() < deadline
+            time.sleep(0.1)
+            response = client.get("/readyz")
+        report = response.json()
+        assert report["status"] == "ready"
+        assert set(report["resources"]) >= {
+            "database",
+            "model_manager",
+            "recommendation_model",
+        }
+        assert client.get("/ml/current-model").status_code == status.HTTP_200_OK
+
+
+def test_sessions_wait_for_the_database_resource(monkeypatch):
+    """Test that get_db only yields once the schema is prepared"""
+    registry = StartupRegistry()
+    database_resource = registry.register("database", _sleeper(0.1, None))
+    monkeypatch.setattr(database, "startup_registry", registry)
+
+    sessions = database.get_db()
+    db = next(sessions)
+    assert database_resource.ready
+    db.close()
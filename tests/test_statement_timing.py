@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.statement_timing import (
+    STARTED_KEY,
+    listen_statements,
+    remove_statement_listener,
+)
+from tests.conftest import engine
+
+
+def test_listeners_share_one_timer():
+    """Test that every listener gets the same duration from one timer stack"""
+    first, second = [], []
+
+    def record_first(conn, statement, parameters, context, executemany, seconds):
+        first.append((statement, seconds))
+
+    def record_second(conn, statement, parameters, context, executemany, seconds):
+        second.append((statement, seconds))
+
+    listen_statements(engine, record_first)
+    listen_statements(engine, record_second)
+    listen_statements(engine, record_first)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM missing_table"))
+            # The failed statement's start time was discarded
+            assert connection.info[STARTED_KEY] == []
+    finally:
+        remove_statement_listener(engine, record_first)
+        remove_statement_listener(engine, record_second)
+
+    assert first == second
+    assert [statement for statement, _ in first] == ["SELECT 1"]
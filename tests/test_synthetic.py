@@ -0,0 +1,141 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine, func, select
+
+from app.clients.service import synthetic
+from app.clients.service.synthetic import (
+    CASE_COLUMNS,
+    CLIENT_COLUMNS,
+    SyntheticGenerator,
+    load_csv,
+    write_csv,
+    write_database,
+)
+from app.database import prepare_database
+from app.models import Client, ClientCase, User
+from app.models.overview import (
+    client_overview,
+    client_overview_cases,
+    rebuild_client_overview,
+)
+
+
+@pytest.fixture(scope="module")
+def generator():
+    return SyntheticGenerator.from_csv(seed=7, case_workers=5, cases_per_client=2)
+
+
+def _concat(chunks, table):
+    return {
+        name: np.concatenate([chunk[table][name] for chunk in chunks])
+        for name in chunks[0][table]
+    }
+
+
+def _overview(connection):
+    cases = client_overview_cases.c
+    return (
+        connection.execute(
+            select(client_overview).order_by(client_overview.c.id)
+        ).all(),
+        connection.execute(
+            select(client_overview_cases).order_by(cases.client_id, cases.user_id)
+        ).all(),
+    )
+
+
+def test_generation_is_seeded(generator, monkeypatch):
+    """Test that a seed reproduces the same rows and another seed does not"""
+    monkeypatch.setattr(synthetic, "CHUNK_ROWS", 400)
+    first = _concat(list(generator.chunks(1000)), "cases")
+    again = _concat(list(generator.chunks(1000)), "cases")
+    assert all(np.array_equal(first[name], again[name]) for name in first)
+    other = SyntheticGenerator(generator.model, seed=8, case_workers=5)
+    assert not np.array_equal(
+        _concat(list(other.chunks(1000)), "cases")["success_rate"][:100],
+        first["success_rate"][:100],
+    )
+
+
+def test_generated_data_follows_the_csv(generator):
+    """Test values, means and correlations against data_commontool.csv"""
+    source = load_csv()
+    [chunk] = generator.chunks(20000)
+    clients, cases = chunk["clients"], chunk["cases"]
+    for name in CLIENT_COLUMNS:
+        assert set(np.unique(clients[name])) <= set(source[name])
+        spread = max(source[name].std(), 1)
+        assert abs(clients[name].mean() - source[name].mean()) < 0.1 * spread
+    for name in CASE_COLUMNS:
+        assert set(np.unique(cases[name])) <= set(source[name])
+
+    # Dependence between a client column and the outcome carries over
+    pairs = [("age", "work_experience"), ("currently_employed", "success_rate")]
+    for left, right in pairs:
+        expected = np.corrcoef(source[left], source[right])[0, 1]
+        owner = cases["client_id"] - 1
+        values = clients[left][owner] if left in clients else cases[left]
+        right_values = clients[right][owner] if right in clients else cases[right]
+        actual = np.corrcoef(values, right_values)[0, 1]
+        assert abs(actual - expected) < 0.15
+
+
+def test_cases_have_distinct_case_workers(generator):
+    """Test that every client has 1..case_workers cases with distinct workers"""
+    [chunk] = generator.chunks(5000, first_id=101)
+    cases = chunk["cases"]
+    counts = np.bincount(cases["client_id"] - 101, minlength=5000)
+    assert counts.min() >= 1 and counts.max() <= 5
+    assert 1.8 < counts.mean() < 2.2
+    keys = cases["client_id"] * 10 + cases["worker"]
+    assert len(np.unique(keys)) == len(keys)
+
+
+def test_write_database(tmp_path, generator):
+    """Test that clients, cases and a consistent read model are written"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'synthetic.db'}")
+    prepare_database(engine)
+    cases = write_database(generator, engine, 300)
+    cases += write_database(generator, engine, 200)
+
+    with engine.connect() as connection:
+        assert connection.execute(select(func.count(Client.id))).scalar() == 500
+        assert connection.execute(select(func.max(Client.id))).scalar() == 500
+        assert (
+            connection.execute(select(func.count()).select_from(ClientCase)).scalar()
+            == cases
+        )
+        assert connection.execute(select(func.count(User.id))).scalar() == 5
+        overview = _overview(connection)
+    assert rebuild_client_overview(engine) is False
+    rebuild_client_overview(engine, force=True)
+    with engine.connect() as connection:
+        assert _overview(connection) == overview
+    engine.dispose()
+
+
+def test_write_csv(tmp_path, generator, client, admin_headers):
+    """Test that CSV output has matching case rows and imports through /bulk"""
+    cases = write_csv(generator, tmp_path, 250)
+    with open(tmp_path / "clients.csv", newline="") as file:
+        clients = list(csv.DictReader(file))
+    with open(tmp_path / "client_cases.csv", newline="") as file:
+        case_rows = list(csv.DictReader(file))
+    assert len(clients) == 250 and len(case_rows) == cases
+    assert list(clients[0]) == ["id"] + CLIENT_COLUMNS
+    assert {row["canada_born"] for row in clients} <= {"0", "1"}
+    assert {int(row["client_id"]) for row in case_rows} == set(range(1, 251))
+    assert {int(row["user_id"]) for row in case_rows} <= set(range(1, 6))
+
+    response = client.post(
+        "/clients/bulk",
+        content=(tmp_path / "clients.csv").read_bytes(),
+        headers={**admin_headers, "Content-Type": "text/csv"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    summary = json.loads(response.text.splitlines()[-1])["summary"]
+    assert summary == {"rows": 250, "created": 250, "invalid": 0}
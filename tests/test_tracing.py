@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from app.core import tracing
+from app.core.tracing import (
+    Exporter,
+    FileExporter,
+    Span,
+    Trace,
+    parse_traceparent,
+    summarize,
+)
+from tests.test_explain import check_recommendations_with_explanations
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class CollectingExporter(Exporter):
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = CollectingExporter()
+    monkeypatch.setattr(tracing, "exporter", exporter)
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATIO", 0.0)
+    return exporter
+
+
+def test_parse_traceparent():
+    """Test that W3C traceparent headers are parsed and invalid ones ignored"""
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (
+        TRACE_ID,
+        PARENT_ID,
+        True,
+    )
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")[2] is False
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent("not a traceparent") is None
+    assert parse_traceparent(None) is None
+
+
+def test_request_spans(client, admin_headers, exporter):
+    """Test that a sampled request records auth, service and repository spans"""
+    response = client.get(
+        "/clients/search/by-services?employment_assistance=true",
+        headers={**admin_headers, "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"},
+    )
+    assert response.status_code == 200
+    assert response.headers["X-Trace-Id"] == TRACE_ID
+
+    [trace] = exporter.traces
+    spans = {span["name"]: span for span in trace.spans}
+    root = spans["GET /clients/search/by-services"]
+    assert root["kind"] == "SERVER"
+    assert root["parentSpanId"] == PARENT_ID
+    assert root["attributes"]["http.response.status_code"] == 200
+    assert root["attributes"]["http.route"] == "/clients/search/by-services"
+    for name in (
+        "auth.get_current_user",
+        "CaseQueryService.get_clients_by_services",
+        "http.send",
+    ):
+        assert spans[name]["parentSpanId"] == root["spanId"]
+    repository = spans["ClientOverviewRepository.get_by_services"]
+    assert repository["parentSpanId"] == (
+        spans["CaseQueryService.get_clients_by_services"]["spanId"]
+    )
+    assert {span["traceId"] for span in trace.spans} == {TRACE_ID}
+    for span in trace.spans:
+        assert root["startTimeUnixNano"] <= span["startTimeUnixNano"]
+        assert span["endTimeUnixNano"] <= root["endTimeUnixNano"]
+
+
+def test_unsampled_requests_not_recorded(client, admin_headers, exporter):
+    """Test that sampling decisions of callers and the ratio are respected"""
+    response = client.get("/clients/1", headers=admin_headers)
+    assert "X-Trace-Id" not in response.headers
+    client.get(
+        "/clients/1",
+        headers={**admin_headers, "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"},
+    )
+    assert exporter.traces == []
+
+
+def test_inference_spans(client, admin_headers, exporter, monkeypatch):
+    """Test that recommendations record scoring, inference and explain spans"""
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATIO", 1.0)
+    check_recommendations_with_explanations(client, admin_headers)
+
+    names = {span["name"] for trace in exporter.traces for span in trace.spans}
+    assert {
+        "POST /clients/recommendations",
+        "build_scoring_rows",
+        "summarize_predictions",
+        "explain_top_recommendations",
+        "inference.predict",
+    } <= names
+    [predict] = [
+        span
+        for trace in exporter.traces
+        for span in trace.spans
+        if span["name"] == "inference.predict"
+    ][:1]
+    assert predict["attributes"]["model"] == "recommendation"
+
+
+def test_file_export_and_summary(tmp_path, monkeypatch):
+    """Test that exported spans summarize into total and self time"""
+    monkeypatch.setattr(tracing, "TRACE_MAX_SPANS", 1)
+    path = tmp_path / "traces.jsonl"
+    trace = Trace(TRACE_ID, FileExporter(str(path)))
+    with Span(trace, "root") as root:
+        with Span(trace, "child", root.span_id):
+            pass
+        with Span(trace, "dropped", root.span_id):
+            pass
+    assert trace.dropped == 1
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["child", "root"]
+    summary = {row["name"]: row for row in summarize(spans)}
+    assert summary["root"]["count"] == 1
+    assert summary["root"]["self_ms"] <= summary["root"]["total_ms"]
+    assert summary["child"]["self_ms"] == summary["child"]["total_ms"]